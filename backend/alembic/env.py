@@ -1,8 +1,9 @@
 from logging.config import fileConfig
+from sqlalchemy import engine_from_config, pool
 from sqlmodel import SQLModel
 from alembic import context
 
-from database.engine import engine
+from core.config import settings
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -13,6 +14,10 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# L'URL de la base vient des paramètres de l'application (.env)
+# ("%" doublés pour l'interpolation de configparser).
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -53,7 +58,11 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations_online():
-    connectable = engine
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
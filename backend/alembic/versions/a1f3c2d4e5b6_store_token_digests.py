@@ -0,0 +1,62 @@
+"""store token digests
+
+Revision ID: a1f3c2d4e5b6
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a1f3c2d4e5b6"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("tokens"):
+        # Base vierge : /auth/init-db crée directement le schéma à jour.
+        return
+
+    # Idempotente : une table créée par le DDL actuel a déjà token_hash.
+    columns = {column["name"] for column in inspector.get_columns("tokens")}
+    constraints = {
+        constraint["name"] for constraint in inspector.get_unique_constraints("tokens")
+    }
+
+    # Clé de recherche : SHA-256 du token (32 octets) au lieu du JWT brut.
+    if "token_hash" not in columns:
+        op.execute("ALTER TABLE tokens ADD COLUMN token_hash BYTEA")
+    if "token" in columns:
+        op.execute(
+            "UPDATE tokens SET token_hash = sha256(convert_to(token, 'UTF8')) "
+            "WHERE token_hash IS NULL"
+        )
+        op.execute("ALTER TABLE tokens DROP COLUMN token")
+    op.execute("ALTER TABLE tokens ALTER COLUMN token_hash SET NOT NULL")
+    if "tokens_token_hash_key" not in constraints:
+        op.execute(
+            "ALTER TABLE tokens ADD CONSTRAINT tokens_token_hash_key UNIQUE (token_hash)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("tokens"):
+        return
+    columns = {column["name"] for column in inspector.get_columns("tokens")}
+
+    # Les tokens bruts ne sont pas récupérables : les sessions sont fermées.
+    op.execute("DELETE FROM tokens")
+    if "token_hash" in columns:
+        op.execute("ALTER TABLE tokens DROP COLUMN token_hash")
+    if "token" not in columns:
+        op.execute("ALTER TABLE tokens ADD COLUMN token VARCHAR(1024) UNIQUE NOT NULL")
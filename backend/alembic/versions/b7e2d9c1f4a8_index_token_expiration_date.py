@@ -0,0 +1,38 @@
+"""index token expiration date
+
+Revision ID: b7e2d9c1f4a8
+Revises: a1f3c2d4e5b6
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2d9c1f4a8"
+down_revision: Union[str, Sequence[str], None] = "a1f3c2d4e5b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("tokens"):
+        # Base vierge : /auth/init-db crée la table avec son index.
+        return
+    # Sert la purge par lots des tokens expirés (TokenPurgeService).
+    # Déjà présent sur une base initialisée par le DDL actuel.
+    op.create_index(
+        "tokens_expiration_date_idx",
+        "tokens",
+        ["expiration_date"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("tokens_expiration_date_idx", table_name="tokens", if_exists=True)
@@ -33,6 +33,7 @@ class FullFileItem(BaseModel):
     last_modified: datetime
     etag: Optional[str]
     content_type: Optional[str]
+    tree_hash: Optional[str] = None  # Dossiers : empreinte du sous-arbre
 
     class Config:
         json_encoders = {
@@ -46,6 +47,7 @@ class FullFileTreeResponse(BaseModel):
     path: str
     items: list[FullFileItem]
     total_items: int
+    tree_hash: Optional[str] = None  # Empreinte du dossier listé
 
     class Config:
         json_encoders = {datetime: lambda v: v.isoformat()}
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Literal, Optional, Union
 from app.utils.response import BaseResponse
 
@@ -33,13 +33,78 @@ class VideoMetadata(FileMetadata):
     fps: Optional[float]
 
 
+class AudioMetadata(FileMetadata):
+    duration: float
+    codec: Optional[str]
+    bitrate: Optional[int]
+    sample_rate: Optional[int]
+    channels: Optional[int]
+
+
 class FolderMetadata(BaseMetadata):
     file_count: int
+    size_bytes: Optional[int] = None
+    folder_count: Optional[int] = None
+
+
+class FolderUsage(BaseModel):
+    path: str
+    size_bytes: int
+    file_count: int
+    folder_count: int
+
+
+class FolderUsageResponse(FolderUsage):
+    children: list[FolderUsage]
+
+
+class TreeHash(BaseModel):
+    path: str
+    tree_hash: str
+
+
+class TreeHashResponse(TreeHash):
+    children: list[TreeHash]
 
 
 ObjectMetadata = Union[FileMetadata, FolderMetadata]
 
 
+class StatsItems(BaseModel):
+    paths: list[str] = Field(max_length=500)
+
+
+class StatsError(BaseModel):
+    path: str
+    status_code: int
+    detail: str
+
+
+class BulkStatsResponse(BaseModel):
+    # Types concrets en premier : la sérialisation garde width, duration...
+    items: list[
+        Union[ImageMetadata, VideoMetadata, AudioMetadata, FileMetadata, FolderMetadata]
+    ]
+    errors: list[StatsError]
+
+
+class Change(BaseModel):
+    id: str
+    op: Literal["create", "update", "delete", "move"]
+    path: str
+    is_dir: bool
+    timestamp: float
+    destination: Optional[str] = None
+    size: Optional[int] = None
+
+
+class ChangesResponse(BaseModel):
+    changes: list[Change]
+    cursor: str
+    reset: bool  # curseur trop ancien : refaire un listing complet
+    has_more: bool
+
+
 class CreateFolder(BaseModel):
     currentPath: str
     folderPath: str
@@ -65,6 +130,25 @@ class CompressItems(BaseModel):
     destination_folder: str
 
 
+ArchiveFormat = Literal["zip", "tar", "tar.zst"]
+
+
+class DownloadItems(BaseModel):
+    objects: list[str]
+    archive_name: str = "download"
+    format: ArchiveFormat = "zip"
+
+
+class ThumbnailBatch(BaseModel):
+    """Liste explicite de chemins, ou une page d'un dossier (comme /tree)."""
+
+    paths: list[str] = []
+    folder: Optional[str] = None
+    page: int = Field(default=1, gt=0)
+    per_page: int = Field(default=30, gt=0, le=100)
+    size: int = 256
+
+
 class ResolvePathResponse(BaseModel):
     path: str
     exists: bool
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 from pydantic import BaseModel, EmailStr
 from pydantic import field_validator
@@ -13,6 +14,12 @@ class User(BaseModel):
     creation_date: datetime
 
 
+class StorageUsage(BaseModel):
+    used_bytes: int
+    quota_bytes: Optional[int]
+    available_bytes: Optional[int]
+
+
 class CompleteUser(User):
     password: str
 
@@ -3,7 +3,6 @@ import asyncio
 
 from fastapi import HTTPException, status
 from fastapi import Request
-from passlib.context import CryptContext
 
 
 from app.schemas.auth import UserCreate, UserLogin
@@ -14,12 +13,15 @@ from app.schemas.token import Token
 from app.services.minio.minio_service import MinioService, get_minio_service
 from app.services.profile_picture_service import ProfilePictureService
 from database.connection_management import ConnectionManager
+from core.auth_cache import AuthCache, get_auth_cache
 from core.config import settings
 from core.logging import setup_logger
+from core.password import password_hasher
+from core.revocation import RevocationList, get_revocation_list
 from core.security import JWTService
 
 from database.services.user import create_user, get_user_through_email
-from database.services.token import create_token
+from database.services.token import create_token, delete_token
 
 
 logger = setup_logger(__name__)
@@ -32,19 +34,21 @@ class AuthService:
     """
 
     def __init__(
-        self, connection_manager: ConnectionManager, minio_service: MinioService
+        self,
+        connection_manager: ConnectionManager,
+        minio_service: MinioService,
+        auth_cache: AuthCache | None = None,
+        revocations: RevocationList | None = None,
     ):
         self.connection_manager = connection_manager
-        self.pwd_context = CryptContext(
-            schemes=["argon2"],
-            deprecated="auto",
-            argon2__rounds=12,  # Nombre d'itérations
-            argon2__memory_cost=65536,  # Mémoire utilisée (en KiB)
-            argon2__parallelism=2,  # Nombre de threads
-        )
+        self.auth_cache = auth_cache
+        self.revocations = revocations
+        self.password_hasher = password_hasher
         self.SECRET_KEY: str = settings.SECRET_KEY
         self.ALGORITHM: str = settings.ALGORITHM
-        self.jwt_service: JWTService = JWTService(self.connection_manager)
+        self.jwt_service: JWTService = JWTService(
+            self.connection_manager, auth_cache, revocations
+        )
         self.minio_service = minio_service
 
     async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
@@ -59,7 +63,9 @@ class AuthService:
             bool: True si le mot de passe est valide, False sinon.
         """
         try:
-            return self.pwd_context.verify(plain_password, hashed_password)
+            return await self.password_hasher.verify(plain_password, hashed_password)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Erreur lors de la vérification du mot de passe: {e}")
             raise HTTPException(
@@ -78,7 +84,9 @@ class AuthService:
             str: Hachage du mot de passe (bcrypt).
         """
         try:
-            return self.pwd_context.hash(password)
+            return await self.password_hasher.hash(password)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Erreur lors du hachage du mot de passe: {e}")
             raise HTTPException(
@@ -111,7 +119,7 @@ class AuthService:
 
         now = str(datetime.now())
 
-        user: User = create_user(
+        user: User = await create_user(
             self.connection_manager, **payload_data, creation_date=now
         )
 
@@ -120,6 +128,9 @@ class AuthService:
                 "sub": payload.email,
                 "user_id": user.id,
                 "username": user.username,
+                # Claims de profil, pour le mode sans état (AUTH_STATELESS)
+                "full_name": user.full_name,
+                "creation_date": user.creation_date.isoformat(),
             }
         )
 
@@ -132,7 +143,7 @@ class AuthService:
 
         asyncio.create_task(provision_storage_and_avatar())
 
-        create_token(
+        await create_token(
             self.connection_manager,
             token=token.token,
             scope=str(token.scope),
@@ -144,7 +155,7 @@ class AuthService:
         return {"user": user, "token": token}
 
     async def auth_login_user(self, payload: UserLogin):
-        user: CompleteUser | None = get_user_through_email(
+        user: CompleteUser | None = await get_user_through_email(
             self.connection_manager, payload.email
         )
 
@@ -167,6 +178,9 @@ class AuthService:
                 "sub": payload.email,
                 "user_id": user.id,
                 "username": user.username,
+                # Claims de profil, pour le mode sans état (AUTH_STATELESS)
+                "full_name": user.full_name,
+                "creation_date": user.creation_date.isoformat(),
             }
         )
 
@@ -179,7 +193,7 @@ class AuthService:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Bucket doesn't exist"
             )
 
-        create_token(
+        await create_token(
             self.connection_manager,
             token=token.token,
             scope=str(token.scope),
@@ -199,12 +213,20 @@ class AuthService:
             "token": token,
         }
 
-    async def logout_user(self, user: User):
-        pass
+    async def logout_user(self, user: User, token: str):
+        """Révoque le token de la session et le retire du cache d'authentification."""
+        await delete_token(self.connection_manager, token)
+        if self.auth_cache:
+            await self.auth_cache.invalidate_token(token)
+        if self.revocations:
+            payload = self.jwt_service.decode_token(token)
+            await self.revocations.revoke(payload["jti"], payload["exp"])
 
 
 def get_auth_service(request: Request) -> AuthService:
     return AuthService(
         connection_manager=request.app.state.database,
         minio_service=get_minio_service(request),
+        auth_cache=get_auth_cache(request),
+        revocations=get_revocation_list(request),
     )
@@ -0,0 +1,134 @@
+import re
+import time
+from typing import Literal
+
+import redis.asyncio as redis
+from fastapi import HTTPException, status
+
+from core.config import settings
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+ChangeOp = Literal["create", "update", "delete", "move"]
+
+# ID de stream Redis : "<millisecondes>" ou "<millisecondes>-<séquence>"
+STREAM_ID_RE = re.compile(r"^\d+(-\d+)?$")
+
+
+class ChangeFeed:
+    """
+    Journal des modifications d'un bucket, pour la synchronisation différentielle
+    du client desktop.
+
+    Chaque mutation ajoute une entrée au stream Redis "changes:{bucket}" ; l'ID
+    d'entrée (croissant) sert de curseur. Les entrées plus vieilles que
+    CHANGE_FEED_RETENTION_DAYS sont compactées (XADD MINID) : un curseur plus
+    ancien impose une resynchronisation complète (`reset`).
+    Sans Redis, le journal est désactivé.
+    """
+
+    _KEY_PREFIX = "changes"
+    _MAX_BATCH = 1000
+
+    def __init__(self, redis_client: redis.Redis | None) -> None:
+        self.redis = redis_client
+
+    def _key(self, bucket_name: str) -> str:
+        return f"{self._KEY_PREFIX}:{bucket_name}"
+
+    @staticmethod
+    def _retention_ms() -> int:
+        return settings.CHANGE_FEED_RETENTION_DAYS * 24 * 3600 * 1000
+
+    async def record(
+        self,
+        bucket_name: str,
+        op: ChangeOp,
+        path: str,
+        destination: str | None = None,
+        size: int | None = None,
+    ) -> None:
+        if not self.redis:
+            return
+
+        fields = {"op": op, "path": path, "is_dir": int(path.endswith("/"))}
+        if destination is not None:
+            fields["destination"] = destination
+        if size is not None:
+            fields["size"] = size
+
+        cutoff_ms = int(time.time() * 1000) - self._retention_ms()
+        try:
+            key = self._key(bucket_name)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.xadd(key, fields, minid=cutoff_ms, approximate=True)
+            # Un utilisateur inactif ne garde pas de stream indéfiniment.
+            pipe.pexpire(key, self._retention_ms())
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Journal des modifications indisponible: {e}")
+
+    async def read(
+        self, bucket_name: str, since: str | None, limit: int = _MAX_BATCH
+    ) -> dict:
+        """
+        Modifications postérieures au curseur `since`.
+
+        - sans curseur : aucune modification, seulement le curseur courant
+          (le client fait un listing complet puis suit le journal) ;
+        - curseur antérieur à la rétention : `reset` à True, resynchronisation.
+        """
+        if not self.redis:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Journal des modifications indisponible",
+            )
+
+        key = self._key(bucket_name)
+        limit = max(1, min(limit, self._MAX_BATCH))
+
+        if since is not None:
+            if not STREAM_ID_RE.fullmatch(since):
+                raise HTTPException(status_code=400, detail="Curseur invalide")
+            since_ms = int(since.split("-")[0])
+
+        # Horloge Redis : c'est elle qui génère les IDs du stream.
+        seconds, microseconds = await self.redis.time()
+        now_ms = seconds * 1000 + microseconds // 1000
+        if since is None or since_ms < now_ms - self._retention_ms():
+            last = await self.redis.xrevrange(key, count=1)
+            return {
+                "changes": [],
+                # Journal vide : curseur horodaté (juste avant la prochaine
+                # entrée possible) pour détecter plus tard un curseur trop ancien.
+                "cursor": last[0][0] if last else f"{now_ms - 1}-0",
+                "reset": since is not None,
+                "has_more": False,
+            }
+
+        entries = await self.redis.xrange(key, min=f"({since}", count=limit + 1)
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        changes = []
+        for entry_id, fields in entries:
+            change = {
+                "id": entry_id,
+                "op": fields["op"],
+                "path": "/" + fields["path"],
+                "is_dir": fields.get("is_dir") == "1",
+                "timestamp": int(entry_id.split("-")[0]) / 1000,
+            }
+            if "destination" in fields:
+                change["destination"] = "/" + fields["destination"]
+            if "size" in fields:
+                change["size"] = int(fields["size"])
+            changes.append(change)
+
+        return {
+            "changes": changes,
+            "cursor": entries[-1][0] if entries else since,
+            "reset": False,
+            "has_more": has_more,
+        }
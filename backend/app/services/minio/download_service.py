@@ -1,21 +1,51 @@
-from typing import Iterator, cast
-import zipfile
+import itertools
+import threading
+from typing import Callable, Iterable, Iterator, cast
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from minio import Minio, S3Error
 from app.services.minio.bucket_service import BucketService
+from app.services.minio.change_feed import ChangeFeed
+from app.services.minio.folder_stats import FolderStatsService
+from app.services.minio.quota_service import QuotaService
 from app.utils.minio_utils import MinioUtils
+from app.schemas.files import ArchiveFormat
+from app.utils.archive_utils import (
+    ArchiveEntry,
+    ReadRange,
+    StoreZipLayout,
+    TarLayout,
+    zstd_compress_stream,
+)
+from core.config import settings
 from core.logging import setup_logger
-import zipstream
 import mimetypes
 
 logger = setup_logger(__name__)
 
 
 class DownloadService:
-    def __init__(self, minio: Minio, bucket_service: BucketService) -> None:
+    # CRC32 des objets déjà servis dans une archive, indexés par etag : une reprise
+    # (Range) n'a alors pas à relire les fichiers pour le répertoire central.
+    _CRC_CACHE_MAX_KEYS = 10000
+
+    def __init__(
+        self,
+        minio: Minio,
+        bucket_service: BucketService,
+        folder_stats: FolderStatsService | None = None,
+        quota: QuotaService | None = None,
+        change_feed: ChangeFeed | None = None,
+    ) -> None:
         self.minio = minio
         self.bucket_service = bucket_service
+        self.folder_stats = folder_stats or FolderStatsService(minio, None)
+        self.quota = quota or QuotaService(minio, self.folder_stats)
+        self.change_feed = change_feed or ChangeFeed(None)
+
+        self._crc_cache_lock = threading.Lock()
+        self._crc_cache: dict[tuple[str, str, str | None], int] = {}
 
     async def upload_file(self, user_id: int, file: UploadFile, path: str = ""):
         """
@@ -44,13 +74,21 @@ class DownloadService:
             file_size = file.file.tell()
             file.file.seek(0)
 
-            self.minio.put_object(
+            await self.quota.ensure_available(bucket_name, file_size)
+
+            result = self.minio.put_object(
                 bucket_name=bucket_name,
                 object_name=object_name,
                 data=file.file,
                 length=file_size,
                 content_type=content_type,
             )
+            await self.folder_stats.apply(
+                bucket_name, [(object_name, file_size, result.etag)]
+            )
+            await self.change_feed.record(
+                bucket_name, "create", object_name, size=file_size
+            )
 
             return {"name": object_name}
 
@@ -64,13 +102,111 @@ class DownloadService:
                 detail=f"Échec de l'upload: {str(e)}",
             )
 
-    # TODO : FONCTIONNE PAS !!! =>>>
+    def _stream_object_range(
+        self, bucket_name: str, object_name: str, offset: int, length: int
+    ) -> Iterator[bytes]:
+        if length <= 0:
+            return
+        response = self.minio.get_object(
+            bucket_name, object_name, offset=offset, length=length
+        )
+        try:
+            for chunk in response.stream(settings.MINIO_ZIP_STREAM_CHUNK_SIZE):
+                yield bytes(chunk)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def _archive_reader(self, bucket_name: str) -> ReadRange:
+        def read_range(
+            entry: ArchiveEntry, offset: int, length: int
+        ) -> Iterator[bytes]:
+            return self._stream_object_range(
+                bucket_name, entry.object_name, offset, length
+            )
+
+        return read_range
+
+    def _crc_cache_load(
+        self, bucket_name: str, entries: list[ArchiveEntry]
+    ) -> dict[int, int]:
+        with self._crc_cache_lock:
+            return {
+                index: self._crc_cache[(bucket_name, entry.object_name, entry.etag)]
+                for index, entry in enumerate(entries)
+                if (bucket_name, entry.object_name, entry.etag) in self._crc_cache
+            }
+
+    def _crc_cache_store(
+        self, bucket_name: str, entries: list[ArchiveEntry], crcs: dict[int, int]
+    ) -> None:
+        with self._crc_cache_lock:
+            for index, crc in crcs.items():
+                entry = entries[index]
+                if len(self._crc_cache) >= self._CRC_CACHE_MAX_KEYS:
+                    # Éviction simple : les CRC se recalculent au besoin.
+                    self._crc_cache.pop(next(iter(self._crc_cache)), None)
+                self._crc_cache[(bucket_name, entry.object_name, entry.etag)] = crc
+
+    def _ranged_response(
+        self,
+        body: Callable[[int, int], Iterator[bytes]],
+        total_size: int,
+        etag: str | None,
+        range_header: str | None,
+        if_range: str | None,
+        media_type: str,
+        filename: str,
+    ) -> StreamingResponse:
+        """
+        Construit une réponse 200 (complète) ou 206 (plage) à partir d'un
+        générateur `body(start, end)` et d'une taille connue à l'avance.
+        """
+        # If-Range : on ne reprend que si la représentation n'a pas changé.
+        if if_range and etag and if_range.strip() != etag:
+            range_header = None
+
+        byte_range = MinioUtils.parse_byte_range(range_header, total_size)
+
+        headers = {
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Accept-Ranges": "bytes",
+        }
+        if etag:
+            headers["ETag"] = etag
+
+        if byte_range is None:
+            headers["Content-Length"] = str(total_size)
+            return StreamingResponse(
+                body(0, total_size - 1), media_type=media_type, headers=headers
+            )
+
+        start, end = byte_range
+        headers["Content-Length"] = str(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{total_size}"
+        return StreamingResponse(
+            body(start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
+        )
 
     async def download_object(
-        self, user_id: int, object_name: str
+        self,
+        user_id: int,
+        object_name: str,
+        range_header: str | None = None,
+        if_range: str | None = None,
+        archive_format: ArchiveFormat = "zip",
     ) -> StreamingResponse:
         """
         Télécharge un fichier ou un dossier depuis MinIO.
+
+        Les dossiers sont servis sous forme d'archive ZIP64 non compressée (ou tar)
+        dont la taille est calculée depuis le listing : `Content-Length` est connu
+        et les requêtes `Range` permettent de reprendre un téléchargement
+        interrompu. `tar.zst` est streamé compressé, sans taille ni reprise :
+        son listing est consommé au fil du flux.
         """
         bucket_name = await self.bucket_service.get_user_bucket(user_id)
 
@@ -79,71 +215,214 @@ class DownloadService:
             object_name, is_folder=object_name.endswith("/")
         )
 
-        def try_get_file():
+        stat = None
+        if object_name and not object_name.endswith("/"):
             try:
-                return self.minio.get_object(bucket_name, object_name)
+                stat = await run_in_threadpool(
+                    self.minio.stat_object, bucket_name, object_name
+                )
             except S3Error:
-                return None
+                stat = None
 
-        response = try_get_file()
-
-        if response:
+        if stat is not None:
             filename = object_name.split("/")[-1]
-
-            def file_iterator():
-                try:
-                    for chunk in response.stream(1024 * 1024):
-                        yield bytes(chunk)
-                finally:
-                    response.close()
-                    response.release_conn()
-
-            return StreamingResponse(
-                file_iterator(),
+            size = stat.size or 0
+
+            def file_body(start: int, end: int) -> Iterator[bytes]:
+                return self._stream_object_range(
+                    bucket_name, object_name, start, end - start + 1
+                )
+
+            return self._ranged_response(
+                file_body,
+                total_size=size,
+                etag=f'"{stat.etag}"' if stat.etag else None,
+                range_header=range_header,
+                if_range=if_range,
                 media_type="application/octet-stream",
-                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+                filename=filename,
             )
 
         prefix = object_name.rstrip("/") + "/"
 
-        objects_iter = self.minio.list_objects(
-            bucket_name, prefix=prefix, recursive=True
+        listing = iter(
+            self.minio.list_objects(bucket_name, prefix=prefix, recursive=True)
         )
+        first = await run_in_threadpool(next, listing, None)
+        if first is None:
+            raise HTTPException(
+                status_code=404, detail="Fichier ou dossier introuvable."
+            )
 
-        def zip_iterator() -> Iterator[bytes]:
-            z = zipstream.ZipFile(mode="w", compression=zipfile.ZIP_DEFLATED)
+        def folder_entries() -> Iterator[ArchiveEntry]:
+            for obj in itertools.chain([first], listing):
+                if obj.object_name and not obj.object_name.endswith("/"):
+                    yield ArchiveEntry(
+                        arcname=obj.object_name[len(prefix) :],
+                        object_name=obj.object_name,
+                        size=obj.size or 0,
+                        last_modified=obj.last_modified,
+                        etag=obj.etag,
+                    )
+
+        base_name = object_name.rstrip("/")
+        if archive_format == "tar.zst":
+            return self._tar_zst_response(bucket_name, folder_entries(), base_name)
+
+        # ZIP et tar annoncent leur taille : le listing complet est nécessaire.
+        entries = await run_in_threadpool(list, folder_entries())
+
+        return self._archive_response(
+            bucket_name,
+            entries,
+            base_name,
+            archive_format,
+            range_header,
+            if_range,
+        )
 
-            for obj in objects_iter:
-                name = obj.object_name
+    async def download_objects(
+        self,
+        user_id: int,
+        object_names: list[str],
+        archive_name: str = "download",
+        range_header: str | None = None,
+        if_range: str | None = None,
+        archive_format: ArchiveFormat = "zip",
+    ) -> StreamingResponse:
+        """
+        Télécharge une sélection de fichiers/dossiers sous forme d'archive,
+        streamée directement au client sans être écrite dans le bucket.
 
-                if not name or name.endswith("/"):
-                    continue
+        Les noms dans l'archive suivent la même logique que `compress_objects`.
+        """
+        bucket_name = await self.bucket_service.get_user_bucket(user_id)
 
-                try:
-                    response = self.minio.get_object(bucket_name, name)
-                except S3Error:
-                    continue
+        try:
+            sources, normalized_object_names = await run_in_threadpool(
+                MinioUtils.collect_archive_objects,
+                self.minio,
+                bucket_name,
+                object_names,
+            )
+        except S3Error as e:
+            logger.error(f"Erreur MinIO lors de la préparation de l'archive: {e}")
+            raise HTTPException(
+                status_code=500, detail="Impossible de préparer l'archive."
+            )
+
+        if not sources:
+            raise HTTPException(
+                status_code=404, detail="Aucun fichier valide à télécharger."
+            )
+
+        source_prefix = MinioUtils.get_archive_prefix(normalized_object_names)
+
+        entries: list[ArchiveEntry] = []
+        for name, obj in sources.items():
+            arcname = MinioUtils.get_arcname(name, source_prefix)
+            if not arcname:
+                continue
+            entries.append(
+                ArchiveEntry(
+                    arcname=arcname,
+                    object_name=name,
+                    size=obj.size or 0,
+                    last_modified=obj.last_modified,
+                    etag=obj.etag,
+                )
+            )
 
-                relative_path = name[len(prefix) :]
+        archive_name = MinioUtils.sanitize_name(archive_name)
 
-                def stream_file(r=response):
-                    try:
-                        for chunk in r.stream(1024 * 1024):
-                            yield bytes(chunk)
-                    finally:
-                        r.close()
-                        r.release_conn()
+        return self._archive_response(
+            bucket_name,
+            entries,
+            archive_name,
+            archive_format,
+            range_header,
+            if_range,
+        )
 
-                z.write_iter(relative_path, stream_file())
+    def _archive_response(
+        self,
+        bucket_name: str,
+        entries: list[ArchiveEntry],
+        base_name: str,
+        archive_format: ArchiveFormat,
+        range_header: str | None,
+        if_range: str | None,
+    ) -> StreamingResponse:
+        if archive_format == "zip":
+            return self._zip_response(
+                bucket_name, entries, f"{base_name}.zip", range_header, if_range
+            )
+        if archive_format == "tar.zst":
+            return self._tar_zst_response(bucket_name, entries, base_name)
 
-            yield from cast(Iterator[bytes], z)
+        layout = TarLayout(entries)
 
-        zip_name = f"{object_name.rstrip('/')}.zip"
+        read_range = self._archive_reader(bucket_name)
 
+        def tar_body(start: int, end: int) -> Iterator[bytes]:
+            return layout.iter_range(start, end, read_range)
+
+        return self._ranged_response(
+            tar_body,
+            total_size=layout.total_size,
+            etag=layout.etag,
+            range_header=range_header,
+            if_range=if_range,
+            media_type="application/x-tar",
+            filename=f"{base_name}.tar",
+        )
+
+    def _tar_zst_response(
+        self,
+        bucket_name: str,
+        entries: Iterable[ArchiveEntry],
+        base_name: str,
+    ) -> StreamingResponse:
+        # tar.zst : la taille compressée n'est pas connue d'avance.
         return StreamingResponse(
-            zip_iterator(),
+            zstd_compress_stream(
+                TarLayout.stream(entries, self._archive_reader(bucket_name)),
+                level=settings.MINIO_ZSTD_LEVEL,
+                threads=settings.MINIO_ZSTD_THREADS,
+            ),
+            media_type="application/zstd",
+            headers={
+                "Content-Disposition": f'attachment; filename="{base_name}.tar.zst"'
+            },
+        )
+
+    def _zip_response(
+        self,
+        bucket_name: str,
+        entries: list[ArchiveEntry],
+        filename: str,
+        range_header: str | None,
+        if_range: str | None,
+    ) -> StreamingResponse:
+        layout = StoreZipLayout(entries)
+
+        read_range = self._archive_reader(bucket_name)
+
+        def zip_body(start: int, end: int) -> Iterator[bytes]:
+            crcs = self._crc_cache_load(bucket_name, entries)
+            try:
+                yield from layout.iter_range(start, end, read_range, crcs)
+            finally:
+                self._crc_cache_store(bucket_name, entries, crcs)
+
+        return self._ranged_response(
+            zip_body,
+            total_size=layout.total_size,
+            etag=layout.etag,
+            range_header=range_header,
+            if_range=if_range,
             media_type="application/zip",
-            headers={"Content-Disposition": f'attachment; filename="{zip_name}"'},
+            filename=filename,
         )
 
     async def preview_object(
@@ -163,7 +442,9 @@ class DownloadService:
             raise HTTPException(status_code=400, detail="Chemin invalide.")
 
         try:
-            stat = self.minio.stat_object(bucket_name, object_name)
+            stat = await run_in_threadpool(
+                self.minio.stat_object, bucket_name, object_name
+            )
 
             def file_iterator() -> Iterator[bytes]:
                 response = self.minio.get_object(bucket_name, object_name)
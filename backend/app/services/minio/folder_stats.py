@@ -0,0 +1,388 @@
+import asyncio
+import hashlib
+import json
+import struct
+import uuid
+from collections import defaultdict
+from typing import Iterable
+
+import redis.asyncio as redis
+from fastapi.concurrency import run_in_threadpool
+from minio import Minio
+
+from app.utils.minio_utils import MinioUtils
+from core.config import settings
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# (nom d'objet, taille, etag) : un nom terminé par "/" est un marqueur de dossier.
+ObjectEntry = tuple[str, int, str | None]
+FolderCounters = dict[str, int]
+# Compteurs lus (sans les lanes) + "tree_hash".
+FolderStats = dict[str, int | str]
+
+_FIELDS = ("bytes", "files", "folders")
+# Empreinte de l'arborescence : 4 sommes de 32 bits (128 bits au total).
+_HASH_LANES = ("h0", "h1", "h2", "h3")
+_LANE_MASK = 0xFFFFFFFF
+
+
+def _bare_etag(etag: str | None) -> str:
+    return (etag or "").strip('"')
+
+
+class FolderStatsService:
+    """
+    Statistiques récursives des dossiers (octets, fichiers, sous-dossiers),
+    tenues à jour de façon incrémentale dans Redis.
+
+    Chaque préfixe a son hash "folder-stats:{bucket}:{préfixe}" (la racine est le
+    préfixe vide). Une écriture ou suppression applique son delta à tous les
+    dossiers parents, si bien que taille et nombre de fichiers d'un dossier sont
+    une simple lecture, sans `list_objects` récursif.
+
+    Le même hash porte l'empreinte du contenu du dossier (`tree_hash`) : la
+    somme, lane par lane modulo 2^32, de sha256("{chemin}\0{etag}") pour chaque
+    objet du sous-arbre. Elle est additive, donc mise à jour par le même HINCRBY
+    que les compteurs, et change dès qu'un descendant change : le client de
+    synchronisation ne descend que dans les dossiers dont l'empreinte diffère.
+
+    Ce n'est volontairement pas un arbre de Merkle (hash d'un dossier composé
+    des hashes de ses enfants) : recomposer imposerait de relire les frères de
+    chaque dossier parent à chaque écriture, sous verrou, au lieu d'un HINCRBY
+    commutatif en O(profondeur) qui se combine avec le journal des recalculs.
+    L'empreinte additive est plus faible (un multi-ensemble : seules des
+    contributions qui s'annulent exactement sur 128 bits la laissent inchangée)
+    mais elle ne sert qu'à détecter un changement pour un ETag ou une
+    synchronisation, pas à authentifier le contenu : une collision accidentelle
+    est négligeable, et le chemin complet entre dans chaque contribution.
+
+    L'empreinte ne dépend que des etags : un fichier supprimé puis renvoyé à
+    l'identique la laisse inchangée alors que sa date change. La version d'un
+    listing (`version`) y ajoute donc le compteur "writes" du dossier, incrémenté
+    à chaque écriture sous lui, et la génération du bucket, incrémentée à chaque
+    recalcul (qui remet "writes" à zéro et reprend les changements externes).
+
+    Les compteurs d'un bucket ne sont utilisés qu'une fois construits par un
+    recalcul complet (`recompute`), lancé au premier accès puis périodiquement
+    pour corriger une éventuelle dérive. Sans Redis, le service est inactif.
+
+    Un seul recalcul par bucket à la fois (verrou Redis). Pendant qu'il liste
+    le bucket, chaque `apply` inscrit aussi ses objets dans un journal propre à
+    ce recalcul ; le journal est rejoué sur le listing juste avant d'écrire les
+    compteurs, dans une transaction qui recommence si une opération arrive
+    entre-temps : aucun delta n'est écrasé par la reconstruction.
+    """
+
+    _KEY_PREFIX = "folder-stats"
+    # "v2" : les hashes antérieurs n'ont pas d'empreinte, ils sont recalculés.
+    _READY_KEY_PREFIX = "folder-stats-ready:v2"
+    _REPAIR_LOCK_KEY = "folder-stats:repair-lock"
+    _RECOMPUTE_LOCK_PREFIX = "folder-stats-recompute"
+    _JOURNAL_PREFIX = "folder-stats-journal"
+    # Durée maximale d'un recalcul (verrou et journal expirent ensuite).
+    _RECOMPUTE_TTL_S = 1800
+
+    def __init__(self, minio: Minio, redis_client: redis.Redis | None) -> None:
+        self.minio = minio
+        self.redis = redis_client
+        self._repair_task: asyncio.Task | None = None
+
+    def _key(self, bucket_name: str, prefix: str) -> str:
+        return f"{self._KEY_PREFIX}:{bucket_name}:{prefix}"
+
+    def _ready_key(self, bucket_name: str) -> str:
+        return f"{self._READY_KEY_PREFIX}:{bucket_name}"
+
+    def _lock_key(self, bucket_name: str) -> str:
+        return f"{self._RECOMPUTE_LOCK_PREFIX}:{bucket_name}"
+
+    def _journal_key(self, bucket_name: str, token: str) -> str:
+        return f"{self._JOURNAL_PREFIX}:{bucket_name}:{token}"
+
+    @staticmethod
+    def object_digest(object_name: str, etag: str | None) -> tuple[int, ...]:
+        """Contribution d'un objet à l'empreinte de ses dossiers parents."""
+        raw = f"{object_name}\0{_bare_etag(etag)}".encode()
+        return struct.unpack(">4I", hashlib.sha256(raw).digest()[:16])
+
+    @staticmethod
+    def tree_hash(counters: FolderCounters) -> str:
+        """
+        Empreinte hexadécimale (32 caractères) à partir des lanes cumulées :
+        somme de contributions, et non composition des hashes des enfants.
+        """
+        return "".join(
+            f"{int(counters.get(lane, 0)) & _LANE_MASK:08x}" for lane in _HASH_LANES
+        )
+
+    @staticmethod
+    def aggregate(objects: Iterable[ObjectEntry]) -> dict[str, FolderCounters]:
+        """
+        Cumule la contribution de chaque objet sur tous ses dossiers parents.
+
+        "a/b/c.txt" (10 o) compte pour "", "a/" et "a/b/" ; le marqueur "a/b/"
+        compte comme un sous-dossier de "" et "a/".
+        """
+        totals: dict[str, FolderCounters] = defaultdict(
+            lambda: dict.fromkeys(_FIELDS + _HASH_LANES, 0)
+        )
+        for object_name, size, etag in objects:
+            is_folder = object_name.endswith("/")
+            parts = object_name.rstrip("/").split("/")[:-1]
+
+            prefixes = [""]
+            for i in range(len(parts)):
+                prefixes.append("/".join(parts[: i + 1]) + "/")
+
+            digest = FolderStatsService.object_digest(object_name, etag)
+            for prefix in prefixes:
+                counters = totals[prefix]
+                for lane, value in zip(_HASH_LANES, digest):
+                    counters[lane] += value
+                if is_folder:
+                    counters["folders"] += 1
+                else:
+                    counters["bytes"] += size or 0
+                    counters["files"] += 1
+
+            if is_folder:
+                # Le dossier existe même vide.
+                totals[object_name]
+        return dict(totals)
+
+    @classmethod
+    def read_counters(cls, raw: dict) -> FolderStats:
+        """Compteurs publics d'un hash Redis (ou d'un résultat d'`aggregate`)."""
+        counters = {field: max(int(raw.get(field, 0)), 0) for field in _FIELDS}
+        counters["tree_hash"] = cls.tree_hash(raw)
+        return counters
+
+    async def _is_ready(self, bucket_name: str) -> bool:
+        return bool(
+            self.redis and await self.redis.exists(self._ready_key(bucket_name))
+        )
+
+    async def apply(
+        self,
+        bucket_name: str,
+        objects: Iterable[ObjectEntry],
+        sign: int = 1,
+        forget_prefix: str | None = None,
+    ) -> None:
+        """
+        Ajoute (sign=1) ou retire (sign=-1) des objets des compteurs.
+        `forget_prefix` : dossier supprimé dont les hashes sont ensuite effacés.
+        """
+        if not self.redis:
+            return
+        objects = list(objects)
+        totals = self.aggregate(objects)
+        ready_key = self._ready_key(bucket_name)
+        lock_key = self._lock_key(bucket_name)
+
+        async def write(pipe) -> None:
+            ready = await pipe.exists(ready_key)
+            rebuild_token = await pipe.get(lock_key)
+            pipe.multi()
+            if rebuild_token:
+                # Recalcul en cours : il rejouera l'opération sur son listing.
+                journal_key = self._journal_key(bucket_name, rebuild_token)
+                pipe.xadd(journal_key, {"sign": sign, "objects": json.dumps(objects)})
+                pipe.expire(journal_key, self._RECOMPUTE_TTL_S)
+            if not ready:
+                # Le prochain recalcul complet tiendra compte de l'opération.
+                return
+            for prefix, counters in totals.items():
+                if forget_prefix is not None and prefix.startswith(forget_prefix):
+                    pipe.delete(self._key(bucket_name, prefix))
+                    continue
+                for field, value in counters.items():
+                    pipe.hincrby(self._key(bucket_name, prefix), field, sign * value)
+                # Toute écriture change au moins une date du listing
+                pipe.hincrby(self._key(bucket_name, prefix), "writes", 1)
+
+        try:
+            # Recommence si un recalcul démarre ou se termine entre-temps.
+            await self.redis.transaction(write, ready_key, lock_key)
+        except Exception as e:
+            logger.warning(f"Mise à jour des stats de dossiers impossible: {e}")
+
+    async def get(self, bucket_name: str, prefix: str) -> FolderStats | None:
+        """
+        Compteurs d'un dossier ("" pour la racine) et son `tree_hash`,
+        None sans Redis.
+        """
+        if not self.redis:
+            return None
+        try:
+            if not await self._is_ready(bucket_name) and not await self.recompute(
+                bucket_name
+            ):
+                # Construction en cours dans un autre worker.
+                return None
+            raw = await self.redis.hgetall(self._key(bucket_name, prefix))
+        except Exception as e:
+            logger.warning(f"Lecture des stats de dossiers impossible: {e}")
+            return None
+        return self.read_counters(raw)
+
+    async def version(self, bucket_name: str, prefix: str) -> str | None:
+        """
+        Version du contenu d'un dossier ("" pour la racine), qui change dès
+        qu'un descendant est modifié, y compris sa seule date : `tree_hash`,
+        génération du bucket et nombre d'écritures. Ne déclenche jamais de
+        recalcul : None si les compteurs du bucket ne sont pas construits ou si
+        le dossier est inconnu.
+        """
+        if not self.redis:
+            return None
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(self._ready_key(bucket_name))
+            pipe.hgetall(self._key(bucket_name, prefix))
+            generation, raw = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Lecture des stats de dossiers impossible: {e}")
+            return None
+        if not generation or not raw:
+            return None
+        writes = int(raw.get("writes", 0))
+        return f"{self.tree_hash(raw)}.{int(generation):x}.{writes:x}"
+
+    async def get_many(
+        self, bucket_name: str, prefixes: list[str]
+    ) -> dict[str, FolderStats] | None:
+        """Compteurs de plusieurs dossiers en un aller-retour (vue type `du`)."""
+        if not self.redis:
+            return None
+        try:
+            if not await self._is_ready(bucket_name) and not await self.recompute(
+                bucket_name
+            ):
+                # Construction en cours dans un autre worker.
+                return None
+            pipe = self.redis.pipeline(transaction=False)
+            for prefix in prefixes:
+                pipe.hgetall(self._key(bucket_name, prefix))
+            results = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Lecture des stats de dossiers impossible: {e}")
+            return None
+        return {
+            prefix: self.read_counters(raw) for prefix, raw in zip(prefixes, results)
+        }
+
+    @staticmethod
+    def replay(
+        listed: dict[str, tuple[int, str | None]], entries: list
+    ) -> list[ObjectEntry]:
+        """
+        Applique au listing (nom -> (taille, etag)) les opérations journalisées
+        pendant qu'il était produit. Le listing n'étant pas un instantané, une
+        opération peut y figurer déjà : un ajout remplace l'entrée, une
+        suppression ne retire l'objet que s'il a encore l'etag supprimé.
+        """
+        objects = dict(listed)
+        for _, fields in entries:
+            sign = int(fields["sign"])
+            for object_name, size, etag in json.loads(fields["objects"]):
+                current = objects.get(object_name)
+                if sign > 0:
+                    objects[object_name] = (size, etag)
+                elif current and _bare_etag(current[1]) == _bare_etag(etag):
+                    del objects[object_name]
+        return [(name, size, etag) for name, (size, etag) in objects.items()]
+
+    async def recompute(self, bucket_name: str) -> bool:
+        """
+        Reconstruit tous les compteurs d'un bucket depuis un listing complet.
+        False si un autre recalcul du bucket est déjà en cours.
+        """
+        if not self.redis:
+            return False
+
+        token = uuid.uuid4().hex
+        lock_key = self._lock_key(bucket_name)
+        if not await self.redis.set(lock_key, token, nx=True, ex=self._RECOMPUTE_TTL_S):
+            return False
+        journal_key = self._journal_key(bucket_name, token)
+
+        def list_all() -> dict[str, tuple[int, str | None]]:
+            return {
+                obj.object_name: (obj.size or 0, obj.etag)
+                for obj in self.minio.list_objects(bucket_name, recursive=True)
+                if obj.object_name and not MinioUtils.is_hidden_object(obj.object_name)
+            }
+
+        try:
+            listed = await run_in_threadpool(list_all)
+            stale = [
+                key
+                async for key in self.redis.scan_iter(
+                    match=f"{self._KEY_PREFIX}:{bucket_name}:*", count=500
+                )
+            ]
+
+            async def swap(pipe) -> None:
+                journal = await pipe.xrange(journal_key)
+                totals = self.aggregate(self.replay(listed, journal))
+                totals.setdefault("", dict.fromkeys(_FIELDS + _HASH_LANES, 0))
+
+                pipe.multi()
+                if stale:
+                    pipe.delete(*stale)
+                for prefix, counters in totals.items():
+                    for lane in _HASH_LANES:
+                        counters[lane] &= _LANE_MASK
+                    pipe.hset(self._key(bucket_name, prefix), mapping=counters)
+                # Génération du bucket : jamais remise à zéro (voir `version`)
+                pipe.incr(self._ready_key(bucket_name))
+                pipe.delete(journal_key, lock_key)
+
+            # Recommence si une opération est journalisée avant l'écriture.
+            await self.redis.transaction(swap, journal_key)
+        except BaseException:
+            await self.redis.delete(journal_key, lock_key)
+            raise
+        logger.info(f"Stats de dossiers recalculées pour {bucket_name}")
+        return True
+
+    async def repair_all(self) -> None:
+        """Recalcule les compteurs de tous les buckets utilisateurs."""
+        buckets = await run_in_threadpool(self.minio.list_buckets)
+        for bucket in buckets:
+            if bucket.name.startswith("user-"):
+                try:
+                    await self.recompute(bucket.name)
+                except Exception as e:
+                    logger.warning(
+                        f"Recalcul des stats de {bucket.name} impossible: {e}"
+                    )
+
+    async def _repair_loop(self) -> None:
+        interval = settings.FOLDER_STATS_REPAIR_INTERVAL_S
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # Un seul worker répare à chaque cycle.
+                if await self.redis.set(
+                    self._REPAIR_LOCK_KEY, "1", nx=True, ex=interval
+                ):
+                    await self.repair_all()
+            except Exception as e:
+                logger.warning(f"Réparation des stats de dossiers impossible: {e}")
+
+    async def start(self) -> None:
+        if self.redis and settings.FOLDER_STATS_REPAIR_INTERVAL_S > 0:
+            self._repair_task = asyncio.create_task(self._repair_loop())
+
+    async def shutdown(self) -> None:
+        if self._repair_task:
+            self._repair_task.cancel()
+            try:
+                await self._repair_task
+            except asyncio.CancelledError:
+                pass
+            self._repair_task = None
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+from collections import deque
+from datetime import datetime
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.schemas.sse import SSEMessage
+from app.services.minio.metadata_cache import MetadataCache
+from app.services.minio.object_service import ObjectService
+from app.services.minio.thumbnail_service import ThumbnailService
+from app.services.sse_service import SSEManager
+from core.config import settings
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+PipelineJob = tuple[int, str]
+
+
+class MediaPipeline:
+    """
+    Traitement asynchrone des objets fraîchement écrits (upload, copie, compression).
+
+    Les routes déposent (user_id, chemin) dans une file bornée et répondent tout
+    de suite ; un pool de workers calcule ensuite, pour les images, vidéos et
+    sons seulement, les métadonnées, la miniature par défaut des images et
+    l'empreinte SHA-256 du contenu (mises en cache par etag : un contenu déjà
+    traité ne l'est pas deux fois), puis prévient le client par SSE
+    (`media_ready`) pour qu'il rafraîchisse la vignette sans polling.
+
+    Quand la file est pleine (copie d'un gros dossier...), les travaux
+    attendent dans un tampon que le feeder reverse dans la file au rythme des
+    workers. Ce tampon est lui aussi borné (MEDIA_PIPELINE_BACKLOG_SIZE) : au
+    delà, les travaux sont abandonnés et comptés dans `dropped`. Rien n'est
+    perdu pour autant : la miniature est produite au premier affichage.
+    """
+
+    def __init__(
+        self,
+        object_service: ObjectService,
+        sse_manager: SSEManager | None = None,
+        thumbnail_service: ThumbnailService | None = None,
+        workers: int | None = None,
+        max_queue: int | None = None,
+        max_backlog: int | None = None,
+    ) -> None:
+        self.object_service = object_service
+        self.sse_manager = sse_manager
+        self.thumbnail_service = thumbnail_service
+        self.hash_cache = MetadataCache(
+            object_service.metadata_cache.redis, key_prefix="content-hash"
+        )
+        self.workers = workers or settings.MEDIA_PIPELINE_WORKERS
+        self.queue: asyncio.Queue[PipelineJob] = asyncio.Queue(
+            maxsize=max_queue or settings.MEDIA_PIPELINE_QUEUE_SIZE
+        )
+        # Travaux en attente d'une place dans la file
+        self.backlog: deque[PipelineJob] = deque()
+        self.max_backlog = max_backlog or settings.MEDIA_PIPELINE_BACKLOG_SIZE
+        # Travaux abandonnés faute de place dans le tampon (depuis le démarrage)
+        self.dropped = 0
+        self._backlog_ready = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Démarre les workers et le feeder (appelé depuis le lifespan)."""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._feed()))
+
+    async def shutdown(self) -> None:
+        """Arrête les workers ; les traitements en attente sont abandonnés."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, user_id: int, path: str) -> None:
+        """
+        Planifie le traitement d'un fichier ou d'un dossier ("xxx/").
+        File pleine : le travail attend dans le tampon, dans l'ordre d'arrivée ;
+        tampon plein : il est abandonné.
+        """
+        if not self.backlog:
+            try:
+                self.queue.put_nowait((user_id, path))
+                return
+            except asyncio.QueueFull:
+                pass
+        if len(self.backlog) >= self.max_backlog:
+            self.dropped += 1
+            # Un avertissement par rafale, pas un par fichier
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(
+                    f"Pipeline média saturé : {self.dropped} travaux abandonnés"
+                )
+            return
+        self.backlog.append((user_id, path))
+        self._backlog_ready.set()
+
+    async def _feed(self) -> None:
+        while True:
+            await self._backlog_ready.wait()
+            while self.backlog:
+                # Attend qu'un worker libère une place (contre-pression).
+                await self.queue.put(self.backlog[0])
+                self.backlog.popleft()
+            self._backlog_ready.clear()
+
+    async def _worker(self) -> None:
+        while True:
+            user_id, path = await self.queue.get()
+            try:
+                await self.process(user_id, path)
+            except Exception as e:
+                logger.warning(f"Traitement média impossible pour {path}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def process(self, user_id: int, path: str) -> None:
+        bucket_name = await self.object_service.bucket_service.get_user_bucket(user_id)
+
+        if path.endswith("/"):
+            # Dossier copié : chaque fichier est traité séparément.
+            objects = await run_in_threadpool(
+                self.object_service._list_objects, bucket_name, path
+            )
+            for obj in objects:
+                if obj.object_name and not obj.object_name.endswith("/"):
+                    self.enqueue(user_id, obj.object_name)
+            return
+
+        metadata = await self.object_service.get_object_metadata(user_id, path)
+        if metadata.content_type not in ("image", "video", "audio"):
+            # Rien à extraire ni à afficher : le contenu n'est pas relu.
+            return
+        object_name = path.strip("/")
+
+        cached = await self.hash_cache.get(bucket_name, object_name, metadata.etag)
+        if cached is None:
+            cached = {
+                "sha256": await run_in_threadpool(
+                    self._hash_object, bucket_name, object_name
+                )
+            }
+            await self.hash_cache.set(bucket_name, object_name, metadata.etag, cached)
+
+        if self.thumbnail_service and metadata.content_type == "image":
+            await self.thumbnail_service.ensure_thumbnail(
+                bucket_name, object_name, metadata.etag or ""
+            )
+
+        if self.sse_manager:
+            sse_message = SSEMessage(
+                event="media_ready",
+                user_id=user_id,
+                payload={
+                    "path": metadata.path,
+                    "metadata": metadata.model_dump(mode="json"),
+                    "sha256": cached["sha256"],
+                },
+                message="Media processed",
+                timestamp=datetime.now().isoformat(),
+            )
+            await self.sse_manager.notify_user(user_id, sse_message.model_dump())
+
+    def _hash_object(self, bucket_name: str, object_name: str) -> str:
+        digest = hashlib.sha256()
+        response = self.object_service.minio.get_object(bucket_name, object_name)
+        try:
+            for chunk in response.stream(settings.MINIO_ZIP_STREAM_CHUNK_SIZE):
+                digest.update(chunk)
+        finally:
+            response.close()
+            response.release_conn()
+        return digest.hexdigest()
+
+
+def get_media_pipeline(request: Request) -> MediaPipeline | None:
+    """Fournit le pipeline média attaché à l'application (None si MinIO est absent)."""
+    return getattr(request.app.state, "media_pipeline", None)
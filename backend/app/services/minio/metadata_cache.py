@@ -0,0 +1,55 @@
+import json
+
+import redis.asyncio as redis
+
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class MetadataCache:
+    """
+    Cache Redis des métadonnées extraites (dimensions, durée, codecs, empreinte...).
+
+    La clé contient l'etag de l'objet : le contenu étant immuable pour un etag
+    donné, aucune invalidation n'est nécessaire. Une nouvelle version de l'objet
+    produit une nouvelle clé, l'ancienne expire d'elle-même.
+    Sans Redis, le cache est simplement désactivé.
+    """
+
+    _TTL_S = 30 * 24 * 3600
+
+    def __init__(
+        self, redis_client: redis.Redis | None, key_prefix: str = "media-meta"
+    ):
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+
+    def _key(self, bucket_name: str, object_name: str, etag: str) -> str:
+        return f"{self.key_prefix}:{bucket_name}:{etag}:{object_name}"
+
+    async def get(
+        self, bucket_name: str, object_name: str, etag: str | None
+    ) -> dict | None:
+        if not self.redis or not etag:
+            return None
+        try:
+            raw = await self.redis.get(self._key(bucket_name, object_name, etag))
+        except Exception as e:
+            logger.warning(f"Cache metadata indisponible: {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    async def set(
+        self, bucket_name: str, object_name: str, etag: str | None, metadata: dict
+    ) -> None:
+        if not self.redis or not etag:
+            return
+        try:
+            await self.redis.set(
+                self._key(bucket_name, object_name, etag),
+                json.dumps(metadata),
+                ex=self._TTL_S,
+            )
+        except Exception as e:
+            logger.warning(f"Écriture cache metadata impossible: {e}")
@@ -1,26 +1,41 @@
 import datetime
+import hashlib
 import threading
 import time
+from typing import Iterator
 from fastapi import HTTPException, Query, Request
 from fastapi.concurrency import run_in_threadpool
 from minio import Minio
 from minio.error import S3Error
+import orjson
+import redis.asyncio as redis
 
 from app.schemas.file_tree import (
-    SimpleFileItem,
     SimpleFileTreeResponse,
-    FullFileItem,
     FullFileTreeResponse,
 )
 from app.services.minio.bucket_service import BucketService
+from app.services.minio.change_feed import ChangeFeed
+from app.services.minio.folder_stats import FolderStatsService
+from app.services.minio.metadata_cache import MetadataCache
+from app.services.minio.quota_service import QuotaService
 from app.services.minio.object_service import ObjectService
 from app.services.minio.download_service import DownloadService
+from app.services.minio.thumbnail_service import ThumbnailService
+from app.utils.minio_utils import MinioUtils
 from core.logging import setup_logger
 
 
 # Initialisation du logger
 logger = setup_logger(__name__)
 
+# Représentation compacte des listings mis en cache : un tuple par objet, dans
+# l'ordre des champs de SimpleFileItem / FullFileItem, dates déjà sérialisées.
+SIMPLE_FIELDS = ("name", "size", "is_dir", "last_modified")
+FULL_FIELDS = ("name", "is_dir", "size", "last_modified", "etag", "content_type")
+SimpleRow = tuple[str, int | None, bool, str | None]
+FullRow = tuple[str, bool, int | None, str, str | None, str | None]
+
 
 class MinioService:
     # Cache intentionally small + short-lived: it targets "UI refresh storms" (same prefix
@@ -30,30 +45,50 @@ class MinioService:
     _CACHE_MAX_KEYS = 256
     _CACHE_MAX_ITEMS = 2000
 
-    def __init__(self, minio: Minio):
+    def __init__(self, minio: Minio, redis_client: redis.Redis | None = None):
         self.minio: Minio = minio
         self.bucket_service = BucketService(minio)
-        self.object_service = ObjectService(minio, self.bucket_service)
-        self.download_service = DownloadService(minio, self.bucket_service)
+        self.metadata_cache = MetadataCache(redis_client)
+        self.folder_stats = FolderStatsService(minio, redis_client)
+        self.quota = QuotaService(minio, self.folder_stats)
+        self.change_feed = ChangeFeed(redis_client)
+        self.object_service = ObjectService(
+            minio,
+            self.bucket_service,
+            self.metadata_cache,
+            self.folder_stats,
+            self.quota,
+            self.change_feed,
+        )
+        self.download_service = DownloadService(
+            minio, self.bucket_service, self.folder_stats, self.quota, self.change_feed
+        )
+        self.thumbnail_service = ThumbnailService(minio, self.bucket_service)
 
         self._cache_lock = threading.Lock()
-        # key -> (expires_at_monotonic, items)
-        self._simple_list_cache: dict[tuple[str, str], tuple[float, list[SimpleFileItem]]] = {}
-        self._full_list_cache: dict[tuple[str, str, bool], tuple[float, list[FullFileItem]]] = {}
-
-    def _cache_get(self, cache: dict, key):
+        # key -> (expires_at_monotonic, version, items)
+        self._simple_list_cache: dict[
+            tuple[str, str], tuple[float, str | None, list[SimpleRow]]
+        ] = {}
+        self._full_list_cache: dict[
+            tuple[str, str, bool], tuple[float, str | None, list[FullRow]]
+        ] = {}
+
+    def _cache_get(self, cache: dict, key, version: str | None = None):
+        # An entry built for another folder version (see listing_version) is
+        # stale even within its TTL: a listing must never be older than its ETag.
         now = time.monotonic()
         with self._cache_lock:
             entry = cache.get(key)
             if not entry:
                 return None
-            expires_at, payload = entry
-            if expires_at <= now:
+            expires_at, cached_version, payload = entry
+            if expires_at <= now or cached_version != version:
                 cache.pop(key, None)
                 return None
             return payload
 
-    def _cache_set(self, cache: dict, key, payload):
+    def _cache_set(self, cache: dict, key, payload, version: str | None = None):
         # Basic size control to avoid unbounded growth.
         now = time.monotonic()
         expires_at = now + self._CACHE_TTL_S
@@ -61,19 +96,104 @@ class MinioService:
             if len(cache) >= self._CACHE_MAX_KEYS:
                 # Drop one arbitrary key; TTL is short, so a simple eviction is fine.
                 cache.pop(next(iter(cache)), None)
-            cache[key] = (expires_at, payload)
+            cache[key] = (expires_at, version, payload)
 
-    def _is_hidden_object(self, object_name: str | None) -> bool:
-        # Internal reserved prefix (not part of user-visible storage explorer).
-        return bool(object_name) and object_name.startswith("__profile__/")
+    async def listing_version(self, bucket_name: str, prefix: str) -> str | None:
+        """
+        Version courante du contenu d'un dossier (voir FolderStatsService.version),
+        qui change dès qu'un descendant ou sa date est modifié. Lue sans appel
+        MinIO ni recalcul ; None tant qu'elle n'est pas connue (pas de Redis,
+        stats non construites).
+        """
+        return await self.folder_stats.version(bucket_name, prefix)
 
-    async def simple_list_path(
+    async def listing_etag(self, user_id: int, path: str, *variant) -> str | None:
+        """
+        ETag d'un listing : version du dossier + variante de la réponse
+        (endpoint, pagination, format). None si la version n'est pas connue.
+        Un fichier réécrit à l'identique (même etag) change l'ETag : sa date a
+        changé.
+        """
+        bucket_name = await self.bucket_service.get_user_bucket(user_id=user_id)
+        prefix = path.strip("/")
+        if prefix:
+            prefix += "/"
+
+        version = await self.listing_version(bucket_name, prefix)
+        if version is None:
+            return None
+        variant_key = ":".join(str(part) for part in variant).encode()
+        suffix = hashlib.blake2s(variant_key, digest_size=4).hexdigest()
+        return f'"{version}-{suffix}"'
+
+    def _is_hidden_object(self, object_name: str | None) -> bool:
+        # Internal reserved prefixes (not part of user-visible storage explorer).
+        return MinioUtils.is_hidden_object(object_name)
+
+    @staticmethod
+    def _json_datetime(value: datetime.datetime | None, utc_z: bool) -> str | None:
+        """Date au format JSON des modèles publics ("Z" côté SimpleFileItem)."""
+        if value is None:
+            return None
+        text = value.isoformat()
+        if utc_z and text.endswith("+00:00"):
+            text = text[:-6] + "Z"
+        return text
+
+    def _listed_object(
+        self, obj, prefix: str
+    ) -> tuple[str, bool, datetime.datetime | None] | None:
+        """(nom relatif, dossier ?, date) d'un objet listé, None s'il est ignoré."""
+        if not obj.object_name or obj.object_name == prefix:
+            return None
+        if self._is_hidden_object(obj.object_name):
+            return None
+
+        is_dir = obj.object_name.endswith("/")
+        last_modified = obj.last_modified if obj.last_modified else None
+        if is_dir and obj.metadata:
+            lm = obj.metadata.get("x-amz-meta-last_modified")
+            if lm:
+                last_modified = datetime.datetime.fromisoformat(lm)
+        return obj.object_name.removeprefix(prefix).rstrip("/"), is_dir, last_modified
+
+    def _simple_row(self, obj, prefix: str) -> SimpleRow | None:
+        listed = self._listed_object(obj, prefix)
+        if listed is None:
+            return None
+        name, is_dir, last_modified = listed
+        return (
+            name,
+            None if is_dir else obj.size,
+            is_dir,
+            self._json_datetime(last_modified, utc_z=True),
+        )
+
+    def _full_row(self, obj, prefix: str) -> FullRow | None:
+        listed = self._listed_object(obj, prefix)
+        if listed is None:
+            return None
+        name, is_dir, last_modified = listed
+        return (
+            name,
+            is_dir,
+            None if is_dir else obj.size,
+            self._json_datetime(last_modified or datetime.datetime.now(), utc_z=False),
+            obj.etag,
+            obj.content_type,
+        )
+
+    async def simple_list_page(
         self,
         path: str = "",
         user_id: int = 1,
-        page: int = Query(1, gt=0),
-        per_page: int = Query(30, gt=0, le=100),
-    ) -> SimpleFileTreeResponse:
+        page: int = 1,
+        per_page: int = 30,
+    ) -> dict:
+        """
+        Page d'un dossier au format JSON de SimpleFileTreeResponse, sans
+        construire de modèle pydantic par objet (voir `ListingResponse`).
+        """
         try:
             bucket_name = await self.bucket_service.get_user_bucket(user_id=user_id)
             normalized_path = path.strip("/")
@@ -86,64 +206,47 @@ class MinioService:
             start = (page - 1) * per_page
             end = start + per_page
 
+            # Version lue avant le listing : en cas de course, le contenu est
+            # plus récent que la version, jamais l'inverse.
+            version = await self.listing_version(bucket_name, normalized_path)
             cache_key = (bucket_name, normalized_path)
-            cached = self._cache_get(self._simple_list_cache, cache_key)
+            cached = self._cache_get(self._simple_list_cache, cache_key, version)
             if cached is None:
-                def list_objects_all() -> list[SimpleFileItem]:
-                    items: list[SimpleFileItem] = []
-                    for obj in self.minio.list_objects(
-                        bucket_name,
-                        prefix=normalized_path,
-                        recursive=False,
-                    ):
-                        if obj.object_name == normalized_path:
-                            continue
-                        if not obj.object_name:
-                            continue
-                        if self._is_hidden_object(obj.object_name):
-                            continue
-
-                        name = obj.object_name.removeprefix(normalized_path).rstrip("/")
-                        is_dir = obj.object_name.endswith("/")
-
-                        last_modified = obj.last_modified if obj.last_modified else None
-                        if is_dir and obj.metadata:
-                            lm = obj.metadata.get("x-amz-meta-last_modified")
-                            if lm:
-                                last_modified = datetime.datetime.fromisoformat(lm)
-
-                        items.append(
-                            SimpleFileItem(
-                                name=name,
-                                size=None if is_dir else obj.size,
-                                is_dir=is_dir,
-                                last_modified=last_modified,
-                            )
+
+                def list_objects_all() -> list[SimpleRow]:
+                    rows = [
+                        row
+                        for obj in self.minio.list_objects(
+                            bucket_name,
+                            prefix=normalized_path,
+                            recursive=False,
                         )
+                        if (row := self._simple_row(obj, normalized_path))
+                    ]
 
                     # Deterministic ordering for pagination and UI consistency.
-                    items.sort(key=lambda x: (not x.is_dir, (x.name or "").lower()))
-                    return items
+                    rows.sort(key=lambda row: (not row[2], row[0].lower()))
+                    return rows
 
-                all_items = await run_in_threadpool(list_objects_all)
-                if len(all_items) <= self._CACHE_MAX_ITEMS:
-                    self._cache_set(self._simple_list_cache, cache_key, all_items)
+                all_rows = await run_in_threadpool(list_objects_all)
+                if len(all_rows) <= self._CACHE_MAX_ITEMS:
+                    self._cache_set(
+                        self._simple_list_cache, cache_key, all_rows, version
+                    )
             else:
-                all_items = cached
-
-            total_items = len(all_items)
-            objects = all_items[start:end]
+                all_rows = cached
 
+            total_items = len(all_rows)
             total_pages = (total_items + per_page - 1) // per_page
 
-            return SimpleFileTreeResponse(
-                path="/" + normalized_path if normalized_path else "/",
-                items=objects,
-                total_pages=total_pages,
-                total_items=total_items,
-                per_page=per_page,
-                page=page,
-            )
+            return {
+                "path": "/" + normalized_path if normalized_path else "/",
+                "items": [dict(zip(SIMPLE_FIELDS, row)) for row in all_rows[start:end]],
+                "total_pages": total_pages,
+                "total_items": total_items,
+                "per_page": per_page,
+                "page": page,
+            }
 
         except S3Error as e:
             logger.error(f"Échec de la liste du chemin {path} : {e}")
@@ -152,85 +255,87 @@ class MinioService:
                 detail="Impossible de lister le chemin",
             )
 
-    async def full_list_path(
+    async def simple_list_path(
+        self,
+        path: str = "",
+        user_id: int = 1,
+        page: int = Query(1, gt=0),
+        per_page: int = Query(30, gt=0, le=100),
+    ) -> SimpleFileTreeResponse:
+        return SimpleFileTreeResponse(
+            **await self.simple_list_page(path, user_id, page, per_page)
+        )
+
+    async def _full_list_prefix(self, path: str, user_id: int) -> tuple[str, str]:
+        bucket_name = await self.bucket_service.get_user_bucket(user_id=user_id)
+        normalized_path = path.strip("/")
+        if normalized_path:
+            normalized_path += "/"
+
+        if ".." in normalized_path.split("/"):
+            raise HTTPException(status_code=400, detail="Chemin invalide")
+        return bucket_name, normalized_path
+
+    async def full_list_payload(
         self,
         path: str = "",
         user_id: int = 1,
         recursive: bool = True,
-    ) -> FullFileTreeResponse:
+    ) -> dict:
         """
-        Liste TOUS les objets dans un bucket Minio, avec métadonnées complètes.
-        Args:
-            path: Chemin relatif (ex: "dossier/").
-            user_id: ID de l'utilisateur.
-            recursive: Si True, liste aussi les sous-dossiers.
-        Returns:
-            FullFileTreeResponse: Arborescence complète avec hashs, tailles, etc.
+        Listing complet au format JSON de FullFileTreeResponse, sans construire
+        de modèle pydantic par objet (voir `ListingResponse`).
         """
         try:
-            bucket_name = await self.bucket_service.get_user_bucket(user_id=user_id)
-            normalized_path = path.strip("/")
-            if normalized_path:
-                normalized_path += "/"
-
-            if ".." in normalized_path.split("/"):
-                raise HTTPException(status_code=400, detail="Chemin invalide")
+            bucket_name, normalized_path = await self._full_list_prefix(path, user_id)
 
+            version = await self.listing_version(bucket_name, normalized_path)
             cache_key = (bucket_name, normalized_path, recursive)
-            cached = self._cache_get(self._full_list_cache, cache_key)
+            cached = self._cache_get(self._full_list_cache, cache_key, version)
             if cached is None:
-                def list_objects_full() -> list[FullFileItem]:
+
+                def list_objects_full() -> list[FullRow]:
                     objects = self.minio.list_objects(
                         bucket_name, prefix=normalized_path, recursive=recursive
                     )
-                    items: list[FullFileItem] = []
-
-                    for obj in objects:
-                        if obj.object_name == normalized_path:
-                            continue
-                        if not obj.object_name:
-                            continue
-                        if self._is_hidden_object(obj.object_name):
-                            continue
-
-                        name = obj.object_name.removeprefix(normalized_path).rstrip("/")
-                        is_dir = obj.object_name.endswith("/")
-
-                        etag = obj.etag
-                        content_type = obj.content_type
-                        size = obj.size if not is_dir else None
-
-                        last_modified = obj.last_modified if obj.last_modified else None
-                        if is_dir and obj.metadata:
-                            lm = obj.metadata.get("x-amz-meta-last_modified")
-                            if lm:
-                                last_modified = datetime.datetime.fromisoformat(lm)
-
-                        items.append(
-                            FullFileItem(
-                                name=name,
-                                size=size,
-                                is_dir=is_dir,
-                                last_modified=last_modified or datetime.datetime.now(),
-                                etag=etag,
-                                content_type=content_type,
-                            )
-                        )
-
-                    items.sort(key=lambda x: (not x.is_dir, x.name.lower()))
-                    return items
-
-                items = await run_in_threadpool(list_objects_full)
-                if len(items) <= self._CACHE_MAX_ITEMS:
-                    self._cache_set(self._full_list_cache, cache_key, items)
+                    rows = [
+                        row
+                        for obj in objects
+                        if (row := self._full_row(obj, normalized_path))
+                    ]
+                    rows.sort(key=lambda row: (not row[1], row[0].lower()))
+                    return rows
+
+                rows = await run_in_threadpool(list_objects_full)
+                if len(rows) <= self._CACHE_MAX_ITEMS:
+                    self._cache_set(self._full_list_cache, cache_key, rows, version)
             else:
-                items = cached
-
-            return FullFileTreeResponse(
-                path="/" + normalized_path if normalized_path else "/",
-                items=items,
-                total_items=len(items),
+                rows = cached
+
+            items = [dict(zip(FULL_FIELDS, row), tree_hash=None) for row in rows]
+
+            # Empreintes lues à chaque appel : elles ne doivent pas hériter
+            # du TTL du cache de listing.
+            dir_items = {
+                normalized_path + item["name"] + "/": item
+                for item in items
+                if item["is_dir"]
+            }
+            stats = await self.folder_stats.get_many(
+                bucket_name, [normalized_path, *dir_items]
             )
+            tree_hash = None
+            if stats is not None:
+                tree_hash = stats[normalized_path]["tree_hash"]
+                for prefix, item in dir_items.items():
+                    item["tree_hash"] = stats[prefix]["tree_hash"]
+
+            return {
+                "path": "/" + normalized_path if normalized_path else "/",
+                "items": items,
+                "total_items": len(items),
+                "tree_hash": tree_hash,
+            }
 
         except S3Error as e:
             logger.error(f"Échec de la liste complète du chemin {path}: {e}")
@@ -239,6 +344,66 @@ class MinioService:
                 detail=f"Impossible de lister le chemin: {str(e)}",
             )
 
+    async def full_list_path(
+        self,
+        path: str = "",
+        user_id: int = 1,
+        recursive: bool = True,
+    ) -> FullFileTreeResponse:
+        """
+        Liste TOUS les objets dans un bucket Minio, avec métadonnées complètes.
+        Args:
+            path: Chemin relatif (ex: "dossier/").
+            user_id: ID de l'utilisateur.
+            recursive: Si True, liste aussi les sous-dossiers.
+        Returns:
+            FullFileTreeResponse: Arborescence complète avec hashs, tailles, etc.
+        """
+        return FullFileTreeResponse(
+            **await self.full_list_payload(path, user_id, recursive)
+        )
+
+    async def stream_full_list_path(
+        self,
+        path: str = "",
+        user_id: int = 1,
+        recursive: bool = True,
+    ) -> Iterator[bytes]:
+        """
+        Variante NDJSON de `full_list_path` : un FullFileItem JSON par ligne,
+        émis au fil de `list_objects` (ordre MinIO, lexicographique), sans
+        tri ni liste intermédiaire. La dernière ligne récapitule le listing :
+        {"path": ..., "total_items": n}, ou {"path": ..., "error": ...} si le
+        listing échoue en cours de route.
+
+        Le chemin est validé avant le premier octet, pour que les erreurs
+        restent de vrais codes HTTP.
+        """
+        bucket_name, normalized_path = await self._full_list_prefix(path, user_id)
+        display_path = "/" + normalized_path if normalized_path else "/"
+
+        def records() -> Iterator[bytes]:
+            total = 0
+            try:
+                for obj in self.minio.list_objects(
+                    bucket_name, prefix=normalized_path, recursive=recursive
+                ):
+                    row = self._full_row(obj, normalized_path)
+                    if row is not None:
+                        total += 1
+                        yield orjson.dumps(
+                            dict(zip(FULL_FIELDS, row), tree_hash=None),
+                            option=orjson.OPT_APPEND_NEWLINE,
+                        )
+            except S3Error as e:
+                logger.error(f"Échec du listing en flux de {path}: {e}")
+                summary = {"path": display_path, "error": str(e)}
+            else:
+                summary = {"path": display_path, "total_items": total}
+            yield orjson.dumps(summary, option=orjson.OPT_APPEND_NEWLINE)
+
+        return records()
+
 
 def get_minio_service(request: Request) -> MinioService:
     """Fournit une instance de MinioService avec le client Minio de l'app."""
@@ -248,4 +413,6 @@ def get_minio_service(request: Request) -> MinioService:
     if existing is not None:
         return existing
     # Fallback (tests or older app.state setup).
-    return MinioService(request.app.state.minio_client)
+    return MinioService(
+        request.app.state.minio_client, getattr(request.app.state, "redis", None)
+    )
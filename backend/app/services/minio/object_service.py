@@ -1,17 +1,30 @@
+import asyncio
 from datetime import datetime
 from tempfile import SpooledTemporaryFile
 import threading
 import zipfile
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from minio import Minio, S3Error
 from app.services.minio.bucket_service import BucketService
+from app.services.minio.change_feed import ChangeFeed
+from app.services.minio.folder_stats import FolderStatsService, ObjectEntry
+from app.services.minio.metadata_cache import MetadataCache
+from app.services.minio.quota_service import QuotaService
+from app.services.minio.thumbnail_service import ThumbnailService
 from app.utils.minio_utils import MinioUtils
+from app.utils.range_reader import MinioRangeReader
 from app.schemas.files import (
+    AudioMetadata,
     FileMetadata,
     FolderMetadata,
+    FolderUsage,
+    FolderUsageResponse,
     ImageMetadata,
     ObjectMetadata,
     ResolvePathResponse,
+    TreeHash,
+    TreeHashResponse,
     VideoMetadata,
 )
 from pymediainfo import MediaInfo
@@ -20,7 +33,6 @@ from minio.deleteobjects import DeleteObject
 import io
 from minio.commonconfig import CopySource
 from typing import cast, BinaryIO, Iterable
-import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from core.config import settings
 
@@ -28,9 +40,21 @@ logger = setup_logger(__name__)
 
 
 class ObjectService:
-    def __init__(self, minio: Minio, bucket_service: BucketService) -> None:
+    def __init__(
+        self,
+        minio: Minio,
+        bucket_service: BucketService,
+        metadata_cache: MetadataCache | None = None,
+        folder_stats: FolderStatsService | None = None,
+        quota: QuotaService | None = None,
+        change_feed: ChangeFeed | None = None,
+    ) -> None:
         self.minio = minio
         self.bucket_service = bucket_service
+        self.metadata_cache = metadata_cache or MetadataCache(None)
+        self.folder_stats = folder_stats or FolderStatsService(minio, None)
+        self.quota = quota or QuotaService(minio, self.folder_stats)
+        self.change_feed = change_feed or ChangeFeed(None)
 
     def _list_objects(self, bucket_name: str, prefix: str, recursive: bool = True):
         return list(
@@ -50,6 +74,17 @@ class ObjectService:
             )
         )
 
+    @staticmethod
+    def _entries(
+        objects: Iterable, old_prefix: str = "", new_prefix: str = ""
+    ) -> list[ObjectEntry]:
+        """(nom, taille, etag) des objets listés, éventuellement re-préfixés."""
+        return [
+            (new_prefix + obj.object_name[len(old_prefix) :], obj.size or 0, obj.etag)
+            for obj in objects
+            if obj.object_name
+        ]
+
     def _remove_objects(self, bucket_name: str, object_names: Iterable[str]) -> None:
         delete_errors = self.minio.remove_objects(
             bucket_name,
@@ -62,6 +97,35 @@ class ObjectService:
                 detail=f"Erreur suppression: {err.message}",
             )
 
+    def _remove_thumbnails(self, bucket_name: str, etags: Iterable[str | None]) -> None:
+        """
+        Supprime les miniatures ("__thumbnails__/{etag}/") de contenus supprimés
+        ou remplacés. Une copie identique encore présente partageait ces rendus :
+        ils seront régénérés à son prochain affichage.
+        """
+        etags = {etag.strip('"') for etag in etags if etag}
+        if not etags:
+            return
+        # Un fichier : son seul préfixe ; un dossier : un listing des miniatures
+        prefixes = (
+            [f"{ThumbnailService.PREFIX}{etag}/" for etag in etags]
+            if len(etags) == 1
+            else [ThumbnailService.PREFIX]
+        )
+        try:
+            names = [
+                obj.object_name
+                for prefix in prefixes
+                for obj in self.minio.list_objects(
+                    bucket_name, prefix=prefix, recursive=True
+                )
+                if obj.object_name and obj.object_name.split("/")[1] in etags
+            ]
+            if names:
+                self._remove_objects(bucket_name, names)
+        except Exception as e:
+            logger.warning(f"Suppression des miniatures impossible: {e}")
+
     def _copy_objects(
         self,
         bucket_name: str,
@@ -88,26 +152,31 @@ class ObjectService:
             for future in as_completed(futures):
                 future.result()
 
-    def _read_object_prefix(
-        self,
-        bucket_name: str,
-        object_name: str,
-        size: int,
-    ) -> bytes:
-        response = self.minio.get_object(bucket_name, object_name)
-        try:
-            return cast(bytes, response.read(size))
-        finally:
-            response.close()
-            response.release_conn()
+    def _extract_media_metadata(
+        self, bucket_name: str, object_name: str, size: int, content_type: str
+    ) -> dict:
+        """
+        Extrait les métadonnées d'une image / vidéo / piste audio en ne lisant
+        que les plages nécessaires de l'objet (en-têtes, atome moov, EXIF).
+        """
+        if content_type == "image":
+            reader = MinioRangeReader(
+                self.minio,
+                bucket_name,
+                object_name,
+                size,
+                block_size=settings.MINIO_IMAGE_METADATA_READ_SIZE,
+            )
+            return MinioUtils.extract_image_metadata(reader)
 
-    def _read_object(self, bucket_name: str, object_name: str) -> bytes:
-        response = self.minio.get_object(bucket_name, object_name)
-        try:
-            return cast(bytes, response.read())
-        finally:
-            response.close()
-            response.release_conn()
+        reader = MinioRangeReader(self.minio, bucket_name, object_name, size)
+        media_info_json = MediaInfo.parse(reader, output="JSON")
+        logger.debug(
+            f"MediaInfo {object_name}: {reader.bytes_fetched}/{size} octets lus"
+        )
+        if content_type == "video":
+            return MinioUtils.extract_video_metadata(media_info_json)
+        return MinioUtils.extract_audio_metadata(media_info_json)
 
     async def delete_object(self, user_id: int, path: str) -> tuple:
         """
@@ -136,6 +205,15 @@ class ObjectService:
 
                 object_names = [obj.object_name for obj in objects if obj.object_name]
                 self._remove_objects(bucket_name, object_names)
+                await run_in_threadpool(
+                    self._remove_thumbnails,
+                    bucket_name,
+                    [obj.etag for obj in objects],
+                )
+                await self.folder_stats.apply(
+                    bucket_name, self._entries(objects), -1, forget_prefix=path
+                )
+                await self.change_feed.record(bucket_name, "delete", path)
 
                 return (
                     f"Dossier '{path}' supprimé ({len(objects)} objets)",
@@ -148,7 +226,7 @@ class ObjectService:
 
             else:
                 try:
-                    self.minio.stat_object(bucket_name, path)
+                    stat = self.minio.stat_object(bucket_name, path)
                 except S3Error as e:
                     if e.code == "NoSuchKey":
                         raise HTTPException(
@@ -158,6 +236,13 @@ class ObjectService:
                     raise
 
                 self.minio.remove_object(bucket_name, path)
+                await run_in_threadpool(
+                    self._remove_thumbnails, bucket_name, [stat.etag]
+                )
+                await self.folder_stats.apply(
+                    bucket_name, [(path, stat.size or 0, stat.etag)], -1
+                )
+                await self.change_feed.record(bucket_name, "delete", path)
 
                 return (f"Fichier '{path}' supprimé avec succès", {"path": path})
 
@@ -216,7 +301,7 @@ class ObjectService:
 
         # Crée le dossier
         try:
-            self.minio.put_object(
+            result = self.minio.put_object(
                 bucket_name,
                 full_path,
                 io.BytesIO(b""),
@@ -225,6 +310,8 @@ class ObjectService:
                 metadata={"last_modified": str(datetime.now().isoformat())},
             )
             logger.info(f"Dossier [bold]{full_path}[/bold] créé dans {bucket_name}")
+            await self.folder_stats.apply(bucket_name, [(full_path, 0, result.etag)])
+            await self.change_feed.record(bucket_name, "create", full_path)
             return full_path
         except S3Error as e:
             logger.error(f"Échec de la création du dossier {full_path}: {e}")
@@ -266,7 +353,7 @@ class ObjectService:
                 if not objects:
                     raise HTTPException(status_code=404, detail="Dossier introuvable")
             else:
-                self.minio.stat_object(bucket_name, path)
+                stat = self.minio.stat_object(bucket_name, path)
         except S3Error as e:
             if e.code == "NoSuchKey":
                 raise HTTPException(status_code=404, detail="Objet introuvable")
@@ -302,15 +389,37 @@ class ObjectService:
                 # Suppression des anciens objets
                 object_names = [obj.object_name for obj in objects if obj.object_name]
                 self._remove_objects(bucket_name, object_names)
+
+                await self.folder_stats.apply(
+                    bucket_name, self._entries(objects, old_prefix, new_prefix)
+                )
+                await self.folder_stats.apply(
+                    bucket_name, self._entries(objects), -1, forget_prefix=old_prefix
+                )
             else:
                 # Fichier unique
-                self.minio.copy_object(
+                result = self.minio.copy_object(
                     bucket_name,
                     new_prefix,
                     CopySource(bucket_name, path),
                 )
                 self.minio.remove_object(bucket_name, path)
+                if result.etag != stat.etag:
+                    # Copie multipart : nouvel etag, les anciens rendus sont orphelins
+                    await run_in_threadpool(
+                        self._remove_thumbnails, bucket_name, [stat.etag]
+                    )
 
+                await self.folder_stats.apply(
+                    bucket_name, [(new_prefix, stat.size or 0, result.etag)]
+                )
+                await self.folder_stats.apply(
+                    bucket_name, [(path, stat.size or 0, stat.etag)], -1
+                )
+
+            await self.change_feed.record(
+                bucket_name, "move", old_prefix, destination=new_prefix
+            )
             return (
                 f"{'Dossier' if is_folder else 'Fichier'} renommé avec succès : {new_prefix}",
                 {"old_prefix": old_prefix, "new_prefix": new_prefix},
@@ -388,7 +497,7 @@ class ObjectService:
                 if not objects:
                     raise HTTPException(404, "Dossier introuvable ou vide.")
             else:
-                self.minio.stat_object(bucket_name, source_path)
+                stat = self.minio.stat_object(bucket_name, source_path)
 
         except S3Error as e:
             if e.code == "NoSuchKey":
@@ -416,6 +525,14 @@ class ObjectService:
                 object_names = [obj.object_name for obj in objects if obj.object_name]
                 self._remove_objects(bucket_name, object_names)
 
+                await self.folder_stats.apply(
+                    bucket_name,
+                    self._entries(objects, source_path, destination_path),
+                )
+                await self.folder_stats.apply(
+                    bucket_name, self._entries(objects), -1, forget_prefix=source_path
+                )
+
             else:
                 # Vérifie collision fichier
                 try:
@@ -428,13 +545,28 @@ class ObjectService:
                     if e.code != "NoSuchKey":
                         raise
 
-                self.minio.copy_object(
+                result = self.minio.copy_object(
                     bucket_name,
                     destination_path,
                     CopySource(bucket_name, source_path),
                 )
 
                 self.minio.remove_object(bucket_name, source_path)
+                if result.etag != stat.etag:
+                    # Copie multipart : nouvel etag, les anciens rendus sont orphelins
+                    await run_in_threadpool(
+                        self._remove_thumbnails, bucket_name, [stat.etag]
+                    )
+
+                await self.folder_stats.apply(
+                    bucket_name, [(destination_path, stat.size or 0, result.etag)]
+                )
+                await self.folder_stats.apply(
+                    bucket_name, [(source_path, stat.size or 0, stat.etag)], -1
+                )
+            await self.change_feed.record(
+                bucket_name, "move", source_path, destination=destination_path
+            )
             logger.info(f"Déplacement de {source_path} vers {destination_path} réussi.")
             return (
                 f"Déplacement de '{source_path}' vers '{destination_path}' réussi.",
@@ -490,13 +622,18 @@ class ObjectService:
                 if not objects:
                     raise HTTPException(404, "Dossier introuvable ou vide.")
             else:
-                self.minio.stat_object(bucket_name, source_path)
+                stat = self.minio.stat_object(bucket_name, source_path)
 
         except S3Error as e:
             if e.code == "NoSuchKey":
                 raise HTTPException(404, "Source introuvable.")
             raise HTTPException(500, f"Erreur MinIO: {str(e)}")
 
+        await self.quota.ensure_available(
+            bucket_name,
+            sum(obj.size or 0 for obj in objects) if is_folder else stat.size or 0,
+        )
+
         # Copie
         try:
             if is_folder:
@@ -510,20 +647,28 @@ class ObjectService:
                             copy_pairs.append((obj.object_name, new_object_name))
 
                 self._copy_objects(bucket_name, copy_pairs)
+                await self.folder_stats.apply(
+                    bucket_name,
+                    self._entries(objects, source_path, destination_path),
+                )
             else:
                 # Vérifie que source ≠ destination
                 if source_path != destination_path:
-                    self.minio.copy_object(
+                    result = self.minio.copy_object(
                         bucket_name,
                         destination_path,
                         CopySource(bucket_name, source_path),
                     )
+                    await self.folder_stats.apply(
+                        bucket_name, [(destination_path, stat.size or 0, result.etag)]
+                    )
                 else:
                     raise HTTPException(
                         400,
                         "Impossible de copier un objet sur lui-même sans modification.",
                     )
 
+            await self.change_feed.record(bucket_name, "create", destination_path)
             logger.info(f"Copie de {source_path} vers {destination_path} réussie.")
             return (
                 f"Copie de '{source_path}' vers '{destination_path}' réussie.",
@@ -565,30 +710,12 @@ class ObjectService:
             destination_folder = MinioUtils.normalize_path(
                 destination_folder, is_folder=True
             )
-            valid_objects: dict[str, int] = {}
-            normalized_object_names: list[str] = []
-
-            # Collecte des objets valides
-            for obj_name in object_names:
-                obj_name = MinioUtils.normalize_path(
-                    obj_name, is_folder=obj_name.endswith("/")
-                )
-                normalized_object_names.append(obj_name)
-                if obj_name.endswith("/"):
-                    objs = self.minio.list_objects(
-                        bucket_name, prefix=obj_name, recursive=True
-                    )
-                    for obj in objs:
-                        if obj.object_name and not obj.object_name.endswith("/"):
-                            valid_objects[obj.object_name] = obj.size or 0
-                else:
-                    try:
-                        stat = self.minio.stat_object(bucket_name, obj_name)
-                    except S3Error as e:
-                        if e.code == "NoSuchKey":
-                            continue
-                        raise
-                    valid_objects[obj_name] = stat.size or 0
+            sources, normalized_object_names = MinioUtils.collect_archive_objects(
+                self.minio, bucket_name, object_names
+            )
+            valid_objects: dict[str, int] = {
+                name: obj.size or 0 for name, obj in sources.items()
+            }
 
             if not valid_objects:
                 raise HTTPException(400, "Aucun fichier valide à compresser.")
@@ -600,6 +727,8 @@ class ObjectService:
                     413,
                     f"Taille maximale du ZIP ({max_zip_size_mb} Mo) dépassée.",
                 )
+            # Le ZIP (store/deflate) ne dépasse pas la taille cumulée des sources.
+            await self.quota.ensure_available(bucket_name, total_source_size)
 
             output_object_name = MinioUtils.generate_available_name(
                 minio_client=self.minio,
@@ -609,14 +738,7 @@ class ObjectService:
                 is_folder=False,
             )
 
-            source_prefix = (
-                normalized_object_names[0]
-                if len(normalized_object_names) == 1
-                and normalized_object_names[0].endswith("/")
-                else os.path.commonpath(normalized_object_names)
-                if len(normalized_object_names) > 1
-                else ""
-            )
+            source_prefix = MinioUtils.get_archive_prefix(normalized_object_names)
 
             temp_zip = SpooledTemporaryFile(max_size=100 * 1024 * 1024)
             zip_lock = threading.Lock()
@@ -627,11 +749,7 @@ class ObjectService:
                 response = None
                 try:
                     response = self.minio.get_object(bucket_name, obj_name)
-                    arcname = (
-                        obj_name[len(source_prefix) :].lstrip("/")
-                        if source_prefix
-                        else os.path.basename(obj_name)
-                    )
+                    arcname = MinioUtils.get_arcname(obj_name, source_prefix)
 
                     # Création des dossiers parents
                     if "/" in arcname:
@@ -682,8 +800,9 @@ class ObjectService:
                             success_count += 1
 
             # Upload du ZIP
+            zip_size = temp_zip.seek(0, io.SEEK_END)
             temp_zip.seek(0)
-            self.minio.put_object(
+            result = self.minio.put_object(
                 bucket_name,
                 output_object_name,
                 cast(BinaryIO, temp_zip),
@@ -692,6 +811,12 @@ class ObjectService:
                 content_type="application/zip",
             )
             temp_zip.close()
+            await self.folder_stats.apply(
+                bucket_name, [(output_object_name, zip_size, result.etag)]
+            )
+            await self.change_feed.record(
+                bucket_name, "create", output_object_name, size=zip_size
+            )
 
             logger.info(
                 f"Compression de {success_count}/{len(valid_objects)} objets vers {output_object_name} réussie."
@@ -718,16 +843,22 @@ class ObjectService:
             is_dir = normalized_path.endswith("/")
 
             if is_dir:
-                # Logique pour les dossiers (inchangée)
+                # Compteurs incrémentaux si disponibles, sinon listing récursif
                 folder_prefix = normalized_path.rstrip("/") + "/"
-                objects = list(
-                    self.minio.list_objects(
-                        bucket_name, prefix=folder_prefix, recursive=True
+                counters = await self.folder_stats.get(bucket_name, folder_prefix)
+                if counters is not None:
+                    file_count = counters["files"] + counters["folders"]
+                    size_bytes, folder_count = counters["bytes"], counters["folders"]
+                else:
+                    objects = await run_in_threadpool(
+                        self._list_objects, bucket_name, folder_prefix
                     )
-                )
-                file_count = max(len(objects) - 1, 0)
+                    file_count = max(len(objects) - 1, 0)
+                    size_bytes = folder_count = None
                 try:
-                    stat = self.minio.stat_object(bucket_name, folder_prefix)
+                    stat = await run_in_threadpool(
+                        self.minio.stat_object, bucket_name, folder_prefix
+                    )
                     last_modified = stat.last_modified
                 except Exception:
                     last_modified = datetime.now()
@@ -737,9 +868,13 @@ class ObjectService:
                     content_type="application/x-directory",
                     last_modified=last_modified,
                     file_count=file_count,
+                    size_bytes=size_bytes,
+                    folder_count=folder_count,
                 )
 
-            stat = self.minio.stat_object(bucket_name, normalized_path)
+            stat = await run_in_threadpool(
+                self.minio.stat_object, bucket_name, normalized_path
+            )
             last_modified = stat.last_modified
             mime_type = MinioUtils.detect_mime(normalized_path, stat.content_type)
             content_type = MinioUtils.get_file_type(normalized_path, mime_type)
@@ -755,25 +890,26 @@ class ObjectService:
                 "version_id": stat.version_id,
             }
 
-            if content_type == "image":
-                data = self._read_object_prefix(
-                    bucket_name,
-                    normalized_path,
-                    settings.MINIO_IMAGE_METADATA_READ_SIZE,
+            if content_type in ("image", "video", "audio"):
+                media_meta = await self.metadata_cache.get(
+                    bucket_name, normalized_path, stat.etag
                 )
-                try:
-                    img_meta = MinioUtils.extract_image_metadata(data)
-                except Exception:
-                    data = self._read_object(bucket_name, normalized_path)
-                    img_meta = MinioUtils.extract_image_metadata(data)
-                return ImageMetadata(**base_metadata, **img_meta)
-
-            elif content_type == "video":
-                video_data = self._read_object(bucket_name, normalized_path)
-                media_info_json = MediaInfo.parse(io.BytesIO(video_data), output="JSON")
-                video_meta = MinioUtils.extract_video_metadata(media_info_json)
-                logger.info(video_meta)
-                return VideoMetadata(**base_metadata, **video_meta)
+                if media_meta is None:
+                    media_meta = await run_in_threadpool(
+                        self._extract_media_metadata,
+                        bucket_name,
+                        normalized_path,
+                        stat.size or 0,
+                        content_type,
+                    )
+                    await self.metadata_cache.set(
+                        bucket_name, normalized_path, stat.etag, media_meta
+                    )
+                if content_type == "image":
+                    return ImageMetadata(**base_metadata, **media_meta)
+                if content_type == "video":
+                    return VideoMetadata(**base_metadata, **media_meta)
+                return AudioMetadata(**base_metadata, **media_meta)
 
             else:
                 return FileMetadata(**base_metadata)
@@ -785,6 +921,114 @@ class ObjectService:
                 detail=f"Impossible de récupérer les métadonnées: {str(e)}",
             )
 
+    async def _folder_counters(
+        self, user_id: int, path: str
+    ) -> tuple[str, list[str], dict[str, dict]]:
+        """
+        (préfixe, sous-dossiers directs, compteurs de chacun) pour un dossier.
+        Lus dans FolderStatsService, ou agrégés depuis un listing sans Redis.
+        """
+        bucket_name = await self.bucket_service.get_user_bucket(user_id)
+        prefix = MinioUtils.normalize_path(path, is_folder=True).lstrip("/")
+
+        children = [
+            obj.object_name
+            for obj in await run_in_threadpool(
+                self._list_objects, bucket_name, prefix, False
+            )
+            if obj.object_name
+            and obj.object_name.endswith("/")
+            and obj.object_name != prefix
+            and not MinioUtils.is_hidden_object(obj.object_name)
+        ]
+
+        counters = await self.folder_stats.get_many(bucket_name, [prefix, *children])
+        if counters is None:
+            # Sans Redis : agrégation à partir d'un listing récursif.
+            objects = await run_in_threadpool(self._list_objects, bucket_name, prefix)
+            totals = FolderStatsService.aggregate(
+                entry
+                for entry in self._entries(objects)
+                if not MinioUtils.is_hidden_object(entry[0])
+            )
+            counters = {
+                p: FolderStatsService.read_counters(totals.get(p, {}))
+                for p in [prefix, *children]
+            }
+        return prefix, children, counters
+
+    async def get_folder_usage(self, user_id: int, path: str) -> FolderUsageResponse:
+        """
+        Taille, fichiers et sous-dossiers d'un dossier et de chacun de ses
+        sous-dossiers directs (vue type `du`).
+        """
+        prefix, children, counters = await self._folder_counters(user_id, path)
+
+        def usage(folder: str) -> dict:
+            return {
+                "path": "/" + folder,
+                "size_bytes": counters[folder]["bytes"],
+                "file_count": counters[folder]["files"],
+                "folder_count": counters[folder]["folders"],
+            }
+
+        return FolderUsageResponse(
+            **usage(prefix), children=[FolderUsage(**usage(c)) for c in children]
+        )
+
+    async def get_tree_hashes(self, user_id: int, path: str) -> TreeHashResponse:
+        """
+        Empreinte d'un dossier et de ses sous-dossiers directs : le client de
+        synchronisation compare avec son état local et ne descend que dans les
+        sous-arbres dont l'empreinte diffère.
+        """
+        prefix, children, counters = await self._folder_counters(user_id, path)
+        return TreeHashResponse(
+            path="/" + prefix,
+            tree_hash=counters[prefix]["tree_hash"],
+            children=[
+                TreeHash(path="/" + c, tree_hash=counters[c]["tree_hash"])
+                for c in children
+            ],
+        )
+
+    async def get_objects_metadata(
+        self, user_id: int, paths: list[str]
+    ) -> tuple[list[ObjectMetadata], list[dict]]:
+        """
+        Métadonnées de plusieurs objets, résolues en parallèle
+        (MINIO_STAT_MAX_WORKERS appels simultanés au maximum).
+
+        Returns:
+            (métadonnées dans l'ordre demandé, erreurs {path, status_code, detail})
+        """
+        semaphore = asyncio.Semaphore(settings.MINIO_STAT_MAX_WORKERS)
+
+        async def get_one(path: str) -> ObjectMetadata | dict:
+            async with semaphore:
+                try:
+                    return await self.get_object_metadata(user_id, path)
+                except HTTPException as e:
+                    return {
+                        "path": path,
+                        "status_code": e.status_code,
+                        "detail": str(e.detail),
+                    }
+                except Exception as e:
+                    # Média corrompu, cache indisponible... : seul ce chemin échoue.
+                    logger.error(f"Métadonnées de {path} indisponibles: {e}")
+                    return {
+                        "path": path,
+                        "status_code": 500,
+                        "detail": "Erreur lors de la récupération des métadonnées",
+                    }
+
+        results = await asyncio.gather(*(get_one(p) for p in dict.fromkeys(paths)))
+
+        items = [r for r in results if not isinstance(r, dict)]
+        errors = [r for r in results if isinstance(r, dict)]
+        return items, errors
+
     async def resolve_objet(self, user_id: int, path: str):
         try:
             normalized_path = MinioUtils.normalize_path(
@@ -0,0 +1,87 @@
+import time
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from minio import Minio
+
+from app.services.minio.folder_stats import FolderStatsService
+from app.utils.minio_utils import MinioUtils
+from core.config import settings
+
+
+class QuotaService:
+    """
+    Espace utilisé et quota de chaque utilisateur.
+
+    L'utilisation est le compteur racine tenu par FolderStatsService (une lecture
+    Redis). Sans ces compteurs (pas de Redis, construction en cours), on retombe
+    sur un listing complet du bucket, gardé STORAGE_USAGE_CACHE_TTL_S secondes
+    par worker pour ne pas relister à chaque écriture ; les octets admis entre-
+    temps y sont ajoutés.
+    Le quota vient de STORAGE_QUOTA_BYTES (0 = illimité), le même pour tous les
+    utilisateurs. La vérification se fait avant tout transfert : deux écritures
+    simultanées peuvent dépasser légèrement la limite, ce qui reste acceptable
+    pour un quota "souple".
+    """
+
+    def __init__(self, minio: Minio, folder_stats: FolderStatsService) -> None:
+        self.minio = minio
+        self.folder_stats = folder_stats
+        # bucket -> (expire_at monotonic, octets utilisés) du dernier listing
+        self._listed_usage: dict[str, tuple[float, int]] = {}
+
+    @property
+    def quota_bytes(self) -> int | None:
+        return settings.STORAGE_QUOTA_BYTES or None
+
+    async def get_used_bytes(self, bucket_name: str) -> int:
+        counters = await self.folder_stats.get(bucket_name, "")
+        if counters is not None:
+            return counters["bytes"]
+
+        cached = self._listed_usage.get(bucket_name)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        def sum_sizes() -> int:
+            return sum(
+                obj.size or 0
+                for obj in self.minio.list_objects(bucket_name, recursive=True)
+                if not MinioUtils.is_hidden_object(obj.object_name)
+            )
+
+        used = await run_in_threadpool(sum_sizes)
+        self._listed_usage[bucket_name] = (
+            time.monotonic() + settings.STORAGE_USAGE_CACHE_TTL_S,
+            used,
+        )
+        return used
+
+    async def get_usage(self, bucket_name: str) -> dict:
+        used = await self.get_used_bytes(bucket_name)
+        quota = self.quota_bytes
+        return {
+            "used_bytes": used,
+            "quota_bytes": quota,
+            "available_bytes": None if quota is None else max(quota - used, 0),
+        }
+
+    async def ensure_available(self, bucket_name: str, incoming_bytes: int) -> None:
+        """Lève une 507 si `incoming_bytes` supplémentaires dépassent le quota."""
+        quota = self.quota_bytes
+        if quota is None or incoming_bytes <= 0:
+            return
+
+        used = await self.get_used_bytes(bucket_name)
+        if used + incoming_bytes > quota:
+            raise HTTPException(
+                status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+                detail=(
+                    f"Quota de stockage dépassé ({used + incoming_bytes} / "
+                    f"{quota} octets)"
+                ),
+            )
+
+        cached = self._listed_usage.get(bucket_name)
+        if cached is not None:
+            self._listed_usage[bucket_name] = (cached[0], cached[1] + incoming_bytes)
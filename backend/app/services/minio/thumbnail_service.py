@@ -0,0 +1,252 @@
+import asyncio
+import json
+import uuid
+from io import BytesIO
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from minio import Minio, S3Error
+
+from app.services.minio.bucket_service import BucketService
+from app.utils.minio_utils import MinioUtils
+from core.config import settings
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ThumbnailService:
+    """
+    Miniatures des images pour la grille de l'explorateur.
+
+    Les rendus sont stockés dans le bucket de l'utilisateur sous un préfixe caché
+    ("__thumbnails__/{etag}/{taille}.{format}") : la clé dépendant de l'etag de
+    la source, un fichier modifié obtient de nouvelles miniatures et deux copies
+    identiques partagent les mêmes.
+    """
+
+    PREFIX = "__thumbnails__/"
+    SIZES = (128, 256, 512)
+    DEFAULT_SIZE = 256
+    MAX_BATCH_ITEMS = 200
+    FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+    _MAX_SOURCE_BYTES = 50 * 1024 * 1024
+    _IMMUTABLE_MAX_AGE_S = 365 * 24 * 3600
+
+    def __init__(self, minio: Minio, bucket_service: BucketService) -> None:
+        self.minio = minio
+        self.bucket_service = bucket_service
+
+    def _rendition_name(self, etag: str, size: int, image_format: str) -> str:
+        etag = etag.strip('"')
+        return f"{self.PREFIX}{etag}/{size}.{image_format}"
+
+    @staticmethod
+    def negotiate_format(accept: str | None) -> str:
+        """WebP si le client l'accepte, sinon JPEG."""
+        return "webp" if accept and "image/webp" in accept else "jpeg"
+
+    def _stat_source(self, bucket_name: str, object_name: str):
+        try:
+            stat = self.minio.stat_object(bucket_name, object_name)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise HTTPException(status_code=404, detail="Fichier introuvable.")
+            raise HTTPException(status_code=500, detail=f"Erreur MinIO: {str(e)}")
+
+        mime = MinioUtils.detect_mime(object_name, stat.content_type)
+        if MinioUtils.get_file_type(object_name, mime) != "image":
+            raise HTTPException(
+                status_code=415,
+                detail="Miniature disponible pour les images uniquement.",
+            )
+        if (stat.size or 0) > self._MAX_SOURCE_BYTES:
+            raise HTTPException(
+                status_code=413, detail="Image trop volumineuse pour une miniature."
+            )
+        return stat
+
+    def _load_or_render(
+        self,
+        bucket_name: str,
+        object_name: str,
+        etag: str,
+        size: int,
+        image_format: str,
+    ) -> bytes:
+        """Retourne le rendu stocké, ou le génère et l'enregistre."""
+        rendition_name = self._rendition_name(etag, size, image_format)
+
+        response = None
+        try:
+            response = self.minio.get_object(bucket_name, rendition_name)
+            return response.read()
+        except S3Error as e:
+            if e.code != "NoSuchKey":
+                raise
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+        response = self.minio.get_object(bucket_name, object_name)
+        try:
+            source = response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+        try:
+            data = MinioUtils.render_thumbnail(source, size, image_format)
+        except Exception as e:
+            logger.warning(f"Miniature impossible pour {object_name}: {e}")
+            raise HTTPException(status_code=415, detail="Image illisible.")
+
+        self.minio.put_object(
+            bucket_name,
+            rendition_name,
+            BytesIO(data),
+            length=len(data),
+            content_type=self.FORMATS[image_format],
+        )
+        return data
+
+    async def ensure_thumbnail(
+        self,
+        bucket_name: str,
+        object_name: str,
+        etag: str,
+        size: int = DEFAULT_SIZE,
+        image_format: str = "webp",
+    ) -> bytes:
+        return await run_in_threadpool(
+            self._load_or_render, bucket_name, object_name, etag, size, image_format
+        )
+
+    async def get_thumbnail(
+        self,
+        user_id: int,
+        path: str,
+        size: int = DEFAULT_SIZE,
+        accept: str | None = None,
+        if_none_match: str | None = None,
+        version: str | None = None,
+    ) -> Response:
+        """
+        Sert la miniature d'une image.
+
+        Avec `version` égal à l'etag courant de la source (lien construit par le
+        client depuis /tree), la réponse est immuable et mise en cache un an ;
+        sinon le navigateur revalide via If-None-Match.
+        """
+        self._check_size(size)
+        bucket_name = await self.bucket_service.get_user_bucket(user_id)
+        object_name = MinioUtils.normalize_path(path, is_folder=False)
+        stat = await run_in_threadpool(self._stat_source, bucket_name, object_name)
+
+        image_format = self.negotiate_format(accept)
+        source_etag = (stat.etag or "").strip('"')
+        etag = self._rendition_etag(source_etag, size, image_format)
+        if version and version.strip('"') == source_etag:
+            cache_control = f"private, max-age={self._IMMUTABLE_MAX_AGE_S}, immutable"
+        else:
+            cache_control = "private, no-cache"
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept"}
+
+        if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        data = await self.ensure_thumbnail(
+            bucket_name, object_name, source_etag, size, image_format
+        )
+        return Response(
+            content=data, media_type=self.FORMATS[image_format], headers=headers
+        )
+
+    async def get_thumbnails_batch(
+        self,
+        user_id: int,
+        paths: list[str],
+        size: int = DEFAULT_SIZE,
+        accept: str | None = None,
+    ) -> StreamingResponse:
+        """
+        Sert plusieurs miniatures en une seule réponse `multipart/mixed`.
+
+        Chaque partie porte `Content-Location` (chemin de l'image) et `ETag` ;
+        elles sont émises dans l'ordre où elles sont prêtes. Une image en échec
+        donne une partie JSON avec `X-Status` au lieu de faire échouer le lot.
+        Les rendus manquants sont générés en parallèle, dans la limite de
+        THUMBNAIL_BATCH_CONCURRENCY.
+        """
+        self._check_size(size)
+        if len(paths) > self.MAX_BATCH_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Trop de miniatures demandées ({self.MAX_BATCH_ITEMS} max)",
+            )
+
+        bucket_name = await self.bucket_service.get_user_bucket(user_id)
+        image_format = self.negotiate_format(accept)
+        semaphore = asyncio.Semaphore(settings.THUMBNAIL_BATCH_CONCURRENCY)
+        boundary = uuid.uuid4().hex
+
+        async def render_part(path: str) -> bytes:
+            async with semaphore:
+                try:
+                    object_name = MinioUtils.normalize_path(path, is_folder=False)
+                    stat = await run_in_threadpool(
+                        self._stat_source, bucket_name, object_name
+                    )
+                    source_etag = (stat.etag or "").strip('"')
+                    data = await self.ensure_thumbnail(
+                        bucket_name, object_name, source_etag, size, image_format
+                    )
+                    headers = {
+                        "Content-Type": self.FORMATS[image_format],
+                        "ETag": self._rendition_etag(source_etag, size, image_format),
+                    }
+                except HTTPException as e:
+                    data = json.dumps({"detail": e.detail}).encode()
+                    headers = {
+                        "Content-Type": "application/json",
+                        "X-Status": e.status_code,
+                    }
+                except Exception as e:
+                    logger.warning(f"Miniature impossible pour {path}: {e}")
+                    data = json.dumps({"detail": "Erreur interne"}).encode()
+                    headers = {"Content-Type": "application/json", "X-Status": 500}
+
+            headers["Content-Location"] = "/" + path.strip("/")
+            headers["Content-Length"] = len(data)
+            head = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+            return f"--{boundary}\r\n{head}\r\n".encode() + data + b"\r\n"
+
+        async def body() -> AsyncIterator[bytes]:
+            tasks = [asyncio.create_task(render_part(path)) for path in paths]
+            try:
+                for next_part in asyncio.as_completed(tasks):
+                    yield await next_part
+                yield f"--{boundary}--\r\n".encode()
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(
+            body(),
+            media_type=f"multipart/mixed; boundary={boundary}",
+            headers={"Cache-Control": "private, no-cache"},
+        )
+
+    def _check_size(self, size: int) -> None:
+        if size not in self.SIZES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Taille invalide (valeurs possibles: {list(self.SIZES)})",
+            )
+
+    @staticmethod
+    def _rendition_etag(source_etag: str, size: int, image_format: str) -> str:
+        return f'"{source_etag}-{size}-{image_format}"'
@@ -0,0 +1,69 @@
+import asyncio
+
+import redis.asyncio as redis
+
+from core.config import settings
+from core.logging import setup_logger
+from database.connection_management import ConnectionManager
+from database.services.token import hoover_tokens
+
+logger = setup_logger(__name__)
+
+
+class TokenPurgeService:
+    """
+    Purge périodique des tokens expirés.
+
+    Toutes les TOKEN_PURGE_INTERVAL_S secondes, un seul worker (verrou Redis
+    posé pour la durée du cycle) supprime les tokens expirés par lots de
+    TOKEN_PURGE_BATCH_SIZE, via l'index sur `expiration_date` : chaque
+    transaction reste courte et ne bloque pas les connexions concurrentes.
+    Sans Redis, chaque worker purge de son côté (les suppressions sont
+    idempotentes).
+    """
+
+    _LOCK_KEY = "tokens:purge-lock"
+
+    def __init__(
+        self, connection_manager: ConnectionManager, redis_client: redis.Redis | None
+    ) -> None:
+        self.connection_manager = connection_manager
+        self.redis = redis_client
+        self._task: asyncio.Task | None = None
+
+    async def purge_expired(self) -> int:
+        """Supprime tous les tokens expirés, lot par lot. Renvoie le total."""
+        batch_size = settings.TOKEN_PURGE_BATCH_SIZE
+        total = 0
+        while True:
+            purged = await hoover_tokens(self.connection_manager, batch_size)
+            total += purged
+            if purged < batch_size:
+                break
+        logger.info(f"Purge des tokens expirés : {total} supprimé(s)")
+        return total
+
+    async def _purge_loop(self) -> None:
+        interval = settings.TOKEN_PURGE_INTERVAL_S
+        while True:
+            try:
+                if not self.redis or await self.redis.set(
+                    self._LOCK_KEY, "1", nx=True, ex=interval
+                ):
+                    await self.purge_expired()
+            except Exception as e:
+                logger.warning(f"Purge des tokens expirés impossible: {e}")
+            await asyncio.sleep(interval)
+
+    async def start(self) -> None:
+        if settings.TOKEN_PURGE_INTERVAL_S > 0:
+            self._task = asyncio.create_task(self._purge_loop())
+
+    async def shutdown(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,8 +1,10 @@
 from fastapi import HTTPException, Request, status
-from passlib.context import CryptContext
 
 from app.schemas.user import CompleteUser, PasswordUpdate, User, UserUpdate
+from core.auth_cache import AuthCache, get_auth_cache
 from core.logging import setup_logger
+from core.password import password_hasher
+from core.revocation import RevocationList, get_revocation_list
 from database.connection_management import ConnectionManager
 from database.services.user import get_user_through_email, update_user
 
@@ -11,15 +13,16 @@ logger = setup_logger(__name__)
 
 
 class UserService:
-    def __init__(self, connection_manager: ConnectionManager):
+    def __init__(
+        self,
+        connection_manager: ConnectionManager,
+        auth_cache: AuthCache | None = None,
+        revocations: RevocationList | None = None,
+    ):
         self.connection_manager = connection_manager
-        self.pwd_context = CryptContext(
-            schemes=["argon2"],
-            deprecated="auto",
-            argon2__rounds=12,
-            argon2__memory_cost=65536,
-            argon2__parallelism=2,
-        )
+        self.auth_cache = auth_cache
+        self.revocations = revocations
+        self.password_hasher = password_hasher
 
     # Créer un utilisateur
 
@@ -37,9 +40,11 @@ class UserService:
 
         for column, value in updates.items():
             if getattr(current_user, column) != value:
-                update_user(self.connection_manager, current_user.id, column, value)
+                await update_user(
+                    self.connection_manager, current_user.id, column, value
+                )
 
-        return User(
+        updated_user = User(
             id=current_user.id,
             username=updates["username"],
             email=updates["email"],
@@ -47,8 +52,16 @@ class UserService:
             creation_date=current_user.creation_date,
         )
 
+        # Les sessions en cache et les claims des tokens portent l'ancien profil.
+        if self.auth_cache:
+            await self.auth_cache.invalidate_user(current_user.id)
+        if self.revocations:
+            await self.revocations.update_profile(updated_user)
+
+        return updated_user
+
     async def update_password(self, current_user: User, payload: PasswordUpdate) -> None:
-        user: CompleteUser | None = get_user_through_email(
+        user: CompleteUser | None = await get_user_through_email(
             self.connection_manager, current_user.email
         )
 
@@ -58,17 +71,26 @@ class UserService:
                 detail="Utilisateur introuvable",
             )
 
-        if not self.pwd_context.verify(payload.current_password, user.password):
+        if not await self.password_hasher.verify(
+            payload.current_password, user.password
+        ):
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Mot de passe actuel incorrect",
             )
 
-        password_hash = self.pwd_context.hash(payload.new_password)
-        update_user(self.connection_manager, current_user.id, "password", password_hash)
+        password_hash = await self.password_hasher.hash(payload.new_password)
+        await update_user(self.connection_manager, current_user.id, "password", password_hash)
+
+        if self.auth_cache:
+            await self.auth_cache.invalidate_user(current_user.id)
 
     # Delete user
 
 
 def get_user_service(request: Request) -> UserService:
-    return UserService(request.app.state.database)
+    return UserService(
+        request.app.state.database,
+        get_auth_cache(request),
+        get_revocation_list(request),
+    )
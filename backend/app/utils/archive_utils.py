@@ -0,0 +1,405 @@
+import hashlib
+import struct
+import tarfile
+import zlib
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+import zstandard
+
+
+# Signatures et tailles fixes du format ZIP (APPNOTE 6.3.x)
+_LOCAL_HEADER_SIG = 0x04034B50
+_DATA_DESCRIPTOR_SIG = 0x08074B50
+_CENTRAL_DIR_SIG = 0x02014B50
+_ZIP64_END_SIG = 0x06064B50
+_ZIP64_LOCATOR_SIG = 0x07064B50
+_END_SIG = 0x06054B50
+
+_ZIP_VERSION = 45  # ZIP64
+_FLAGS = 0x0008 | 0x0800  # data descriptor + noms UTF-8
+_ZIP64_EXTRA_ID = 0x0001
+
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_EXTRA_SIZE = 20  # id + taille + (taille non compressée, taille compressée)
+_DATA_DESCRIPTOR_SIZE = 24
+_CENTRAL_HEADER_SIZE = 46
+_CENTRAL_EXTRA_SIZE = 28  # id + taille + (tailles x2, offset)
+_END_RECORDS_SIZE = 56 + 20 + 22  # zip64 EOCD + locator + EOCD
+
+
+class ArchiveEntry(NamedTuple):
+    """Un fichier MinIO à placer dans une archive (zip ou tar)."""
+
+    arcname: str
+    object_name: str
+    size: int
+    last_modified: datetime | None = None
+    etag: str | None = None
+
+
+# (entrée, offset, longueur) -> flux d'octets de l'objet
+ReadRange = Callable[[ArchiveEntry, int, int], Iterator[bytes]]
+
+
+def _listing_etag(entries: list[ArchiveEntry], kind: str) -> str:
+    """ETag fort dérivé du listing : change dès qu'un objet change."""
+    digest = hashlib.sha256(kind.encode("utf-8"))
+    for entry in entries:
+        digest.update(
+            f"{entry.arcname}\0{entry.size}\0{entry.etag}\0"
+            f"{entry.last_modified}\n".encode("utf-8")
+        )
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _overlap(
+    start: int, stop: int, seg_start: int, seg_end: int
+) -> tuple[int, int] | None:
+    """Portion [lo, hi) du segment couverte par [start, stop), relative au segment."""
+    lo, hi = max(start, seg_start), min(stop, seg_end)
+    return (lo - seg_start, hi - seg_start) if lo < hi else None
+
+
+def _dos_datetime(value: datetime | None) -> tuple[int, int]:
+    if value is None or value.year < 1980:
+        value = datetime(1980, 1, 1)
+    elif value.year > 2107:
+        value = datetime(2107, 12, 31, 23, 59, 58)
+
+    dos_time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    dos_date = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    return dos_time, dos_date
+
+
+class StoreZipLayout:
+    """
+    Archive ZIP64 sans compression (méthode "store") dont la disposition est
+    entièrement calculée à partir du listing.
+
+    Chaque entrée occupe : en-tête local | données de l'objet | data descriptor,
+    puis vient le répertoire central. Les tailles étant connues d'avance, la taille
+    totale et l'offset de chaque segment sont déterministes, ce qui permet
+    d'annoncer un `Content-Length` et de servir n'importe quelle plage d'octets.
+
+    Seuls les CRC32 dépendent du contenu : ils sont calculés au fil du streaming
+    et fournis via le dictionnaire `crcs` (index d'entrée -> CRC).
+    """
+
+    def __init__(self, entries: list[ArchiveEntry]):
+        self.entries = entries
+        self._names = [entry.arcname.encode("utf-8") for entry in entries]
+        self._dos = [_dos_datetime(entry.last_modified) for entry in entries]
+
+        # offsets[i] = début de l'en-tête local de l'entrée i
+        self.offsets: list[int] = []
+        offset = 0
+        for entry, name in zip(entries, self._names):
+            self.offsets.append(offset)
+            offset += (
+                _LOCAL_HEADER_SIZE
+                + len(name)
+                + _LOCAL_EXTRA_SIZE
+                + entry.size
+                + _DATA_DESCRIPTOR_SIZE
+            )
+
+        self.central_directory_offset = offset
+        self.central_directory_size = sum(
+            _CENTRAL_HEADER_SIZE + len(name) + _CENTRAL_EXTRA_SIZE
+            for name in self._names
+        )
+        self.total_size = (
+            self.central_directory_offset
+            + self.central_directory_size
+            + _END_RECORDS_SIZE
+        )
+
+    @property
+    def etag(self) -> str:
+        return _listing_etag(self.entries, "zip")
+
+    def local_header(self, index: int) -> bytes:
+        entry = self.entries[index]
+        name = self._names[index]
+        dos_time, dos_date = self._dos[index]
+        return (
+            struct.pack(
+                "<IHHHHHIIIHH",
+                _LOCAL_HEADER_SIG,
+                _ZIP_VERSION,
+                _FLAGS,
+                0,  # méthode "store"
+                dos_time,
+                dos_date,
+                0,  # CRC fourni par le data descriptor
+                0xFFFFFFFF,
+                0xFFFFFFFF,
+                len(name),
+                _LOCAL_EXTRA_SIZE,
+            )
+            + name
+            + struct.pack("<HHQQ", _ZIP64_EXTRA_ID, 16, entry.size, entry.size)
+        )
+
+    def data_descriptor(self, index: int, crc: int) -> bytes:
+        size = self.entries[index].size
+        return struct.pack("<IIQQ", _DATA_DESCRIPTOR_SIG, crc, size, size)
+
+    def central_directory(self, crcs: dict[int, int]) -> bytes:
+        """Répertoire central + enregistrements de fin (zip64 et classique)."""
+        parts: list[bytes] = []
+        for index, entry in enumerate(self.entries):
+            name = self._names[index]
+            dos_time, dos_date = self._dos[index]
+            parts.append(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    _CENTRAL_DIR_SIG,
+                    _ZIP_VERSION,
+                    _ZIP_VERSION,
+                    _FLAGS,
+                    0,
+                    dos_time,
+                    dos_date,
+                    crcs[index],
+                    0xFFFFFFFF,
+                    0xFFFFFFFF,
+                    len(name),
+                    _CENTRAL_EXTRA_SIZE,
+                    0,
+                    0,
+                    0,
+                    0,
+                    0xFFFFFFFF,
+                )
+            )
+            parts.append(name)
+            parts.append(
+                struct.pack(
+                    "<HHQQQ",
+                    _ZIP64_EXTRA_ID,
+                    24,
+                    entry.size,
+                    entry.size,
+                    self.offsets[index],
+                )
+            )
+
+        count = len(self.entries)
+        zip64_end_offset = self.central_directory_offset + self.central_directory_size
+        parts.append(
+            struct.pack(
+                "<IQHHIIQQQQ",
+                _ZIP64_END_SIG,
+                44,
+                _ZIP_VERSION,
+                _ZIP_VERSION,
+                0,
+                0,
+                count,
+                count,
+                self.central_directory_size,
+                self.central_directory_offset,
+            )
+        )
+        parts.append(struct.pack("<IIQI", _ZIP64_LOCATOR_SIG, 0, zip64_end_offset, 1))
+        parts.append(
+            struct.pack(
+                "<IHHHHIIH",
+                _END_SIG,
+                0,
+                0,
+                0xFFFF,
+                0xFFFF,
+                0xFFFFFFFF,
+                0xFFFFFFFF,
+                0,
+            )
+        )
+        return b"".join(parts)
+
+    def _compute_crc(self, index: int, read_range: ReadRange) -> int:
+        entry = self.entries[index]
+        crc = 0
+        if entry.size:
+            for chunk in read_range(entry, 0, entry.size):
+                crc = zlib.crc32(chunk, crc)
+        return crc
+
+    def _resolve_crc(
+        self, index: int, read_range: ReadRange, crcs: dict[int, int]
+    ) -> int:
+        if index not in crcs:
+            crcs[index] = self._compute_crc(index, read_range)
+        return crcs[index]
+
+    def iter_range(
+        self,
+        start: int,
+        end: int,
+        read_range: ReadRange,
+        crcs: dict[int, int],
+    ) -> Iterator[bytes]:
+        """
+        Produit les octets [start, end] (bornes incluses) de l'archive.
+
+        Les plages sont traduites en (en-tête | plage d'objet | data descriptor |
+        répertoire central). Un CRC inconnu (reprise au milieu d'un fichier, ou
+        répertoire central demandé seul) est recalculé en relisant l'objet, puis
+        mémorisé dans `crcs`.
+        """
+        stop = end + 1
+
+        def overlap(seg_start: int, seg_end: int) -> tuple[int, int] | None:
+            return _overlap(start, stop, seg_start, seg_end)
+
+        for index, entry in enumerate(self.entries):
+            header_start = self.offsets[index]
+            if header_start >= stop:
+                return
+
+            header = self.local_header(index)
+            data_start = header_start + len(header)
+            data_end = data_start + entry.size
+            descriptor_end = data_end + _DATA_DESCRIPTOR_SIZE
+            if descriptor_end <= start:
+                continue
+
+            window = overlap(header_start, data_start)
+            if window:
+                yield header[window[0] : window[1]]
+
+            window = overlap(data_start, data_end)
+            if window:
+                lo, hi = window
+                # Un CRC partiel n'est utile que si on atteint la fin de l'objet.
+                running = None
+                if index not in crcs and hi == entry.size:
+                    running = 0
+                    if lo > 0:
+                        for chunk in read_range(entry, 0, lo):
+                            running = zlib.crc32(chunk, running)
+                for chunk in read_range(entry, lo, hi - lo):
+                    if running is not None:
+                        running = zlib.crc32(chunk, running)
+                    yield chunk
+                if running is not None:
+                    crcs[index] = running
+
+            window = overlap(data_end, descriptor_end)
+            if window:
+                crc = self._resolve_crc(index, read_range, crcs)
+                yield self.data_descriptor(index, crc)[window[0] : window[1]]
+
+        window = overlap(self.central_directory_offset, self.total_size)
+        if window:
+            for index in range(len(self.entries)):
+                self._resolve_crc(index, read_range, crcs)
+            yield self.central_directory(crcs)[window[0] : window[1]]
+
+
+class TarLayout:
+    """
+    Archive tar POSIX (pax) dont la taille est calculée depuis le listing.
+
+    Chaque entrée occupe : en-tête(s) | données | bourrage à 512 octets, puis
+    deux blocs nuls terminent l'archive. Aucun checksum ne dépend du contenu :
+    toute plage d'octets se sert sans relire les objets précédents.
+    """
+
+    _BLOCK_SIZE = tarfile.BLOCKSIZE
+
+    def __init__(self, entries: list[ArchiveEntry]):
+        self.entries = entries
+        self._headers = [self._header(entry) for entry in entries]
+
+        self.offsets: list[int] = []
+        offset = 0
+        for entry, header in zip(entries, self._headers):
+            self.offsets.append(offset)
+            offset += len(header) + entry.size + self._padding(entry.size)
+
+        self.total_size = offset + 2 * self._BLOCK_SIZE
+
+    @property
+    def etag(self) -> str:
+        return _listing_etag(self.entries, "tar")
+
+    @classmethod
+    def _padding(cls, size: int) -> int:
+        return -size % cls._BLOCK_SIZE
+
+    @staticmethod
+    def _header(entry: ArchiveEntry) -> bytes:
+        info = tarfile.TarInfo(entry.arcname)
+        info.size = entry.size
+        info.mode = 0o644
+        info.mtime = int(entry.last_modified.timestamp()) if entry.last_modified else 0
+        return info.tobuf(format=tarfile.PAX_FORMAT, encoding="utf-8")
+
+    def iter_range(
+        self, start: int, end: int, read_range: ReadRange
+    ) -> Iterator[bytes]:
+        """Produit les octets [start, end] (bornes incluses) de l'archive."""
+        stop = end + 1
+
+        for index, entry in enumerate(self.entries):
+            header_start = self.offsets[index]
+            if header_start >= stop:
+                return
+
+            header = self._headers[index]
+            data_start = header_start + len(header)
+            data_end = data_start + entry.size
+            padding_end = data_end + self._padding(entry.size)
+            if padding_end <= start:
+                continue
+
+            window = _overlap(start, stop, header_start, data_start)
+            if window:
+                yield header[window[0] : window[1]]
+
+            window = _overlap(start, stop, data_start, data_end)
+            if window:
+                yield from read_range(entry, window[0], window[1] - window[0])
+
+            window = _overlap(start, stop, data_end, padding_end)
+            if window:
+                yield bytes(window[1] - window[0])
+
+        window = _overlap(
+            start, stop, self.total_size - 2 * self._BLOCK_SIZE, self.total_size
+        )
+        if window:
+            yield bytes(window[1] - window[0])
+
+    @classmethod
+    def stream(
+        cls, entries: Iterable[ArchiveEntry], read_range: ReadRange
+    ) -> Iterator[bytes]:
+        """
+        Produit l'archive complète en consommant `entries` au fil de l'eau :
+        pour un flux sans taille annoncée, le listing n'a pas à être chargé
+        avant le premier octet.
+        """
+        for entry in entries:
+            yield cls._header(entry)
+            if entry.size:
+                yield from read_range(entry, 0, entry.size)
+            padding = cls._padding(entry.size)
+            if padding:
+                yield bytes(padding)
+        yield bytes(2 * cls._BLOCK_SIZE)
+
+
+def zstd_compress_stream(
+    chunks: Iterable[bytes], level: int = 3, threads: int = 0
+) -> Iterator[bytes]:
+    """Compresse un flux d'octets en zstd (multithreadé si `threads` > 0)."""
+    compressor = zstandard.ZstdCompressor(level=level, threads=threads).compressobj()
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,16 +1,20 @@
+import os
 import re
-from typing import Literal
+from typing import Any, BinaryIO, Literal
 from fastapi import HTTPException
 from minio import Minio, S3Error
 import mimetypes
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageOps
 import io
 import json
 import unicodedata
 
 WINDOWS_SUFFIX_RE = re.compile(r"^(.*?)(?: \((\d+)\))?$")
 
+# Préfixes réservés (avatar, miniatures) : jamais montrés dans l'explorateur.
+HIDDEN_PREFIXES = ("__profile__/", "__thumbnails__/")
+
 
 EXTENSION_MAP = {
     "png": "image",
@@ -59,6 +63,10 @@ class MinioUtils:
 
         return "application/octet-stream"
 
+    @staticmethod
+    def is_hidden_object(object_name: str | None) -> bool:
+        return bool(object_name) and object_name.startswith(HIDDEN_PREFIXES)
+
     @staticmethod
     def get_file_type(filename: str, mime: str) -> str:
         ext = Path(filename).suffix.lower().replace(".", "")
@@ -78,10 +86,33 @@ class MinioUtils:
         return "file"
 
     @staticmethod
-    def extract_image_metadata(data: bytes):
-        with Image.open(io.BytesIO(data)) as img:
+    def extract_image_metadata(data: bytes | BinaryIO):
+        # Pillow ne lit que l'en-tête : un fichier "seekable" suffit.
+        source = io.BytesIO(data) if isinstance(data, bytes) else data
+        with Image.open(source) as img:
             return {"width": img.width, "height": img.height, "format": img.format}
 
+    @staticmethod
+    def render_thumbnail(data: bytes, size: int, image_format: str) -> bytes:
+        """
+        Produit une miniature (côté le plus long = size) orientée selon l'EXIF.
+        image_format : "webp" ou "jpeg".
+        """
+        with Image.open(io.BytesIO(data)) as img:
+            # JPEG : décodage directement à une échelle réduite (1/2, 1/4, 1/8)
+            img.draft("RGB", (size, size))
+            thumb = ImageOps.exif_transpose(img)
+            thumb.thumbnail((size, size))
+
+            if image_format == "jpeg" and thumb.mode not in ("RGB", "L"):
+                thumb = thumb.convert("RGB")
+            elif thumb.mode not in ("RGB", "RGBA", "L"):
+                thumb = thumb.convert("RGBA")
+
+            output = io.BytesIO()
+            thumb.save(output, format=image_format.upper(), quality=80)
+            return output.getvalue()
+
     @staticmethod
     def extract_video_metadata(media_info):
         # media_info est une chaîne JSON, il faut la parser en dictionnaire
@@ -104,6 +135,140 @@ class MinioUtils:
             "fps": float(video_track.get("FrameRate", 0)) if video_track else 0,
         }
 
+    @staticmethod
+    def extract_audio_metadata(media_info):
+        media_info_dict = json.loads(media_info)
+        tracks = media_info_dict.get("media", {}).get("track", [])
+
+        general_track = next((t for t in tracks if t.get("@type") == "General"), {})
+        audio_track = next((t for t in tracks if t.get("@type") == "Audio"), {})
+
+        def to_int(value):
+            try:
+                return int(float(value))
+            except (TypeError, ValueError):
+                return None
+
+        duration = audio_track.get("Duration") or general_track.get("Duration") or 0
+        return {
+            "duration": round(float(duration), 0),
+            "codec": audio_track.get("Format", "Inconnu") if audio_track else "Inconnu",
+            "bitrate": to_int(
+                audio_track.get("BitRate") or general_track.get("OverallBitRate")
+            ),
+            "sample_rate": to_int(audio_track.get("SamplingRate")),
+            "channels": to_int(audio_track.get("Channels")),
+        }
+
+    @staticmethod
+    def parse_byte_range(
+        range_header: str | None, total_size: int
+    ) -> tuple[int, int] | None:
+        """
+        Interprète un en-tête `Range: bytes=...` (une seule plage).
+        Retourne (début, fin) inclusifs, ou None si l'en-tête est absent/ignoré
+        (unité inconnue, plages multiples, syntaxe invalide) : on sert alors tout.
+        Lève une 416 si la plage est hors du contenu.
+        """
+        if not range_header:
+            return None
+
+        unit, _, spec = range_header.strip().partition("=")
+        if unit.strip().lower() != "bytes" or "," in spec:
+            return None
+
+        first, sep, last = spec.strip().partition("-")
+        if not sep:
+            return None
+
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else total_size - 1
+            else:
+                # Suffixe : les N derniers octets
+                suffix = int(last)
+                if suffix <= 0:
+                    raise ValueError
+                start = max(total_size - suffix, 0)
+                end = total_size - 1
+        except ValueError:
+            return None
+
+        if start >= total_size:
+            raise HTTPException(
+                status_code=416,
+                detail="Plage demandée invalide",
+                headers={"Content-Range": f"bytes */{total_size}"},
+            )
+
+        if start < 0 or end < start:
+            return None
+
+        return start, min(end, total_size - 1)
+
+    @staticmethod
+    def collect_archive_objects(
+        minio_client: Minio,
+        bucket_name: str,
+        object_names: list[str],
+    ) -> tuple[dict[str, Any], list[str]]:
+        """
+        Résout une sélection (fichiers et dossiers "xxx/") en objets à archiver.
+
+        Returns:
+            ({nom_objet: objet/stat MinIO}, chemins normalisés de la sélection).
+            Les fichiers introuvables sont ignorés.
+        """
+        valid_objects: dict[str, Any] = {}
+        normalized_object_names: list[str] = []
+
+        for obj_name in object_names:
+            obj_name = MinioUtils.normalize_path(
+                obj_name, is_folder=obj_name.endswith("/")
+            )
+            normalized_object_names.append(obj_name)
+            if obj_name.endswith("/"):
+                objs = minio_client.list_objects(
+                    bucket_name, prefix=obj_name, recursive=True
+                )
+                for obj in objs:
+                    if obj.object_name and not obj.object_name.endswith("/"):
+                        valid_objects[obj.object_name] = obj
+            else:
+                try:
+                    stat = minio_client.stat_object(bucket_name, obj_name)
+                except S3Error as e:
+                    if e.code == "NoSuchKey":
+                        continue
+                    raise
+                valid_objects[obj_name] = stat
+
+        return valid_objects, normalized_object_names
+
+    @staticmethod
+    def get_archive_prefix(normalized_object_names: list[str]) -> str:
+        """
+        Préfixe commun retiré des chemins pour construire les noms d'archive :
+        le dossier commun de la sélection (un fichier compte pour son dossier
+        parent). Sans dossier commun, les chemins restent complets, si bien que
+        "a/report.pdf" et "b/report.pdf" ne se confondent pas dans l'archive.
+        """
+        folders = [
+            name if name.endswith("/") else MinioUtils.get_parent_path(name)
+            for name in normalized_object_names
+        ]
+        if not folders:
+            return ""
+        if len(set(folders)) == 1:
+            return folders[0]
+        return os.path.commonpath(folders)
+
+    @staticmethod
+    def get_arcname(object_name: str, source_prefix: str) -> str:
+        """Nom d'un objet à l'intérieur d'une archive."""
+        return object_name[len(source_prefix) :].lstrip("/")
+
     @staticmethod
     def get_parent_path(path: str) -> str:
         """
@@ -0,0 +1,126 @@
+import io
+from collections import OrderedDict
+
+from minio import Minio
+
+from core.config import settings
+
+
+class MinioRangeReader(io.RawIOBase):
+    """
+    Fichier en lecture seule et "seekable" au-dessus d'un objet MinIO.
+
+    Chaque lecture est traduite en `get_object(offset=..., length=...)` par blocs
+    de `block_size`, gardés dans un petit cache LRU. Les parseurs (MediaInfo,
+    Pillow) ne récupèrent ainsi que les zones qu'ils lisent réellement
+    (en-têtes, atome moov, EXIF) au lieu de l'objet entier.
+    """
+
+    def __init__(
+        self,
+        minio: Minio,
+        bucket_name: str,
+        object_name: str,
+        size: int,
+        block_size: int | None = None,
+        max_blocks: int | None = None,
+    ) -> None:
+        super().__init__()
+        self.minio = minio
+        self.bucket_name = bucket_name
+        self.object_name = object_name
+        self.size = size
+        self.block_size = block_size or settings.MINIO_RANGE_READ_BLOCK_SIZE
+        self.max_blocks = max_blocks or settings.MINIO_RANGE_READ_CACHE_BLOCKS
+        self.bytes_fetched = 0
+
+        self._position = 0
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"whence invalide: {whence}")
+
+        if position < 0:
+            raise ValueError("Position négative")
+        self._position = position
+        return position
+
+    def _fetch(self, first_block: int, last_block: int) -> None:
+        """Charge les blocs [first_block, last_block] en une seule requête."""
+        offset = first_block * self.block_size
+        length = min((last_block + 1) * self.block_size, self.size) - offset
+        response = self.minio.get_object(
+            self.bucket_name, self.object_name, offset=offset, length=length
+        )
+        try:
+            data = response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+        self.bytes_fetched += len(data)
+        for index in range(first_block, last_block + 1):
+            start = (index - first_block) * self.block_size
+            self._store(index, data[start : start + self.block_size])
+
+    def _store(self, index: int, block: bytes) -> None:
+        self._blocks[index] = block
+        self._blocks.move_to_end(index)
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        end = min(self._position + len(view), self.size)
+        if end <= self._position:
+            return 0
+
+        first_block = self._position // self.block_size
+        last_block = (end - 1) // self.block_size
+
+        # Regroupe les blocs manquants contigus pour limiter les allers-retours.
+        missing_start = None
+        for index in range(first_block, last_block + 2):
+            is_missing = index <= last_block and index not in self._blocks
+            if is_missing and missing_start is None:
+                missing_start = index
+            elif not is_missing and missing_start is not None:
+                self._fetch(missing_start, index - 1)
+                missing_start = None
+
+        written = 0
+        while self._position < end:
+            index = self._position // self.block_size
+            block = self._blocks.get(index)
+            if block is None:
+                # Évincé pendant cette lecture (lecture plus grande que le cache).
+                self._fetch(index, index)
+                block = self._blocks[index]
+            else:
+                self._blocks.move_to_end(index)
+
+            start = self._position - index * self.block_size
+            chunk = block[start : start + (end - self._position)]
+            if not chunk:
+                break
+            view[written : written + len(chunk)] = chunk
+            written += len(chunk)
+            self._position += len(chunk)
+
+        return written
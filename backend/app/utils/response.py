@@ -1,7 +1,17 @@
 from pydantic import BaseModel, Field
-from typing import Generic, TypeVar, Optional
+from typing import Any, Generic, TypeVar, Optional
 from datetime import datetime
 
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import msgpack
+except ImportError:  # dépendance optionnelle : réponses JSON uniquement
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
 T = TypeVar("T")
 
 
@@ -23,3 +33,81 @@ class BaseResponse(BaseModel, Generic[T]):
                 "timestamp": "2025-12-09T12:00:00Z",
             }
         }
+
+
+class ListingResponse(JSONResponse):
+    """
+    Réponse sérialisée directement par orjson, pour les gros listings.
+
+    Le contenu est un dict au format de BaseResponse déjà prêt à encoder : il ne
+    repasse ni par la validation du `response_model` ni par l'encodeur JSON
+    standard. Avec `Accept: application/msgpack`, le même contenu est encodé
+    en MessagePack (dates en chaînes ISO, comme en JSON).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if self.media_type == MSGPACK_MEDIA_TYPES[0]:
+            return msgpack.packb(content, default=_msgpack_default)
+        return orjson.dumps(content)
+
+    @staticmethod
+    def negotiate(accept: str | None) -> str:
+        """Type de la réponse : MessagePack si demandé et disponible, sinon JSON."""
+        if msgpack is not None and accept:
+            media_types = [part.split(";")[0].strip() for part in accept.split(",")]
+            if any(media_type in MSGPACK_MEDIA_TYPES for media_type in media_types):
+                return MSGPACK_MEDIA_TYPES[0]
+        return "application/json"
+
+    @classmethod
+    def envelope(
+        cls,
+        data: Any,
+        message: str,
+        success: bool = True,
+        status_code: int = 200,
+        accept: str | None = None,
+        etag: str | None = None,
+    ) -> "ListingResponse":
+        """Enveloppe `data` avec les mêmes champs que BaseResponse."""
+        return cls(
+            {
+                "success": success,
+                "data": data,
+                "message": message,
+                "timestamp": datetime.now(),
+                "status_code": status_code,
+            },
+            status_code=status_code,
+            media_type=cls.negotiate(accept),
+            headers=cls.cache_headers(etag),
+        )
+
+    @staticmethod
+    def cache_headers(etag: str | None) -> dict[str, str]:
+        headers = {"Vary": "Accept"}
+        if etag:
+            # Revalidation systématique : la réponse reste en cache côté client
+            # et ne coûte qu'un 304 tant que le dossier n'a pas changé.
+            headers.update({"ETag": etag, "Cache-Control": "private, no-cache"})
+        return headers
+
+    @classmethod
+    def not_modified(cls, etag: str) -> Response:
+        return Response(status_code=304, headers=cls.cache_headers(etag))
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparaison faible d'`If-None-Match` (la compression rend l'ETag faible)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable en MessagePack: {type(value)!r}")
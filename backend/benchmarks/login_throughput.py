@@ -0,0 +1,86 @@
+"""
+Débit de connexions (vérification Argon2) selon la taille du pool de hachage.
+
+Simule une rafale de N connexions simultanées et mesure, pour chaque nombre
+de threads : connexions par seconde, latence p50/p95 d'une connexion et
+retard maximal de la boucle d'événements (ce que subissent les autres
+requêtes du worker pendant la rafale). La ligne "inline" reproduit l'ancien
+comportement, Argon2 exécuté directement dans la boucle.
+
+Usage (depuis backend/, avec le .env) :
+    python -m benchmarks.login_throughput --logins 64 --workers 1 2 4 8
+
+Choisir PASSWORD_HASH_WORKERS au coude de la courbe : au-delà, le débit ne
+progresse plus (cœurs saturés) et seule la latence augmente.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from core.password import PasswordHasher
+
+PASSWORD = "Benchmark1!"
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval_s: float = 0.005) -> float:
+    """Retard maximal (s) d'un réveil périodique pendant la mesure."""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval_s
+        await asyncio.sleep(interval_s)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+
+async def run(logins: int, workers: int | None) -> dict:
+    hasher = PasswordHasher(workers=workers or 1, queue_timeout_s=3600)
+    hashed = hasher.pwd_context.hash(PASSWORD)
+
+    async def login() -> float:
+        started = time.perf_counter()
+        if workers is None:
+            hasher.pwd_context.verify(PASSWORD, hashed)
+        else:
+            await hasher.verify(PASSWORD, hashed)
+        return time.perf_counter() - started
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(login() for _ in range(logins))))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    lag = await lag_task
+    hasher.shutdown()
+
+    return {
+        "workers": "inline" if workers is None else workers,
+        "logins_per_s": logins / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "loop_lag_ms": lag * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'logins/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'lag ms':>9}")
+    for workers in [None, *args.workers]:
+        r = await run(args.logins, workers)
+        print(
+            f"{r['workers']:>8} {r['logins_per_s']:>10.1f} {r['p50_ms']:>9.0f} "
+            f"{r['p95_ms']:>9.0f} {r['loop_lag_ms']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+import json
+import time
+from collections import OrderedDict
+
+import redis.asyncio as redis
+from fastapi import Request
+
+from app.schemas.user import User
+from core.config import settings
+from core.logging import setup_logger
+from database.services.token import token_digest
+
+logger = setup_logger(__name__)
+
+
+class AuthCache:
+    """
+    Cache des utilisateurs authentifiés (token -> User), pour éviter la requête
+    `tokens JOIN users` à chaque appel authentifié.
+
+    Deux niveaux, indexés par l'empreinte SHA-256 du token (jamais le token
+    lui-même) :
+    - un LRU en mémoire, borné à AUTH_CACHE_MAX_ENTRIES et de durée courte
+      (AUTH_CACHE_LOCAL_TTL_S) : c'est le cas nominal, un simple dictionnaire ;
+    - Redis, partagé entre les workers, pour AUTH_CACHE_TTL_S.
+    Une entrée ne survit jamais à l'expiration du token.
+
+    L'invalidation est explicite (déconnexion, changement de mot de passe ou de
+    profil) : Redis tient l'ensemble "auth-user:{user_id}" des tokens en cache
+    pour pouvoir tous les retirer. Le LRU d'un autre worker peut servir une
+    entrée invalidée au plus AUTH_CACHE_LOCAL_TTL_S secondes.
+    Sans Redis, seul le LRU local est utilisé.
+    """
+
+    _KEY_PREFIX = "auth"
+    _USER_KEY_PREFIX = "auth-user"
+
+    def __init__(self, redis_client: redis.Redis | None) -> None:
+        self.redis = redis_client
+        self.max_entries = settings.AUTH_CACHE_MAX_ENTRIES
+        # empreinte -> (expire_at, user)
+        self._local: OrderedDict[str, tuple[float, User]] = OrderedDict()
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return token_digest(token).hex()
+
+    def _key(self, digest: str) -> str:
+        return f"{self._KEY_PREFIX}:{digest}"
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self._USER_KEY_PREFIX}:{user_id}"
+
+    def _remember(self, digest: str, user: User, expires_at: float) -> None:
+        local_expiry = min(expires_at, time.time() + settings.AUTH_CACHE_LOCAL_TTL_S)
+        self._local[digest] = (local_expiry, user)
+        self._local.move_to_end(digest)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, token: str) -> User | None:
+        digest = self.token_key(token)
+
+        entry = self._local.get(digest)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at > time.time():
+                self._local.move_to_end(digest)
+                return user
+            del self._local[digest]
+
+        if not self.redis:
+            return None
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(self._key(digest))
+            pipe.pttl(self._key(digest))
+            raw, ttl_ms = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Cache d'authentification indisponible: {e}")
+            return None
+        if not raw:
+            return None
+
+        user = User.model_validate(json.loads(raw))
+        self._remember(digest, user, time.time() + max(ttl_ms, 0) / 1000)
+        return user
+
+    async def set(self, token: str, user: User, expires_at: float) -> None:
+        """Met `user` en cache jusqu'à `expires_at` (timestamp) au plus tard."""
+        ttl_s = int(min(expires_at - time.time(), settings.AUTH_CACHE_TTL_S))
+        if ttl_s <= 0:
+            return
+
+        digest = self.token_key(token)
+        self._remember(digest, user, time.time() + ttl_s)
+
+        if not self.redis:
+            return
+        try:
+            user_key = self._user_key(user.id)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(self._key(digest), user.model_dump_json(), ex=ttl_s)
+            pipe.sadd(user_key, digest)
+            pipe.expire(user_key, settings.AUTH_CACHE_TTL_S)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Écriture cache d'authentification impossible: {e}")
+
+    async def invalidate_token(self, token: str) -> None:
+        digest = self.token_key(token)
+        self._local.pop(digest, None)
+
+        if not self.redis:
+            return
+        try:
+            await self.redis.delete(self._key(digest))
+        except Exception as e:
+            logger.warning(f"Invalidation cache d'authentification impossible: {e}")
+
+    async def invalidate_user(self, user_id: int) -> None:
+        """Retire du cache tous les tokens de l'utilisateur."""
+        for digest in [
+            digest for digest, (_, user) in self._local.items() if user.id == user_id
+        ]:
+            del self._local[digest]
+
+        if not self.redis:
+            return
+        try:
+            user_key = self._user_key(user_id)
+            digests = await self.redis.smembers(user_key)
+            await self.redis.delete(
+                user_key, *(self._key(digest) for digest in digests)
+            )
+        except Exception as e:
+            logger.warning(f"Invalidation cache d'authentification impossible: {e}")
+
+
+def get_auth_cache(request: Request) -> AuthCache | None:
+    return getattr(request.app.state, "auth_cache", None)
@@ -0,0 +1,205 @@
+import zlib
+from typing import Protocol
+
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : "br" n'est alors pas proposé
+    brotli = None
+
+
+class _Encoder(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+    def flush(self) -> bytes: ...
+    def finish(self) -> bytes: ...
+
+
+class _GzipEncoder:
+    def __init__(self, level: int = 6) -> None:
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int = 3) -> None:
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int = 4) -> None:
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+# Ordre de préférence du serveur, à qualité égale côté client.
+ENCODERS: dict[str, type] = {
+    "zstd": _ZstdEncoder,
+    "br": _BrotliEncoder,
+    "gzip": _GzipEncoder,
+}
+if brotli is None:
+    del ENCODERS["br"]
+
+# Types compressibles : les téléchargements (zip, zstd, médias, octet-stream)
+# sont déjà compressés ou servis par plages et restent intacts.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "text/plain",
+    "text/html",
+    "text/csv",
+)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Meilleur codage supporté d'après `Accept-Encoding` (q-values comprises)."""
+    if not accept_encoding:
+        return None
+
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in ENCODERS:
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compression des réponses (zstd, br, gzip) négociée via `Accept-Encoding`.
+
+    Middleware ASGI pur : une réponse en un seul morceau n'est compressée qu'à
+    partir de `minimum_size` octets ; une réponse en flux (StreamingResponse,
+    NDJSON) l'est au fil de l'eau, chaque morceau étant vidé aussitôt pour ne
+    pas retarder le client. Sont laissées telles quelles les réponses déjà
+    encodées, servies par plages (`Accept-Ranges`, 206) ou d'un type non
+    compressible (fichiers, archives, images, SSE).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.encoder: _Encoder | None = None
+        self.passthrough = False
+
+    def _is_compressible(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        return (
+            message["status"] not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and headers.get("accept-ranges", "none") == "none"
+            and content_type in COMPRESSIBLE_TYPES
+        )
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._is_compressible(message)
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.encoder = ENCODERS[self.encoding]()
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            # Représentation différente : un ETag fort devient faible.
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+
+            if not more_body:
+                data = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(data))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": data})
+                return
+            await self._send(self.start_message)
+
+        if more_body:
+            data = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            data = self.encoder.compress(body) + self.encoder.finish()
+        await self._send(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
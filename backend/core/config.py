@@ -18,11 +18,32 @@ class Settings(BaseSettings):
     DB_HOST: str = "api.alexandre-larue.fr"
     DB_PASSWORD: str = "arthur_mdp"
     DB_PORT: int = 5432
+    # Pool de connexions
+    DB_MIN_CONN: int = 1
+    DB_MAX_CONN: int = 10
+    DB_POOL_TIMEOUT_S: float = 30.0
+    DB_CONN_CHECK_IDLE_S: float = 30.0
+    DB_CONN_MAX_IDLE_S: float = 600.0
+    DB_CONN_MAX_LIFETIME_S: float = 3600.0
+    DB_PREPARED_STATEMENTS: bool = True
 
     # Token
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_DAY: int = 30
+    # Cache token -> utilisateur (Redis + LRU local par worker)
+    AUTH_CACHE_TTL_S: int = 15 * 60
+    AUTH_CACHE_LOCAL_TTL_S: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    # Authentification sur les seules claims du JWT (révocations via Redis,
+    # ignoré sans Redis)
+    AUTH_STATELESS: bool = False
+    # Purge des tokens expirés (0 = désactivée)
+    TOKEN_PURGE_INTERVAL_S: int = 3600
+    TOKEN_PURGE_BATCH_SIZE: int = 1000
+    # Hachage Argon2 (threads dédiés, attente max avant 503)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT_S: float = 5.0
 
     # Configuration Minio
     MINIO_ENDPOINT: str
@@ -30,9 +51,24 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str
     MINIO_SECURE: bool = False
     MINIO_COPY_MAX_WORKERS: int = 4
+    MINIO_STAT_MAX_WORKERS: int = 16
     MINIO_ZIP_MAX_WORKERS: int = 4
     MINIO_ZIP_STREAM_CHUNK_SIZE: int = 1024 * 1024
     MINIO_IMAGE_METADATA_READ_SIZE: int = 1024 * 1024
+    MINIO_RANGE_READ_BLOCK_SIZE: int = 256 * 1024
+    MINIO_RANGE_READ_CACHE_BLOCKS: int = 16
+    MINIO_ZSTD_LEVEL: int = 3
+    MINIO_ZSTD_THREADS: int = 4
+    FOLDER_STATS_REPAIR_INTERVAL_S: int = 24 * 3600
+    STORAGE_QUOTA_BYTES: int = 0
+    STORAGE_USAGE_CACHE_TTL_S: int = 60
+    CHANGE_FEED_RETENTION_DAYS: int = 30
+    MEDIA_PIPELINE_WORKERS: int = 2
+    MEDIA_PIPELINE_QUEUE_SIZE: int = 1000
+    MEDIA_PIPELINE_BACKLOG_SIZE: int = 100000
+    THUMBNAIL_BATCH_CONCURRENCY: int = 8
+    # Compression HTTP (0 = désactivée)
+    HTTP_COMPRESSION_MIN_BYTES: int = 1024
 
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
@@ -54,7 +90,7 @@ class Settings(BaseSettings):
     @property
     def database_url(self) -> str:
         """Génère l'URL de connexion à la base de données."""
-        return f"postgresql+psycopg2://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:5432/{self.DB_NAME}"
+        return f"postgresql+psycopg2://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
     # Methode pour récupérer le DSN de la DB
     @computed_field
@@ -0,0 +1,95 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from core.config import settings
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """
+    Hachage et vérification Argon2 hors de la boucle d'événements.
+
+    Un calcul Argon2 (64 Mio, 12 itérations) prend plusieurs dizaines de
+    millisecondes de CPU : exécuté dans la boucle, une rafale de connexions
+    gèle toutes les autres requêtes du worker. Les calculs passent donc par un
+    pool de PASSWORD_HASH_WORKERS threads (argon2-cffi relâche le GIL), qui
+    borne aussi la concurrence : au-delà, les demandes attendent leur tour au
+    plus PASSWORD_HASH_QUEUE_TIMEOUT_S, puis reçoivent une 503 plutôt que
+    d'accumuler une file sans fin. `benchmarks/login_throughput.py` aide à
+    dimensionner ces deux valeurs.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        queue_timeout_s: float = settings.PASSWORD_HASH_QUEUE_TIMEOUT_S,
+    ) -> None:
+        self.pwd_context = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto",
+            argon2__rounds=12,  # Nombre d'itérations
+            argon2__memory_cost=65536,  # Mémoire utilisée (en KiB)
+            argon2__parallelism=2,  # Nombre de threads
+        )
+        self.queue_timeout_s = queue_timeout_s
+        self.workers = workers
+        # Créé à la demande : recréé après shutdown() (nouveau lifespan, tests)
+        self._executor: ThreadPoolExecutor | None = None
+        # Un jeton par thread : rien n'attend dans la file interne de l'executor.
+        self._slots = asyncio.Semaphore(workers)
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        # Attente bornée explicite plutôt que wait_for(acquire()) : avant
+        # Python 3.12, un jeton obtenu au moment du timeout pouvait être perdu.
+        acquire = asyncio.ensure_future(self._slots.acquire())
+        try:
+            await asyncio.wait({acquire}, timeout=self.queue_timeout_s)
+        finally:
+            timed_out = not acquire.done()
+            if timed_out:
+                acquire.cancel()
+                acquire.add_done_callback(self._release_if_acquired)
+        if timed_out:
+            logger.warning("File de hachage des mots de passe saturée")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Trop de connexions simultanées, réessayez dans un instant",
+            )
+        try:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="argon2"
+                )
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._slots.release()
+
+    def _release_if_acquired(self, acquire: asyncio.Future) -> None:
+        # L'annulation a pu arriver après l'obtention du jeton : il est rendu
+        if not acquire.cancelled():
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.pwd_context.verify, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        # Le sémaphore se lie à la boucle qui l'utilise : neuf pour la suivante
+        self._slots = asyncio.Semaphore(self.workers)
+
+
+password_hasher = PasswordHasher()
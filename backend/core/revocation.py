@@ -0,0 +1,203 @@
+import asyncio
+import calendar
+import json
+from datetime import datetime
+
+import redis.asyncio as redis
+from fastapi import Request
+
+from app.schemas.user import User
+from core.config import settings
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def claims_timestamp(moment: datetime | None = None) -> int:
+    """
+    Horodatage dans l'horloge des claims `iat`/`exp` : create_access_token
+    encode des datetime naïves, que jose convertit comme si elles étaient UTC.
+    """
+    return calendar.timegm((moment or datetime.now()).utctimetuple())
+
+
+class RevocationList:
+    """
+    État partagé du mode d'authentification sans état (AUTH_STATELESS).
+
+    Les claims d'un JWT vérifié suffisent à construire l'utilisateur ; il reste
+    à connaître ce qui a changé depuis son émission :
+    - les jti révoqués (déconnexion), dans le ZSET Redis "auth-revoked" avec
+      l'expiration du token pour score : un jti n'a plus besoin d'être retenu
+      une fois le token expiré, l'ensemble reste donc petit ;
+    - les profils modifiés, dans le hash "auth-profiles" : un token émis avant
+      la modification est complété avec le profil à jour.
+
+    Chaque worker garde une copie en mémoire (vérification = lecture de
+    dictionnaire), chargée au démarrage puis tenue à jour par pub/sub sur
+    "auth:revocations". Après une coupure, l'abonnement est rétabli et l'état
+    rechargé intégralement. Sans Redis, l'état est local au worker.
+    """
+
+    _REVOKED_KEY = "auth-revoked"
+    _PROFILES_KEY = "auth-profiles"
+    _CHANNEL = "auth:revocations"
+    _RETRY_DELAY_S = 5
+
+    def __init__(self, redis_client: redis.Redis | None) -> None:
+        self.redis = redis_client
+        # jti -> exp
+        self._revoked: dict[str, int] = {}
+        # user_id -> profil (username, email, full_name, updated_at)
+        self._profiles: dict[int, dict] = {}
+        self._listener_task: asyncio.Task | None = None
+
+    @staticmethod
+    def _profile_retention_s() -> int:
+        # Au-delà, tous les tokens émis avant la modification ont expiré.
+        return settings.ACCESS_TOKEN_EXPIRE_DAY * 24 * 3600
+
+    async def start(self) -> None:
+        if not self.redis:
+            return
+        await self._sync()
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def shutdown(self) -> None:
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    def is_revoked(self, jti: str | None) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def profile_since(self, user_id: int, issued_at: int) -> dict | None:
+        """Profil modifié après `issued_at`, à appliquer par-dessus les claims."""
+        profile = self._profiles.get(user_id)
+        if profile is None or profile["updated_at"] < issued_at:
+            return None
+        return profile
+
+    async def revoke(self, jti: str, expires_at: int) -> None:
+        self._apply({"type": "jti", "jti": jti, "exp": expires_at})
+        if not self.redis:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zadd(self._REVOKED_KEY, {jti: expires_at})
+            pipe.zremrangebyscore(self._REVOKED_KEY, "-inf", claims_timestamp())
+            pipe.publish(
+                self._CHANNEL,
+                json.dumps({"type": "jti", "jti": jti, "exp": expires_at}),
+            )
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Révocation du token non propagée: {e}")
+
+    async def update_profile(self, user: User) -> None:
+        profile = {
+            "username": user.username,
+            "email": user.email,
+            "full_name": user.full_name,
+            "updated_at": claims_timestamp(),
+        }
+        message = {"type": "profile", "user_id": user.id, "profile": profile}
+        self._apply(message)
+        if not self.redis:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(self._PROFILES_KEY, str(user.id), json.dumps(profile))
+            pipe.publish(self._CHANNEL, json.dumps(message))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Mise à jour du profil non propagée: {e}")
+
+    def _apply(self, message: dict) -> None:
+        now = claims_timestamp()
+        if message["type"] == "jti":
+            if message["exp"] > now:
+                self._revoked[message["jti"]] = message["exp"]
+            # Les jti expirés sont purgés à chaque révocation.
+            self._revoked = {
+                jti: exp for jti, exp in self._revoked.items() if exp > now
+            }
+        elif message["type"] == "profile":
+            self._profiles[int(message["user_id"])] = message["profile"]
+
+    async def _sync(self) -> None:
+        """Recharge l'état complet depuis Redis et purge ce qui a expiré."""
+        now = claims_timestamp()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(self._REVOKED_KEY, "-inf", now)
+        pipe.zrange(self._REVOKED_KEY, 0, -1, withscores=True)
+        pipe.hgetall(self._PROFILES_KEY)
+        _, revoked, profiles = await pipe.execute()
+
+        self._revoked = {jti: int(exp) for jti, exp in revoked}
+
+        cutoff = now - self._profile_retention_s()
+        self._profiles = {}
+        stale = []
+        for user_id, raw in profiles.items():
+            profile = json.loads(raw)
+            if profile["updated_at"] < cutoff:
+                stale.append(user_id)
+            else:
+                self._profiles[int(user_id)] = profile
+        if stale:
+            await self.redis.hdel(self._PROFILES_KEY, *stale)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self._CHANNEL)
+                # Abonné : on peut recharger sans perdre de message.
+                await self._sync()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self._apply(json.loads(message["data"]))
+                    except (ValueError, KeyError):
+                        logger.warning("Message de révocation invalide, ignoré")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Abonnement aux révocations interrompu: {e}")
+                await asyncio.sleep(self._RETRY_DELAY_S)
+            finally:
+                await pubsub.close()
+
+
+async def build_revocation_list(
+    redis_client: redis.Redis | None,
+) -> RevocationList | None:
+    """
+    Liste de révocation de l'application, démarrée en mode AUTH_STATELESS.
+
+    Sans Redis, une révocation resterait dans la mémoire du worker qui l'a
+    reçue (et serait perdue au redémarrage) : un token déconnecté resterait
+    accepté ailleurs jusqu'à son expiration. Le mode sans état est alors
+    désactivé (None) et chaque requête repasse par la table des tokens.
+    """
+    if settings.AUTH_STATELESS and redis_client is None:
+        logger.warning(
+            "AUTH_STATELESS ignoré : Redis indisponible, "
+            "les tokens sont vérifiés en base de données"
+        )
+        return None
+
+    revocations = RevocationList(redis_client)
+    if settings.AUTH_STATELESS:
+        await revocations.start()
+    return revocations
+
+
+def get_revocation_list(request: Request) -> RevocationList | None:
+    return getattr(request.app.state, "revocations", None)
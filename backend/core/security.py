@@ -6,6 +6,8 @@ from jose import jwt, JWTError
 from app.schemas.token import Token
 from app.schemas.user import User
 from database.services.token import get_token_owner_info
+from core.auth_cache import AuthCache, get_auth_cache
+from core.revocation import RevocationList, get_revocation_list
 from core.config import settings
 from core.logging import setup_logger
 
@@ -14,10 +16,17 @@ logger = setup_logger(__name__)
 
 
 class JWTService:
-    def __init__(self, connection_manager):
+    def __init__(
+        self,
+        connection_manager,
+        auth_cache: Optional[AuthCache] = None,
+        revocations: Optional[RevocationList] = None,
+    ):
         self.SECRET_KEY = settings.SECRET_KEY
         self.ALGORITHM = settings.ALGORITHM
         self.connection_manager = connection_manager
+        self.auth_cache = auth_cache
+        self.revocations = revocations
 
     def create_access_token(
         self,
@@ -75,11 +84,19 @@ class JWTService:
     async def get_current_user(self, request: Request):
         token = self.get_token_from_request(request)
 
-        self.verify_token(token)
+        payload = self.verify_token(token)
+
+        if settings.AUTH_STATELESS and self.revocations:
+            user = self.get_user_from_claims(payload)
+            if user:
+                return user
 
-        # jti = payload.get("jti")
+        if self.auth_cache:
+            cached_user = await self.auth_cache.get(token)
+            if cached_user:
+                return cached_user
 
-        token_data = get_token_owner_info(self.connection_manager, token)
+        token_data = await get_token_owner_info(self.connection_manager, token)
 
         if not token_data:
             raise HTTPException(
@@ -93,7 +110,7 @@ class JWTService:
                 detail="Utilisateur introuvable",
             )
 
-        return User(
+        user = User(
             id=token_data[0],
             username=token_data[1],
             email=token_data[3],
@@ -101,6 +118,44 @@ class JWTService:
             creation_date=token_data[5],
         )
 
+        if self.auth_cache:
+            await self.auth_cache.set(token, user, float(payload["exp"]))
+
+        return user
+
+    def get_user_from_claims(self, payload: dict) -> Optional[User]:
+        """
+        Mode sans état : l'utilisateur est reconstruit depuis les claims, sans
+        base de données. Renvoie None pour un token émis sans les claims de
+        profil (antérieur au mode), qui repasse par la base.
+        """
+        claims = ("user_id", "sub", "username", "full_name", "creation_date")
+        if any(claim not in payload for claim in claims):
+            return None
+
+        if self.revocations.is_revoked(payload.get("jti")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token révoqué",
+            )
+
+        profile = {
+            "username": payload["username"],
+            "email": payload["sub"],
+            "full_name": payload["full_name"],
+        }
+        updated = self.revocations.profile_since(
+            payload["user_id"], payload.get("iat", 0)
+        )
+        if updated:
+            profile = {key: updated[key] for key in profile}
+
+        return User(
+            id=payload["user_id"],
+            creation_date=payload["creation_date"],
+            **profile,
+        )
+
     def get_token_from_request(self, request: Request) -> str:
         token = request.cookies.get("access_token") or request.cookies.get("auth_token")
 
@@ -153,7 +208,11 @@ class JWTService:
 
 
 def get_token_service(request: Request) -> JWTService:
-    return JWTService(request.app.state.database)
+    return JWTService(
+        request.app.state.database,
+        get_auth_cache(request),
+        get_revocation_list(request),
+    )
 
 
 async def current_user(
@@ -1,4 +1,4 @@
 SELECT column_name
 FROM information_schema.columns
-WHERE table_name = '{}'
+WHERE table_name = %s
 AND table_schema = 'public';
\ No newline at end of file
@@ -1,9 +1,11 @@
 CREATE TABLE IF NOT EXISTS tokens (
     id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
     user_id INT NOT NULL,
-    token VARCHAR(1024) UNIQUE NOT NULL,
+    token_hash BYTEA UNIQUE NOT NULL,
     creation_date TIMESTAMP NOT NULL,
     expiration_date TIMESTAMP NOT NULL,
     scope TEXT,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+CREATE INDEX IF NOT EXISTS tokens_expiration_date_idx ON tokens (expiration_date);
\ No newline at end of file
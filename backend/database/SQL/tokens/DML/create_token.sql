@@ -1,2 +1,2 @@
-INSERT INTO tokens (user_id, token, creation_date, expiration_date, scope)
+INSERT INTO tokens (user_id, token_hash, creation_date, expiration_date, scope)
 VALUES (%s, %s, %s, %s, %s);
\ No newline at end of file
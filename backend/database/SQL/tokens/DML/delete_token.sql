@@ -0,0 +1,2 @@
+DELETE FROM tokens
+WHERE token_hash = %s;
\ No newline at end of file
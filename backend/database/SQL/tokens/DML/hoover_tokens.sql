@@ -1,2 +1,8 @@
 DELETE FROM tokens
-WHERE expiration_date - CURRENT_DATE < INTERVAL '0 months 0 days 0 hours 0 minutes';
\ No newline at end of file
+WHERE id IN (
+    SELECT id
+    FROM tokens
+    WHERE expiration_date < LOCALTIMESTAMP
+    ORDER BY expiration_date
+    LIMIT %s
+);
\ No newline at end of file
@@ -2,4 +2,4 @@ SELECT users.id, users.username, users.password, users.email, users.full_name, u
 FROM tokens
 INNER JOIN users
 ON tokens.user_id = users.id 
-WHERE tokens.token = %s; 
\ No newline at end of file
+WHERE tokens.token_hash = %s; 
\ No newline at end of file
@@ -1,6 +1,8 @@
+from core.config import settings
+
 # POOL
-MIN_CONN = 1
-MAX_CONN = 10
+MIN_CONN = settings.DB_MIN_CONN
+MAX_CONN = settings.DB_MAX_CONN
 
 # PATH
 SQL_PATH = {
@@ -10,6 +12,7 @@ SQL_PATH = {
     "drop_tokens_table": "database/SQL/tokens/DDL/drop_tokens_table.sql",
     "create_token": "database/SQL/tokens/DML/create_token.sql",
     "hoover_tokens": "database/SQL/tokens/DML/hoover_tokens.sql",
+    "delete_token": "database/SQL/tokens/DML/delete_token.sql",
     "get_token_owner_info": "database/SQL/tokens/DQL/get_token_owner_info.sql",
     "create_users_table": "database/SQL/users/DDL/create_users_table.sql",
     "drop_users_table": "database/SQL/users/DDL/drop_users_table.sql",
@@ -1,67 +1,134 @@
-from psycopg2 import errors
-from psycopg2.pool import ThreadedConnectionPool
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from weakref import WeakKeyDictionary
+
+from fastapi import HTTPException, status
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 from database.config import MIN_CONN, MAX_CONN
 from core.config import settings
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
 
 
 class ConnectionManager:
-    _pool = None  # the pool, global to all instances of the class
+    """
+    Pool de connexions asynchrones (psycopg 3) partagé par toute l'application.
+
+    Les requêtes s'exécutent sans bloquer la boucle d'événements : la latence
+    de la base ne sérialise plus les requêtes HTTP sans rapport entre elles.
+    `connection()` emprunte une connexion pour la durée d'un bloc `async with`
+    et la rend au pool en validant la transaction (ou en l'annulant si le bloc
+    lève une exception).
+
+    Santé des connexions : seule une connexion inutilisée depuis plus de
+    DB_CONN_CHECK_IDLE_S est pingée avant d'être prêtée (une connexion qui
+    vient de servir est saine, inutile de doubler l'aller-retour). Une
+    connexion en échec est jetée et le pool en essaie une autre, elle aussi
+    vérifiée. Les connexions sont recyclées après DB_CONN_MAX_LIFETIME_S et
+    fermées après DB_CONN_MAX_IDLE_S d'inactivité au-delà de MIN_CONN.
+    Un pool saturé plus de DB_POOL_TIMEOUT_S répond 503.
+
+    Requêtes préparées : les requêtes fréquentes sont exécutées avec
+    `prepare=manager.prepare`, donc préparées côté serveur dès leur premier
+    passage sur une connexion (psycopg garde le cache par connexion) ; les
+    autres le sont automatiquement après quelques exécutions.
+    DB_PREPARED_STATEMENTS à False les désactive (PgBouncer en mode
+    transaction par exemple).
+    """
 
-    # Initialising the pool if it doesn't already exist
     def __init__(self):
         # Defining the boundaries of the pool
         self.min_conn = MIN_CONN
         self.max_conn = MAX_CONN
-        # If the pool does not already exist, try making one
-        if ConnectionManager._pool is None:
-            try:
-                ConnectionManager._pool = ThreadedConnectionPool(
-                    minconn=self.min_conn,
-                    maxconn=self.max_conn,
-                    dsn=settings.get_db_dsn,
-                )
-            except (
-                errors.ConnectionException
-            ) as error:  # not 100% sure it's the right error
-                print("JE SUIS UNE ERREUR DE ARTHUR", error)
+        # True : préparation immédiate, False : jamais (cf. docstring)
+        self.prepare = settings.DB_PREPARED_STATEMENTS
+        # connexion -> instant (monotonic) de son dernier retour au pool
+        self._released_at: WeakKeyDictionary[AsyncConnection, float] = (
+            WeakKeyDictionary()
+        )
+        self._checks_run = 0
+        self._checks_skipped = 0
+        self._max_wait_ms = 0.0
+        self._pool = AsyncConnectionPool(
+            conninfo=settings.get_db_dsn,
+            min_size=self.min_conn,
+            max_size=self.max_conn,
+            open=False,
+            check=self._check_connection,
+            timeout=settings.DB_POOL_TIMEOUT_S,
+            max_lifetime=settings.DB_CONN_MAX_LIFETIME_S,
+            max_idle=settings.DB_CONN_MAX_IDLE_S,
+            kwargs={"prepare_threshold": 5 if self.prepare else None},
+        )
 
-    # Function borrowing a connection from the pool (tout en vérifiant) and returning it
-    @classmethod
-    def request_conn(cls):
-        if ConnectionManager._pool is None:
-            raise RuntimeError("Error: pool does not exist")
+    # Pinging a connection before lending it, only if it sat idle for a while
+    async def _check_connection(self, conn: AsyncConnection) -> None:
+        released_at = self._released_at.get(conn)
+        if (
+            released_at is not None
+            and not conn.closed
+            and time.monotonic() - released_at < settings.DB_CONN_CHECK_IDLE_S
+        ):
+            self._checks_skipped += 1
+            return
+        self._checks_run += 1
+        await AsyncConnectionPool.check_connection(conn)
 
-        conn = ConnectionManager._pool.getconn()
+    # Opening the pool (at startup), connections are established in the background
+    async def open(self) -> None:
+        await self._pool.open()
 
-        try:
-            # Vérifie si connection est closed
-            if conn.closed != 0:
-                raise Exception("Connection closed")
+    # Closing every connection of the pool (at shutdown)
+    async def close(self) -> None:
+        await self._pool.close()
 
-            # On ping pour voir si elle est vivante
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
-
-        except Exception:
-            #
-            try:
-                ConnectionManager._pool.putconn(conn, close=True)
-            except Exception:
-                pass  # au cas où elle est déjà cassée
-
-            conn = ConnectionManager._pool.getconn()
-
-        return conn
+    # Borrowing a connection from the pool for the duration of the block
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncConnection]:
+        started = time.monotonic()
+        try:
+            conn = await self._pool.getconn()
+        except PoolTimeout:
+            logger.warning(
+                f"Pool de connexions saturé ({self.max_conn} connexions) "
+                f"après {settings.DB_POOL_TIMEOUT_S}s d'attente"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Base de données momentanément saturée",
+            )
+        self._max_wait_ms = max(self._max_wait_ms, (time.monotonic() - started) * 1000)
 
-    # Function returning a borrowed connection to the pool (if it exists)
-    def drop_conn(self, conn) -> None:
-        
+        try:
+            async with conn:
+                yield conn
+        finally:
+            self._released_at[conn] = time.monotonic()
+            await self._pool.putconn(conn)
 
-        if ConnectionManager._pool is not None:
-            # évite de remettre une connexion morte dans le pool
-            if conn.closed == 0:
-                ConnectionManager._pool.putconn(conn)
-            else:
-                ConnectionManager._pool.putconn(conn, close=True)
-        else:
-            print("Error : pool does not exist")
+    # Returning the usage statistics of the pool
+    def stats(self) -> dict:
+        """
+        Taille et disponibilité du pool, attentes (nombre, durée cumulée et
+        maximale) et saturations (`requests_errors` : attentes expirées),
+        ainsi que les pings effectués ou évités.
+        """
+        pool_stats = self._pool.get_stats()
+        return {
+            "min_size": self.min_conn,
+            "max_size": self.max_conn,
+            "pool_size": pool_stats.get("pool_size", 0),
+            "pool_available": pool_stats.get("pool_available", 0),
+            "requests_waiting": pool_stats.get("requests_waiting", 0),
+            "requests_num": pool_stats.get("requests_num", 0),
+            "requests_queued": pool_stats.get("requests_queued", 0),
+            "requests_wait_ms": pool_stats.get("requests_wait_ms", 0),
+            "requests_max_wait_ms": round(self._max_wait_ms, 1),
+            "requests_errors": pool_stats.get("requests_errors", 0),
+            "connections_lost": pool_stats.get("connections_lost", 0),
+            "checks_run": self._checks_run,
+            "checks_skipped": self._checks_skipped,
+        }
@@ -1,70 +1,41 @@
-from database.tools.sql_reader import sql_reader
-from database.config import SQL_PATH
+from database.tools.sql_registry import get_query
 
 
 # Function creating the user table
-def create_users_table(connection_manager):
-    # Requestion a connection from the pool
-    conn = connection_manager.request_conn()
+async def create_users_table(connection_manager):
+    # Getting the query from the registry
+    query = get_query("create_users_table")
 
-    # Storing the query into a variable
-    query = sql_reader(SQL_PATH["create_users_table"])
-
-    # Executing the query on the database
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(query)
-
-    # Dropping the conn
-    connection_manager.drop_conn(conn)
+    # Executing the query on a connection borrowed from the pool
+    async with connection_manager.connection() as conn:
+        await conn.execute(query)
 
 
 # Function removing the user table
-def drop_users_table(connection_manager):
-    # Requestion a connection from the pool
-    conn = connection_manager.request_conn()
-
-    # Storing the query into a variable
-    query = sql_reader(SQL_PATH["drop_users_table"])
-
-    # Executing the query on the database
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(query)
+async def drop_users_table(connection_manager):
+    # Getting the query from the registry
+    query = get_query("drop_users_table")
 
-    # Dropping the conn
-    connection_manager.drop_conn(conn)
+    # Executing the query on a connection borrowed from the pool
+    async with connection_manager.connection() as conn:
+        await conn.execute(query)
 
 
 # Function creating the token table
-def create_tokens_table(connection_manager):
-    # Requestion a connection from the pool
-    conn = connection_manager.request_conn()
+async def create_tokens_table(connection_manager):
+    # Getting the query from the registry
+    query = get_query("create_tokens_table")
 
-    # Storing the query into a variable
-    query = sql_reader(SQL_PATH["create_tokens_table"])
-
-    # Executing the query on the database
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(query)
-
-    # Dropping the conn
-    connection_manager.drop_conn(conn)
+    # Executing the query on a connection borrowed from the pool
+    async with connection_manager.connection() as conn:
+        await conn.execute(query)
 
 
 # Function removing the token table
-def drop_tokens_table(connection_manager):
-    # Requestion a connection from the pool
-    conn = connection_manager.request_conn()
-
-    # Storing the query into a variable
-    query = sql_reader(SQL_PATH["drop_tokens_table"])
-
-    # Executing the query on the database
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(query)
+async def drop_tokens_table(connection_manager):
+    # Getting the query from the registry
+    query = get_query("drop_tokens_table")
 
-    # Dropping the conn
-    connection_manager.drop_conn(conn)
+    # Executing the query on a connection borrowed from the pool
+    async with connection_manager.connection() as conn:
+        await conn.execute(query)
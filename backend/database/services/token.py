@@ -1,61 +1,59 @@
-from database.tools.sql_reader import sql_reader
-from database.config import SQL_PATH
-import psycopg2.errors as errors
+from database.tools.sql_registry import get_query
+import hashlib
+import psycopg.errors as errors
+from core.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# Function returning the stored form of a token (only its SHA-256 is kept in the db)
+def token_digest(token : str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
 
 # Function creating a token
-def create_token(connection_manager, user_id : int, token : str, creation_date : str, expiration_date : str, scope : str):
+async def create_token(connection_manager, user_id : int, token : str, creation_date : str, expiration_date : str, scope : str):
     """
     creation_date / expiration_date : 'yyyy-mm-dd hh:mm:ss'
     """
-    # Requestion a connection from the pool
-    conn = connection_manager.request_conn()
-    parameters = [user_id, token, creation_date, expiration_date, scope]
-
-    # Storing the query into a variable
-    query = sql_reader(SQL_PATH["create_token"])
-
-    # Executing the query on the database
-    with conn:
-        with conn.cursor() as cur:
-            try:
-                cur.execute(query, parameters)
-            except errors.IntegrityError as error:
-                print(error)
-    
-    # Dropping the conn
-    connection_manager.drop_conn(conn)
-
-# Function removing every expired token
-def hoover_tokens(connection_manager):
-    # Requestion a connection from the pool
-    conn = connection_manager.request_conn()
-
-    # Storing the query into a variable
-    query = sql_reader(SQL_PATH["hoover_tokens"])
-
-    # Executing the query on the database
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(query)
-            print(f"DEBUGGING : {cur.rowcount} lines were affected by the hoover")
-    
-    # Dropping the conn
-    connection_manager.drop_conn(conn)
+    parameters = [user_id, token_digest(token), creation_date, expiration_date, scope]
+
+    # Getting the query from the registry
+    query = get_query("create_token")
+
+    # Executing the query on a connection borrowed from the pool
+    async with connection_manager.connection() as conn:
+        try:
+            await conn.execute(query, parameters, prepare=connection_manager.prepare)
+        except errors.IntegrityError:
+            await conn.rollback()
+            # An unstored token would be rejected on first use: the caller must fail
+            logger.exception(f"Impossible d'enregistrer le jeton de l'utilisateur {user_id}")
+            raise
+
+# Function removing at most `batch_size` expired tokens, returning how many were removed
+async def hoover_tokens(connection_manager, batch_size : int) -> int:
+    # Getting the query from the registry
+    query = get_query("hoover_tokens")
+
+    # Executing the query on a connection borrowed from the pool
+    async with connection_manager.connection() as conn:
+        cur = await conn.execute(query, [batch_size])
+        return cur.rowcount
+
+# Function removing a single token (logout)
+async def delete_token(connection_manager, token : str):
+    # Getting the query from the registry
+    query = get_query("delete_token")
+
+    # Executing the query on a connection borrowed from the pool
+    async with connection_manager.connection() as conn:
+        await conn.execute(query, [token_digest(token)], prepare=connection_manager.prepare)
 
 # Function returning all the info of a specific token
-def get_token_owner_info(connection_manager, token : str) -> tuple:
-    # Requestion a connection from the pool
-    conn = connection_manager.request_conn()
-
-    # Storing the query into a variable
-    query = sql_reader(SQL_PATH["get_token_owner_info"])
-
-    # Executing the query on the database
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(query, [token])
-            data = cur.fetchone()
-    
-    # Dropping the conn and returning the data
-    connection_manager.drop_conn(conn)
-    return data
\ No newline at end of file
+async def get_token_owner_info(connection_manager, token : str) -> tuple:
+    # Getting the query from the registry
+    query = get_query("get_token_owner_info")
+
+    # Executing the query on a connection borrowed from the pool
+    async with connection_manager.connection() as conn:
+        cur = await conn.execute(query, [token_digest(token)], prepare=connection_manager.prepare)
+        return await cur.fetchone()
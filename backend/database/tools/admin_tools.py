@@ -1,64 +1,45 @@
-from psycopg2 import errors
-from backend.database.tools.sql_reader import sql_reader
-from backend.database.config import SQL_PATH
+from psycopg import errors
+from database.tools.sql_registry import get_query
 
 # Class for database administration / testing / debugging
 class AdminTools():
     def __init__(self, connection_manager):
         self.connection_manager = connection_manager
 
-    def query_executor(self):
-        # First borrowing a connection from the pool
-        conn = self.connection_manager.request_conn()
-
+    async def query_executor(self):
         # SQL execution menu
         print("You may enter a query you wish to execute on the database (!Q to stop)")
         query = input("> ")
         while query != "!Q":
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute(query)
-                    try:
-                        print(f"output : {cur.fetchall()}")
-                    except errors.ProgrammingError: # it crashes when there's fuck all to fetch (I hope whoever made it this way dies)
-                        pass
+            # Borrowing a connection from the pool for each query (committed at the end of the block)
+            async with self.connection_manager.connection() as conn:
+                try:
+                    cur = await conn.execute(query)
+                except errors.Error as error:
+                    await conn.rollback()
+                    print(f"error : {error}")
+                else:
+                    # Queries without a result set (INSERT, CREATE...) have no description
+                    if cur.description is not None:
+                        print(f"output : {await cur.fetchall()}")
             query = input("> ")
-        
-        # Dropping the conn
-        self.connection_manager.drop_conn(conn)
 
     # function returning all the public tables
-    def get_table_list(self) -> list:
-        # First borrowing a connection from the pool
-        conn = self.connection_manager.request_conn()
-        
+    async def get_table_list(self) -> list:
         # Getting the SQL code to execute
-        query = sql_reader(SQL_PATH["get_table_list"])
+        query = get_query("get_table_list")
 
-        # Executing the query on the database
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute(query)
-                data = cur.fetchall()
-            
-        # Dropping the conn and returning the data
-        self.connection_manager.drop_conn(conn)
-        return data
-    
-    # function returning all the columns of a specified table
-    def get_columns(self, table : str):
-        # First borrowing a connection from the pool
-        conn = self.connection_manager.request_conn()
+        # Executing the query on a connection borrowed from the pool
+        async with self.connection_manager.connection() as conn:
+            cur = await conn.execute(query)
+            return await cur.fetchall()
 
+    # function returning all the columns of a specified table
+    async def get_columns(self, table : str) -> list:
         # Getting the SQL code to execute
-        query = sql_reader(SQL_PATH["get_column_list"]).format('test')
+        query = get_query("get_column_list")
 
-        # Executing the query on the database
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute(query)
-                data = cur.fetchall()
-        
-        # Dropping the conn and returning the data
-        self.connection_manager.drop_conn(conn)
-        return data
\ No newline at end of file
+        # Executing the query on a connection borrowed from the pool
+        async with self.connection_manager.connection() as conn:
+            cur = await conn.execute(query, [table])
+            return await cur.fetchall()
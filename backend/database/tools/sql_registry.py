@@ -0,0 +1,23 @@
+from database.config import SQL_PATH
+from database.tools.sql_reader import sql_reader
+
+
+# name -> SQL text, filled once at startup
+SQL_QUERIES: dict[str, str] = {}
+
+
+def load_sql_registry() -> None:
+    """
+    Read every file of SQL_PATH once (at startup), so that a missing file fails
+    the boot instead of a request and no query touches the disk afterwards.
+    """
+    for name, path in SQL_PATH.items():
+        SQL_QUERIES[name] = sql_reader(path)
+
+
+def get_query(name: str) -> str:
+    """Return the SQL text registered under `name` (read on first use if needed)."""
+    query = SQL_QUERIES.get(name)
+    if query is None:
+        query = SQL_QUERIES[name] = sql_reader(SQL_PATH[name])
+    return query
@@ -11,11 +11,18 @@ from core.config import settings
 from core.minio_client import get_healthy_minio
 from datetime import datetime
 from slowapi.errors import RateLimitExceeded
+from core.auth_cache import AuthCache
+from core.compression import CompressionMiddleware
 from core.limiter import limiter
 from core.logging import setup_logger
+from core.password import password_hasher
+from core.revocation import build_revocation_list
 from database.connection_management import ConnectionManager
 from database.tools.db_utils import test_db_connection
+from database.tools.sql_registry import load_sql_registry
 from app.services.minio.minio_service import MinioService
+from app.services.minio.media_pipeline import MediaPipeline
+from app.services.token_purge_service import TokenPurgeService
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from slowapi.middleware import SlowAPIMiddleware
 
@@ -27,12 +34,16 @@ logger = setup_logger(__name__)
 async def lifespan(app: FastAPI):
     # Injection du client MinIO
     app.state.minio_client = get_healthy_minio()
+    app.state.redis = await get_healthy_redis()
     app.state.minio_service = (
-        MinioService(app.state.minio_client) if app.state.minio_client else None
+        MinioService(app.state.minio_client, app.state.redis)
+        if app.state.minio_client
+        else None
     )
-    app.state.redis = await get_healthy_redis()
     
     app.state.limiter = limiter
+    app.state.auth_cache = AuthCache(app.state.redis)
+    app.state.revocations = await build_revocation_list(app.state.redis)
 
     sse_manager = SSEManager(app.state.redis)
 
@@ -44,23 +55,56 @@ async def lifespan(app: FastAPI):
 
     app.state.sse_manager = sse_manager or None
 
+    app.state.media_pipeline = (
+        MediaPipeline(
+            app.state.minio_service.object_service,
+            sse_manager,
+            app.state.minio_service.thumbnail_service,
+        )
+        if app.state.minio_service
+        else None
+    )
+    if app.state.media_pipeline:
+        await app.state.media_pipeline.start()
+    if app.state.minio_service:
+        await app.state.minio_service.folder_stats.start()
+
+    load_sql_registry()
     app.state.database = ConnectionManager()
-    if not test_db_connection(app.state.database):
+    await app.state.database.open()
+    if not await test_db_connection(app.state.database):
         logger.critical(
             "Échec de la connexion à la base de données. Arrêt de l'application."
         )
         raise RuntimeError("Impossible de se connecter à la base de données.")
 
+    app.state.token_purge = TokenPurgeService(app.state.database, app.state.redis)
+    await app.state.token_purge.start()
+
     yield
 
+    await app.state.token_purge.shutdown()
+    app.state.token_purge = None
+    await app.state.database.close()
     app.state.database = None
+    if app.state.media_pipeline:
+        await app.state.media_pipeline.shutdown()
+        app.state.media_pipeline = None
+    if app.state.minio_service:
+        await app.state.minio_service.folder_stats.shutdown()
     if app.state.redis:
         await sse_manager.shutdown()
+    if app.state.revocations:
+        await app.state.revocations.shutdown()
+
+    password_hasher.shutdown()
 
     app.state.minio_client = None
     app.state.minio_service = None
     app.state.redis = None
     app.state.limiter = None
+    app.state.auth_cache = None
+    app.state.revocations = None
 
 
 # Instanciation de l'app FastAPI
@@ -85,6 +129,10 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
     allow_headers=["*"],
 )
+if settings.HTTP_COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=settings.HTTP_COMPRESSION_MIN_BYTES
+    )
 app.add_middleware(SlowAPIMiddleware)
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="10.0.0.2")
 
@@ -123,6 +171,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
             "timestamp": datetime.now().isoformat(),
             "status_code": exc.status_code,
         },
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -185,3 +234,13 @@ async def generic_exception_handler(request: Request, exc: Exception):
 def read_root():
     return {"message": "Bienvenue sur l'API OneDrive Alternative !"}
 
+
+# Exposée seulement en mode debug, comme /docs : ces métriques renseignent sur
+# la charge du serveur. En production, les saturations du pool sont journalisées.
+if settings.DEBUG:
+
+    @app.get("/health/database")
+    async def database_health(request: Request):
+        """Statistiques du pool de connexions (attentes, saturations, pings)."""
+        return {"database": request.app.state.database.stats()}
+
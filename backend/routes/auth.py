@@ -61,7 +61,8 @@ async def logout_user_endpoint(
     user: User = Depends(current_user),
     auth_service: AuthService = Depends(get_auth_service),
 ):
-    await auth_service.logout_user(user)
+    token = auth_service.jwt_service.get_token_from_request(request)
+    await auth_service.logout_user(user, token)
     return BaseResponse(
         success=True, data=None, message="Logout successful", status_code=200
     )
@@ -69,15 +70,15 @@ async def logout_user_endpoint(
 
 @router.post("/init-db")
 async def init_db(request: Request):
-    create_users_table(request.app.state.database)
-    create_tokens_table(request.app.state.database)
+    await create_users_table(request.app.state.database)
+    await create_tokens_table(request.app.state.database)
 
     return {"message": "Database initialized"}
 
 
 @router.post("/drop-db")
 async def drop_db(request: Request):
-    drop_tokens_table(request.app.state.database)
-    drop_users_table(request.app.state.database)
+    await drop_tokens_table(request.app.state.database)
+    await drop_users_table(request.app.state.database)
 
     return {"message": "Database dropped"}
@@ -9,16 +9,26 @@ from fastapi import (
 )
 from fastapi.responses import StreamingResponse
 from app.services.minio.minio_service import MinioService, get_minio_service
-from app.schemas.file_tree import SimpleFileTreeResponse
+from app.services.minio.media_pipeline import MediaPipeline, get_media_pipeline
+from app.schemas.file_tree import FullFileTreeResponse, SimpleFileTreeResponse
 from app.schemas.files import (
+    ArchiveFormat,
+    BulkStatsResponse,
+    ChangesResponse,
     CompressItems,
     CreateFolder,
+    DownloadItems,
+    FolderUsageResponse,
     RenameItem,
+    StatsItems,
     MoveItem,
     CopyItem,
+    ThumbnailBatch,
+    TreeHashResponse,
 )
 from datetime import datetime
-from app.utils.response import BaseResponse
+from app.utils.response import BaseResponse, ListingResponse, etag_matches
+from app.utils.minio_utils import MinioUtils
 from app.services.sse_service import SSEManager, get_sse_manager
 from app.schemas.sse import SSEMessage
 from app.schemas.user import User
@@ -54,7 +64,8 @@ async def sse_endpoint(
 
 @router.get(
     "/full-tree",
-    response_model=BaseResponse,
+    response_model=BaseResponse[FullFileTreeResponse],
+    response_class=ListingResponse,
     status_code=status.HTTP_200_OK,
     summary="Liste complète de l'arborescence avec métadonnées",
     response_description="Retourne les fichiers/dossiers avec hashs, tailles et timestamps.",
@@ -67,15 +78,34 @@ async def full_tree_endpoint(
     recursive: bool = Query(
         False, description="Inclure les sous-dossiers récursivement"
     ),
+    stream: bool = Query(
+        False,
+        description="Réponse NDJSON émise au fil du listing (ordre non trié)",
+    ),
     minio_service: MinioService = Depends(get_minio_service),
 ):
-    metadata = await minio_service.full_list_path(
+    if stream:
+        records = await minio_service.stream_full_list_path(
+            path=path, user_id=user.id, recursive=recursive
+        )
+        return StreamingResponse(records, media_type="application/x-ndjson")
+
+    accept = request.headers.get("accept")
+    etag = await minio_service.listing_etag(
+        user.id, path, "full-tree", recursive, ListingResponse.negotiate(accept)
+    )
+    if etag and etag_matches(request.headers.get("if-none-match"), etag):
+        return ListingResponse.not_modified(etag)
+
+    metadata = await minio_service.full_list_payload(
         path=path, user_id=user.id, recursive=recursive
     )
-    return BaseResponse(
+    return ListingResponse.envelope(
         data=metadata,
         message="Arborescence récupérée",
         status_code=status.HTTP_200_OK,
+        accept=accept,
+        etag=etag,
     )
 
 
@@ -90,6 +120,7 @@ async def upload_file_endpoint(
     user: User = Depends(current_user),
     path: str = "",
     sse_manager: SSEManager = Depends(get_sse_manager),
+    media_pipeline: MediaPipeline | None = Depends(get_media_pipeline),
 ) -> BaseResponse:
     """
     Upload un fichier dans le bucket utilisateur.
@@ -109,6 +140,10 @@ async def upload_file_endpoint(
         user.id, file, path
     )
 
+    # Métadonnées, empreinte... calculées en arrière-plan (événement SSE media_ready)
+    if media_pipeline:
+        media_pipeline.enqueue(user.id, file_upload_metadata["name"])
+
     sse_message = SSEMessage(
         event="upload",
         user_id=user.id,
@@ -127,7 +162,8 @@ async def upload_file_endpoint(
 
 @router.get(
     "/tree",
-    response_model=BaseResponse,
+    response_model=BaseResponse[SimpleFileTreeResponse],
+    response_class=ListingResponse,
 )
 @limiter.limit("30/minute")
 async def list_path(
@@ -137,24 +173,35 @@ async def list_path(
     page: int = Query(default=1, description="Numéro de page"),
     per_page: int = Query(default=30, description="Nombre d'items par page"),
     minio_service: MinioService = Depends(get_minio_service),
-) -> BaseResponse:
+) -> ListingResponse:
     """
     Liste le contenu d'un chemin dans le bucket utilisateur.
     Args:
         path: Chemin relatif (ex: "dossier1/sous-dossier/"). Par défaut, liste la racine.
     Returns:
         TreeResponse: Arborescence du chemin.
+
+    Porte un ETag dérivé de l'empreinte du dossier : avec `If-None-Match`, un
+    dossier inchangé répond 304 sans interroger MinIO.
     """
+    accept = request.headers.get("accept")
+    etag = await minio_service.listing_etag(
+        user.id, path, "tree", page, per_page, ListingResponse.negotiate(accept)
+    )
+    if etag and etag_matches(request.headers.get("if-none-match"), etag):
+        return ListingResponse.not_modified(etag)
 
-    tree: SimpleFileTreeResponse = await minio_service.simple_list_path(
+    tree = await minio_service.simple_list_page(
         user_id=user.id, path=path, per_page=per_page, page=page
     )
 
-    return BaseResponse(
-        success=True if tree.items else False,
+    return ListingResponse.envelope(
+        success=True if tree["items"] else False,
         data=tree,
         status_code=status.HTTP_200_OK,
         message="Tree loaded",
+        accept=accept,
+        etag=etag,
     )
 
 
@@ -167,6 +214,9 @@ async def download_file_endpoint(
     request: Request,
     object_name: str,
     user: User = Depends(current_user),
+    archive_format: ArchiveFormat = Query(
+        "zip", alias="format", description="Format d'archive pour les dossiers"
+    ),
     minio_service: MinioService = Depends(get_minio_service),
 ) -> StreamingResponse:
     """
@@ -176,8 +226,46 @@ async def download_file_endpoint(
          **object_name** (str ): Nom du fichier à télécharger
          **user_id** : ID de l'utilisateur (injecté par l'auth)
 
+    Les en-têtes `Range` / `If-Range` sont supportés (fichiers et dossiers ZIP).
     """
-    return await minio_service.download_service.download_object(user.id, object_name)
+    return await minio_service.download_service.download_object(
+        user.id,
+        object_name,
+        range_header=request.headers.get("range"),
+        if_range=request.headers.get("if-range"),
+        archive_format=archive_format,
+    )
+
+
+@router.post("/download", response_class=StreamingResponse)
+@limiter.limit("15/minute")
+async def download_selection_endpoint(
+    request: Request,
+    payload: DownloadItems,
+    user: User = Depends(current_user),
+    minio_service: MinioService = Depends(get_minio_service),
+) -> StreamingResponse:
+    """
+    Télécharge plusieurs fichiers / dossiers dans une seule archive
+    (zip, tar ou tar.zst).
+
+    Contrairement à `/storage/compress`, l'archive n'est pas enregistrée dans le
+    bucket : elle est construite et streamée directement au client.
+
+    **Args:**
+        - **payload (DownloadItems):** Objet contenant:
+            - `objects (list[str])`: Chemins à inclure (dossiers terminés par "/").
+            - `archive_name (str)`: Nom de l'archive (sans extension).
+            - `format (str)`: "zip" (défaut), "tar" ou "tar.zst".
+    """
+    return await minio_service.download_service.download_objects(
+        user.id,
+        payload.objects,
+        archive_name=payload.archive_name,
+        range_header=request.headers.get("range"),
+        if_range=request.headers.get("if-range"),
+        archive_format=payload.format,
+    )
 
 
 @router.get("/preview/{object_name:path}", response_class=StreamingResponse)
@@ -191,6 +279,68 @@ async def preview_file_endpoint(
     return await minio_service.download_service.preview_object(user.id, object_name)
 
 
+@router.get("/thumbnail/{object_name:path}")
+@limiter.limit("300/minute")
+async def thumbnail_endpoint(
+    request: Request,
+    object_name: str,
+    size: int = Query(default=256, description="Côté le plus long (128, 256, 512)"),
+    v: str | None = Query(
+        default=None, description="Etag de la source : rend la réponse immuable"
+    ),
+    user: User = Depends(current_user),
+    minio_service: MinioService = Depends(get_minio_service),
+):
+    """
+    Miniature WebP (ou JPEG si le client ne l'accepte pas) d'une image,
+    orientée selon l'EXIF. Évite de charger l'original dans la grille.
+    """
+    return await minio_service.thumbnail_service.get_thumbnail(
+        user.id,
+        object_name,
+        size=size,
+        accept=request.headers.get("accept"),
+        if_none_match=request.headers.get("if-none-match"),
+        version=v,
+    )
+
+
+@router.post("/thumbnails")
+@limiter.limit("60/minute")
+async def thumbnails_batch_endpoint(
+    request: Request,
+    payload: ThumbnailBatch,
+    user: User = Depends(current_user),
+    minio_service: MinioService = Depends(get_minio_service),
+):
+    """
+    Toutes les miniatures d'une grille en une requête (`multipart/mixed`).
+
+    Soit `paths` explicites, soit `folder` + `page`/`per_page` : les images de
+    la page correspondante de `/storage/tree` sont alors renvoyées.
+    """
+    paths = payload.paths
+    if payload.folder is not None:
+        listing = await minio_service.simple_list_page(
+            path=payload.folder,
+            user_id=user.id,
+            page=payload.page,
+            per_page=payload.per_page,
+        )
+        folder = listing["path"].strip("/")
+        names = [item["name"] for item in listing["items"] if not item["is_dir"]]
+        paths = [
+            f"{folder}/{name}" if folder else name
+            for name in names
+            if name
+            and MinioUtils.get_file_type(name, MinioUtils.detect_mime(name)) == "image"
+        ]
+
+    return await minio_service.thumbnail_service.get_thumbnails_batch(
+        user.id, paths, size=payload.size, accept=request.headers.get("accept")
+    )
+
+
 @router.post(
     "/folder",
     response_model=BaseResponse[str],
@@ -300,6 +450,106 @@ async def stats_endpoint(
     )
 
 
+@router.post(
+    "/stats",
+    response_model=BaseResponse[BulkStatsResponse],
+    status_code=status.HTTP_200_OK,
+)
+@limiter.limit("45/minute")
+async def bulk_stats_endpoint(
+    request: Request,
+    payload: StatsItems,
+    user: User = Depends(current_user),
+    minio_service: MinioService = Depends(get_minio_service),
+) -> BaseResponse[BulkStatsResponse]:
+    """
+    Métadonnées d'une multi-sélection en un seul appel.
+    Les chemins en échec (introuvables...) sont listés dans `errors`.
+    """
+    items, errors = await minio_service.object_service.get_objects_metadata(
+        user.id, payload.paths
+    )
+    return BaseResponse(
+        message="Metadatas des fichiers récupérées",
+        data=BulkStatsResponse(items=items, errors=errors),
+        success=True,
+        status_code=200,
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=BaseResponse[ChangesResponse],
+    status_code=status.HTTP_200_OK,
+)
+@limiter.limit("60/minute")
+async def changes_endpoint(
+    request: Request,
+    since: str | None = Query(
+        default=None, description="Curseur renvoyé par l'appel précédent"
+    ),
+    limit: int = Query(default=500, gt=0, le=1000),
+    user: User = Depends(current_user),
+    minio_service: MinioService = Depends(get_minio_service),
+) -> BaseResponse[ChangesResponse]:
+    """
+    Modifications (create/update/delete/move) depuis `since`, pour la
+    synchronisation différentielle. Sans curseur, renvoie seulement le curseur
+    courant ; avec `reset`, le client doit refaire un `/storage/full-tree`.
+    """
+    bucket_name = await minio_service.bucket_service.get_user_bucket(user.id)
+    data = await minio_service.change_feed.read(bucket_name, since, limit)
+    return BaseResponse(
+        message="Modifications récupérées",
+        data=ChangesResponse(**data),
+        status_code=200,
+    )
+
+
+@router.get(
+    "/folder-usage",
+    response_model=BaseResponse[FolderUsageResponse],
+    status_code=status.HTTP_200_OK,
+)
+@limiter.limit("45/minute")
+async def folder_usage_endpoint(
+    request: Request,
+    path: str = Query(default="/", description="Chemin du dossier"),
+    user: User = Depends(current_user),
+    minio_service: MinioService = Depends(get_minio_service),
+) -> BaseResponse[FolderUsageResponse]:
+    """Taille récursive d'un dossier et de ses sous-dossiers directs."""
+    data = await minio_service.object_service.get_folder_usage(user.id, path)
+    return BaseResponse(
+        message="Utilisation du dossier récupérée", data=data, status_code=200
+    )
+
+
+@router.get(
+    "/tree-hash",
+    response_model=BaseResponse[TreeHashResponse],
+    status_code=status.HTTP_200_OK,
+)
+@limiter.limit("120/minute")
+async def tree_hash_endpoint(
+    request: Request,
+    path: str = Query(default="/", description="Chemin du dossier"),
+    user: User = Depends(current_user),
+    minio_service: MinioService = Depends(get_minio_service),
+) -> BaseResponse[TreeHashResponse]:
+    """
+    Empreinte d'un dossier et de ses sous-dossiers directs.
+
+    `tree_hash` = somme, par blocs de 32 bits (modulo 2^32), des 16 premiers
+    octets de sha256("{nom d'objet}\\0{etag}") pour chaque objet du sous-arbre
+    (nom complet sans "/" initial, marqueurs de dossier compris) :
+    deux dossiers de même empreinte ont le même contenu, le client ne descend
+    que dans les sous-dossiers dont l'empreinte a changé.
+    """
+    data = await minio_service.object_service.get_tree_hashes(user.id, path)
+    return BaseResponse(message="Empreintes récupérées", data=data, status_code=200)
+
+
 @router.patch(
     "/rename",
     response_model=BaseResponse,
@@ -391,11 +641,14 @@ async def copy_endpoint(
     payload: CopyItem,
     minio_service: MinioService = Depends(get_minio_service),
     sse_manager: SSEManager = Depends(get_sse_manager),
+    media_pipeline: MediaPipeline | None = Depends(get_media_pipeline),
     user: User = Depends(current_user),
 ):
     message, data = await minio_service.object_service.copy(
         user.id, payload.source_path, payload.destination_folder
     )
+    if media_pipeline:
+        media_pipeline.enqueue(user.id, data["destination_path"])
     # TODO : Rajouter le nom du dossier (pas assez d'info)
 
     sse_message = SSEMessage(
@@ -419,6 +672,7 @@ async def compress_files_endpoint(
     request: Request,
     payload: CompressItems,
     minio_service: MinioService = Depends(get_minio_service),
+    media_pipeline: MediaPipeline | None = Depends(get_media_pipeline),
     user: User = Depends(current_user),
 ) -> BaseResponse:
     """
@@ -435,6 +689,8 @@ async def compress_files_endpoint(
     message, metadata = await minio_service.object_service.compress_objects(
         user.id, payload.objects, payload.destination_folder
     )
+    if media_pipeline:
+        media_pipeline.enqueue(user.id, metadata["output_object_name"])
     return BaseResponse(
         data=metadata, message=message, status_code=status.HTTP_201_CREATED
     )
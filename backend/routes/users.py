@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, Request, UploadFile, status
 from fastapi.responses import Response
 
-from app.schemas.user import PasswordUpdate, User, UserUpdate
+from app.schemas.user import PasswordUpdate, StorageUsage, User, UserUpdate
+from app.services.minio.minio_service import MinioService, get_minio_service
 from app.services.profile_picture_service import (
     ProfilePictureService,
     get_profile_picture_service,
@@ -50,6 +51,27 @@ async def update_current_user_password_endpoint(
     )
 
 
+@router.get(
+    "/me/usage",
+    response_model=BaseResponse[StorageUsage],
+    status_code=status.HTTP_200_OK,
+)
+@limiter.limit("60/minute")
+async def get_my_storage_usage_endpoint(
+    request: Request,
+    user: User = Depends(current_user),
+    minio_service: MinioService = Depends(get_minio_service),
+) -> BaseResponse[StorageUsage]:
+    bucket_name = await minio_service.bucket_service.get_user_bucket(user.id)
+    usage = await minio_service.quota.get_usage(bucket_name)
+    return BaseResponse(
+        success=True,
+        data=StorageUsage(**usage),
+        message="Espace de stockage utilisé",
+        status_code=status.HTTP_200_OK,
+    )
+
+
 @router.get("/me/profile-picture")
 @limiter.limit("60/minute")
 async def get_my_profile_picture_endpoint(
@@ -56,6 +56,17 @@ class FakeBucketService:
         return f"user-{user_id}"
 
 
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
 def future_datetime() -> datetime:
     return datetime.now() + timedelta(days=1)
 
@@ -0,0 +1,40 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from database.tools.admin_tools import AdminTools
+
+
+class FakeCursor:
+    async def fetchall(self):
+        return [("id",), ("email",)]
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    async def execute(self, query, parameters=None):
+        self.executed.append((query, parameters))
+        return FakeCursor()
+
+
+class FakeConnectionManager:
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    @asynccontextmanager
+    async def connection(self):
+        yield self.conn
+
+
+@pytest.mark.anyio
+async def test_get_columns_runs_on_a_pooled_connection_with_the_table_as_parameter():
+    manager = FakeConnectionManager()
+
+    columns = await AdminTools(manager).get_columns("users")
+
+    assert columns == [("id",), ("email",)]
+    ((query, parameters),) = manager.conn.executed
+    assert "information_schema.columns" in query
+    assert parameters == ["users"]
@@ -0,0 +1,140 @@
+import io
+import tarfile
+import zipfile
+from datetime import datetime
+
+import pytest
+
+import zstandard
+
+from app.utils.archive_utils import (
+    ArchiveEntry,
+    StoreZipLayout,
+    TarLayout,
+    zstd_compress_stream,
+)
+
+
+CONTENTS = {
+    "docs/a.txt": b"hello world",
+    "docs/empty.bin": b"",
+    "docs/sub/é.md": b"x" * 5000,
+}
+
+
+def make_entries() -> list[ArchiveEntry]:
+    return [
+        ArchiveEntry(
+            arcname=name.removeprefix("docs/"),
+            object_name=name,
+            size=len(data),
+            last_modified=datetime(2026, 1, 2, 3, 4, 5),
+            etag=f"etag-{name}",
+        )
+        for name, data in CONTENTS.items()
+    ]
+
+
+def make_layout() -> StoreZipLayout:
+    return StoreZipLayout(make_entries())
+
+
+def make_reader(reads: list | None = None):
+    def read_range(entry: ArchiveEntry, offset: int, length: int):
+        if reads is not None:
+            reads.append((entry.object_name, offset, length))
+        data = CONTENTS[entry.object_name][offset : offset + length]
+        for i in range(0, len(data), 1024):
+            yield data[i : i + 1024]
+
+    return read_range
+
+
+def render(layout: StoreZipLayout, start: int, end: int, crcs=None) -> bytes:
+    crcs = {} if crcs is None else crcs
+    return b"".join(layout.iter_range(start, end, make_reader(), crcs))
+
+
+def test_store_zip_layout_size_is_exact_and_archive_is_valid():
+    layout = make_layout()
+
+    archive = render(layout, 0, layout.total_size - 1)
+
+    assert len(archive) == layout.total_size
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["a.txt", "empty.bin", "sub/é.md"]
+        assert zf.read("sub/é.md") == CONTENTS["docs/sub/é.md"]
+        assert zf.getinfo("a.txt").compress_type == zipfile.ZIP_STORED
+
+
+@pytest.mark.parametrize(
+    "start,end",
+    [(0, 10), (40, 4000), (70, 120), (3000, 10**9), (5100, 5200)],
+)
+def test_store_zip_layout_ranges_match_full_archive(start: int, end: int):
+    layout = make_layout()
+    full = render(layout, 0, layout.total_size - 1)
+    end = min(end, layout.total_size - 1)
+
+    assert render(layout, start, end) == full[start : end + 1]
+
+
+def test_store_zip_layout_reuses_known_crcs_for_central_directory():
+    layout = make_layout()
+    crcs: dict[int, int] = {}
+    render(layout, 0, layout.total_size - 1, crcs)
+
+    reads: list = []
+    tail = b"".join(
+        layout.iter_range(
+            layout.central_directory_offset,
+            layout.total_size - 1,
+            make_reader(reads),
+            dict(crcs),
+        )
+    )
+
+    assert reads == []
+    assert len(tail) == layout.total_size - layout.central_directory_offset
+
+
+def test_store_zip_layout_etag_changes_with_listing():
+    layout = make_layout()
+    other = StoreZipLayout(layout.entries[:-1])
+
+    assert layout.etag == make_layout().etag
+    assert layout.etag != other.etag
+
+
+def test_tar_layout_size_is_exact_and_ranges_match():
+    layout = TarLayout(make_entries())
+
+    archive = b"".join(layout.iter_range(0, layout.total_size - 1, make_reader()))
+
+    assert len(archive) == layout.total_size
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tf:
+        assert tf.getnames() == ["a.txt", "empty.bin", "sub/é.md"]
+        assert tf.extractfile("a.txt").read() == b"hello world"
+
+    part = b"".join(layout.iter_range(500, 2000, make_reader()))
+    assert part == archive[500:2001]
+
+
+def test_zstd_compress_stream_roundtrips_tar_archive():
+    layout = TarLayout(make_entries())
+    archive = b"".join(layout.iter_range(0, layout.total_size - 1, make_reader()))
+
+    compressed = b"".join(zstd_compress_stream(iter([archive[:100], archive[100:]])))
+
+    reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(compressed))
+    assert reader.read() == archive
+
+
+def test_tar_layout_stream_matches_sized_layout():
+    layout = TarLayout(make_entries())
+    archive = b"".join(layout.iter_range(0, layout.total_size - 1, make_reader()))
+
+    streamed = b"".join(TarLayout.stream(iter(make_entries()), make_reader()))
+
+    assert streamed == archive
@@ -0,0 +1,83 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.minio.change_feed import ChangeFeed
+
+
+class FakeStreamRedis:
+    """Stream Redis minimal : IDs "{ms}-{seq}" sur une horloge contrôlée."""
+
+    def __init__(self, now_ms: int):
+        self.now_ms = now_ms
+        self.entries: list[tuple[str, dict]] = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def xadd(self, key, fields, minid=None, approximate=True):
+        entry_id = f"{self.now_ms}-{len(self.entries)}"
+        self.entries.append((entry_id, {k: str(v) for k, v in fields.items()}))
+        self.entries = [e for e in self.entries if int(e[0].split("-")[0]) >= minid]
+
+    def pexpire(self, key, ms):
+        pass
+
+    async def execute(self):
+        return []
+
+    async def time(self):
+        return self.now_ms // 1000, (self.now_ms % 1000) * 1000
+
+    async def xrevrange(self, key, count=None):
+        return list(reversed(self.entries))[:count]
+
+    async def xrange(self, key, min, count=None):
+        since = tuple(int(part) for part in min.lstrip("(").split("-"))
+        newer = [e for e in self.entries if tuple(map(int, e[0].split("-"))) > since]
+        return newer[:count]
+
+
+@pytest.mark.anyio
+async def test_read_returns_changes_after_cursor_in_pages(mocker):
+    redis = FakeStreamRedis(now_ms=1_700_000_000_000)
+    mocker.patch("app.services.minio.change_feed.time.time", return_value=1.7e9)
+    feed = ChangeFeed(redis)
+
+    start = await feed.read("user-1", None)
+    await feed.record("user-1", "create", "docs/a.txt", size=3)
+    await feed.record("user-1", "move", "docs/", destination="archives/docs/")
+    await feed.record("user-1", "delete", "b.txt")
+
+    first = await feed.read("user-1", start["cursor"], limit=2)
+    second = await feed.read("user-1", first["cursor"], limit=2)
+
+    assert start["changes"] == [] and start["reset"] is False
+    assert [c["op"] for c in first["changes"]] == ["create", "move"]
+    assert first["changes"][0]["size"] == 3
+    assert first["changes"][1]["destination"] == "/archives/docs/"
+    assert first["changes"][1]["is_dir"] is True
+    assert first["has_more"] is True
+    assert [c["path"] for c in second["changes"]] == ["/b.txt"]
+    assert second["has_more"] is False
+
+
+@pytest.mark.anyio
+async def test_read_requests_full_resync_for_cursors_older_than_retention():
+    redis = FakeStreamRedis(now_ms=1_700_000_000_000)
+    feed = ChangeFeed(redis)
+
+    result = await feed.read("user-1", "1000-0")
+
+    assert result["reset"] is True
+    assert result["cursor"] == "1699999999999-0"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("cursor", ["123-abc", "123-", "abc", "-1", "1-2-3", "123\n"])
+async def test_read_rejects_malformed_cursors(cursor):
+    feed = ChangeFeed(FakeStreamRedis(now_ms=1_700_000_000_000))
+
+    with pytest.raises(HTTPException) as exc:
+        await feed.read("user-1", cursor)
+
+    assert exc.value.status_code == 400
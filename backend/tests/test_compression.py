@@ -0,0 +1,112 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from app.utils.response import ListingResponse
+from core.compression import CompressionMiddleware, negotiate_encoding
+
+PAYLOAD = {"items": [{"name": f"file-{i}.txt", "size": i} for i in range(200)]}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/json")
+    async def json_route():
+        return JSONResponse(PAYLOAD, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small_route():
+        return JSONResponse({"ok": True})
+
+    @app.get("/ndjson")
+    async def ndjson_route():
+        async def lines():
+            for i in range(3):
+                yield f'{{"i": {i}}}\n'.encode()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/download")
+    async def download_route():
+        return Response(
+            b"x" * 5000,
+            media_type="text/plain",
+            headers={"Accept-Ranges": "bytes"},
+        )
+
+    @app.get("/archive")
+    async def archive_route():
+        return Response(b"x" * 5000, media_type="application/zip")
+
+    return app
+
+
+async def get(path: str, accept_encoding: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        return await c.get(path, headers={"Accept-Encoding": accept_encoding})
+
+
+def test_negotiate_encoding_honours_quality_values():
+    assert negotiate_encoding("gzip, zstd") == "zstd"
+    assert negotiate_encoding("zstd;q=0.5, gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("*") == "zstd"
+    assert negotiate_encoding(None) is None
+
+
+@pytest.mark.anyio
+async def test_json_is_compressed_above_threshold_only():
+    response = await get("/json", "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(str(PAYLOAD))
+    assert response.json() == PAYLOAD
+
+    small = await get("/small", "gzip")
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"ok": True}
+
+
+@pytest.mark.anyio
+async def test_streaming_response_is_compressed_chunk_by_chunk():
+    response = await get("/ndjson", "zstd")
+
+    assert response.headers["content-encoding"] == "zstd"
+    assert "content-length" not in response.headers
+    assert response.content == b'{"i": 0}\n{"i": 1}\n{"i": 2}\n'
+
+
+@pytest.mark.anyio
+async def test_ranged_and_already_compressed_responses_are_left_alone():
+    for path in ("/download", "/archive"):
+        response = await get(path, "gzip, zstd")
+        assert "content-encoding" not in response.headers
+        assert response.content == b"x" * 5000
+
+
+def test_listing_response_encodes_messagepack_when_accepted():
+    msgpack = pytest.importorskip("msgpack")
+
+    response = ListingResponse.envelope(
+        data={"items": []}, message="ok", accept="application/msgpack"
+    )
+
+    assert response.media_type == "application/msgpack"
+    content = msgpack.unpackb(response.body)
+    assert content["data"] == {"items": []}
+    assert isinstance(content["timestamp"], str)
+
+
+def test_listing_response_defaults_to_json():
+    response = ListingResponse.envelope(
+        data={"items": []}, message="ok", accept="text/html,*/*"
+    )
+
+    assert response.media_type == "application/json"
+    assert response.headers["vary"] == "Accept"
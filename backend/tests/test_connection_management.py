@@ -0,0 +1,29 @@
+import time
+
+import pytest
+
+from database.connection_management import ConnectionManager
+
+
+class FakeConnection:
+    closed = False
+
+
+@pytest.mark.anyio
+async def test_only_connections_idle_past_threshold_are_pinged(mocker):
+    ping = mocker.patch(
+        "database.connection_management.AsyncConnectionPool.check_connection"
+    )
+    manager = ConnectionManager()
+    fresh, idle, new = FakeConnection(), FakeConnection(), FakeConnection()
+    manager._released_at[fresh] = time.monotonic()
+    manager._released_at[idle] = time.monotonic() - 3600
+
+    await manager._check_connection(fresh)
+    await manager._check_connection(idle)
+    await manager._check_connection(new)
+
+    assert [call.args[0] for call in ping.call_args_list] == [idle, new]
+    stats = manager.stats()
+    assert (stats["checks_run"], stats["checks_skipped"]) == (2, 1)
+    assert stats["max_size"] == manager.max_conn
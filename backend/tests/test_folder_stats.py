@@ -0,0 +1,322 @@
+import fnmatch
+
+import pytest
+
+from app.services.minio.folder_stats import FolderStatsService
+from app.services.minio.minio_service import MinioService
+from app.utils.response import etag_matches
+
+from conftest import FakeObject
+
+
+class FakeHashRedis:
+    """Sous-ensemble de redis.asyncio utilisé par FolderStatsService."""
+
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.streams: dict[str, list[tuple[str, dict]]] = {}
+        # Appelé au début de chaque transaction (simulation de concurrence)
+        self.on_transaction = None
+
+    async def exists(self, key):
+        return int(key in self.strings or key in self.hashes)
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+            self.hashes.pop(key, None)
+            self.streams.pop(key, None)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def scan_iter(self, match, count=None):
+        for key in list(self.hashes):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def transaction(self, func, *watches):
+        if self.on_transaction:
+            await self.on_transaction()
+        pipe = FakePipeline(self, immediate=True)
+        await func(pipe)
+        return await pipe.execute()
+
+
+class FakePipeline:
+    def __init__(self, redis, immediate=False):
+        self.redis = redis
+        self.ops = []
+        # Avant multi(), les commandes d'une transaction s'exécutent tout de suite
+        self.immediate = immediate
+
+    def multi(self):
+        self.immediate = False
+
+    def hincrby(self, key, field, value):
+        self.ops.append(("hincrby", key, field, value))
+
+    def hset(self, key, mapping):
+        self.ops.append(("hset", key, mapping))
+
+    def hgetall(self, key):
+        self.ops.append(("hgetall", key))
+
+    def exists(self, key):
+        if self.immediate:
+            return self.redis.exists(key)
+        self.ops.append(("exists", key))
+
+    def get(self, key):
+        if self.immediate:
+            return self.redis.get(key)
+        self.ops.append(("get", key))
+
+    async def xrange(self, key):
+        return list(self.redis.streams.get(key, []))
+
+    def xadd(self, key, fields):
+        self.ops.append(("xadd", key, fields))
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, *keys):
+        self.ops.append(("delete", keys))
+
+    def set(self, key, value):
+        self.ops.append(("set", key, value))
+
+    def incr(self, key):
+        self.ops.append(("incr", key))
+
+    async def execute(self):
+        results = []
+        for op, *args in self.ops:
+            if op == "hincrby":
+                key, field, value = args
+                fields = self.redis.hashes.setdefault(key, {})
+                fields[field] = str(int(fields.get(field, 0)) + value)
+            elif op == "hset":
+                key, mapping = args
+                self.redis.hashes[key] = {k: str(v) for k, v in mapping.items()}
+            elif op == "hgetall":
+                results.append(dict(self.redis.hashes.get(args[0], {})))
+            elif op == "exists":
+                results.append(await self.redis.exists(args[0]))
+            elif op == "delete":
+                await self.redis.delete(*args[0])
+            elif op == "get":
+                results.append(await self.redis.get(args[0]))
+            elif op == "set":
+                self.redis.strings[args[0]] = args[1]
+            elif op == "incr":
+                value = int(self.redis.strings.get(args[0], 0)) + 1
+                self.redis.strings[args[0]] = str(value)
+            elif op == "xadd":
+                key, fields = args
+                stream = self.redis.streams.setdefault(key, [])
+                stream.append(
+                    (f"{len(stream)}-0", {k: str(v) for k, v in fields.items()})
+                )
+        return results
+
+
+def _counts(stats: dict) -> dict:
+    return {k: v for k, v in stats.items() if k != "tree_hash"}
+
+
+def test_aggregate_counts_every_ancestor_folder():
+    totals = FolderStatsService.aggregate(
+        [
+            ("a/", 0, None),
+            ("a/b/", 0, None),
+            ("a/b/c.txt", 10, "e1"),
+            ("a/d.txt", 5, "e2"),
+            ("e.txt", 1, "e3"),
+        ]
+    )
+
+    assert _counts(FolderStatsService.read_counters(totals[""])) == {
+        "bytes": 16,
+        "files": 3,
+        "folders": 2,
+    }
+    assert _counts(FolderStatsService.read_counters(totals["a/"])) == {
+        "bytes": 15,
+        "files": 2,
+        "folders": 1,
+    }
+    assert _counts(FolderStatsService.read_counters(totals["a/b/"])) == {
+        "bytes": 10,
+        "files": 1,
+        "folders": 0,
+    }
+
+
+def test_tree_hash_changes_only_along_the_modified_path():
+    entries = [
+        ("a/", 0, "d0"),
+        ("a/b/c.txt", 10, "e1"),
+        ("x/y.txt", 5, "e2"),
+    ]
+    before = FolderStatsService.aggregate(entries)
+    after = FolderStatsService.aggregate(
+        entries[:1] + [("a/b/c.txt", 10, "e9")] + entries[2:]
+    )
+
+    def tree_hash(totals, prefix):
+        return FolderStatsService.tree_hash(totals[prefix])
+
+    for prefix in ("", "a/", "a/b/"):
+        assert tree_hash(before, prefix) != tree_hash(after, prefix)
+    assert tree_hash(before, "x/") == tree_hash(after, "x/")
+    # Indépendante de l'ordre du listing
+    assert tree_hash(FolderStatsService.aggregate(entries[::-1]), "") == tree_hash(
+        before, ""
+    )
+
+
+@pytest.mark.anyio
+async def test_incremental_updates_match_a_full_recompute(mocker):
+    objects = [
+        FakeObject("a/", size=0, etag="d0"),
+        FakeObject("a/b/", size=0, etag="d0"),
+        FakeObject("a/b/c.txt", size=10, etag="e1"),
+        FakeObject("__thumbnails__/x/256.webp", size=99, etag="t1"),
+    ]
+    minio = mocker.Mock()
+    minio.list_objects.side_effect = lambda *args, **kwargs: list(objects)
+    service = FolderStatsService(minio, FakeHashRedis())
+
+    stats = await service.get("user-1", "a/")
+    assert _counts(stats) == {"bytes": 10, "files": 1, "folders": 1}
+    initial_hash = stats["tree_hash"]
+
+    # Upload puis suppression du fichier : l'empreinte revient à l'identique
+    await service.apply("user-1", [("a/b/d.bin", 7, "e2")])
+    stats = await service.get("user-1", "a/b/")
+    assert _counts(stats) == {"bytes": 17, "files": 2, "folders": 0}
+    assert (await service.get("user-1", "a/"))["tree_hash"] != initial_hash
+
+    await service.apply("user-1", [("a/b/d.bin", 7, "e2")], -1)
+    assert (await service.get("user-1", "a/"))["tree_hash"] == initial_hash
+
+    # Un recalcul complet donne les mêmes empreintes que les mises à jour
+    objects.append(FakeObject("a/b/d.bin", size=7, etag="e2"))
+    await service.apply("user-1", [("a/b/d.bin", 7, "e2")])
+    incremental = await service.get_many("user-1", ["", "a/", "a/b/"])
+    await service.recompute("user-1")
+    assert await service.get_many("user-1", ["", "a/", "a/b/"]) == incremental
+
+    await service.apply(
+        "user-1",
+        [("a/b/", 0, "d0"), ("a/b/c.txt", 10, "e1"), ("a/b/d.bin", 7, "e2")],
+        -1,
+        forget_prefix="a/b/",
+    )
+
+    assert _counts(await service.get("user-1", "")) == {
+        "bytes": 0,
+        "files": 0,
+        "folders": 1,
+    }
+    assert "folder-stats:user-1:a/b/" not in service.redis.hashes
+    assert minio.list_objects.call_count == 2
+
+
+@pytest.mark.anyio
+async def test_listing_etag_follows_the_folder_tree_hash(mocker):
+    objects = [FakeObject("a.txt", size=3, etag="e1")]
+    minio = mocker.Mock()
+    minio.list_objects.side_effect = lambda *args, **kwargs: list(objects)
+    service = MinioService(minio, FakeHashRedis())
+
+    # Version inconnue tant que les stats ne sont pas construites : pas d'ETag
+    assert await service.listing_etag(7, "/", "tree", 1, 30) is None
+
+    await service.folder_stats.recompute("user-7")
+    etag = await service.listing_etag(7, "/", "tree", 1, 30)
+    assert etag is not None
+    assert etag != await service.listing_etag(7, "/", "tree", 2, 30)
+    assert etag_matches(f"W/{etag}", etag)
+
+    await service.simple_list_page(path="/", user_id=7)
+    await service.simple_list_page(path="/", user_id=7)
+    assert minio.list_objects.call_count == 2  # recompute + un seul listing
+
+    objects.append(FakeObject("b.txt", size=1, etag="e2"))
+    await service.folder_stats.apply("user-7", [("b.txt", 1, "e2")])
+
+    assert await service.listing_etag(7, "/", "tree", 1, 30) != etag
+    page = await service.simple_list_page(path="/", user_id=7)
+    assert [item["name"] for item in page["items"]] == ["a.txt", "b.txt"]
+
+    # Même contenu renvoyé : même tree_hash, mais la date a changé
+    etag = await service.listing_etag(7, "/", "tree", 1, 30)
+    tree_hash = (await service.folder_stats.get("user-7", ""))["tree_hash"]
+    await service.folder_stats.apply("user-7", [("b.txt", 1, "e2")], -1)
+    await service.folder_stats.apply("user-7", [("b.txt", 1, "e2")])
+
+    assert (await service.folder_stats.get("user-7", ""))["tree_hash"] == tree_hash
+    assert await service.listing_etag(7, "/", "tree", 1, 30) != etag
+
+    # Un recalcul remet "writes" à zéro sans revenir à une version déjà servie
+    seen = {etag, await service.listing_etag(7, "/", "tree", 1, 30)}
+    await service.folder_stats.recompute("user-7")
+    assert await service.listing_etag(7, "/", "tree", 1, 30) not in seen
+
+
+@pytest.mark.anyio
+async def test_recompute_replays_operations_applied_during_the_listing(mocker):
+    listing = [
+        FakeObject("a.txt", size=3, etag="e1"),
+        FakeObject("old.txt", size=5, etag="e2"),
+    ]
+    minio = mocker.Mock()
+    minio.list_objects.side_effect = lambda *args, **kwargs: list(listing)
+    redis = FakeHashRedis()
+    service = FolderStatsService(minio, redis)
+    await service.recompute("user-1")
+
+    async def concurrent_writes():
+        # Upload manqué par le listing et suppression d'un objet déjà listé
+        redis.on_transaction = None
+        await service.apply("user-1", [("new.txt", 7, "e3")])
+        await service.apply("user-1", [("old.txt", 5, "e2")], -1)
+
+    redis.on_transaction = concurrent_writes
+    assert await service.recompute("user-1") is True
+
+    assert _counts(await service.get("user-1", "")) == {
+        "bytes": 10,
+        "files": 2,
+        "folders": 0,
+    }
+    assert not redis.streams
+    assert "folder-stats-recompute:user-1" not in redis.strings
+
+
+@pytest.mark.anyio
+async def test_recompute_is_skipped_while_another_one_holds_the_bucket_lock(mocker):
+    minio = mocker.Mock()
+    redis = FakeHashRedis()
+    redis.strings["folder-stats-recompute:user-1"] = "other-worker"
+    service = FolderStatsService(minio, redis)
+
+    assert await service.recompute("user-1") is False
+    assert await service.get("user-1", "") is None
+    minio.list_objects.assert_not_called()
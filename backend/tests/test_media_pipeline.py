@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import io
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from app.services.minio.media_pipeline import MediaPipeline
+from app.services.minio.metadata_cache import MetadataCache
+from app.services.minio.object_service import ObjectService
+
+from conftest import FakeBucketService, FakeObjectResponse, FakeRedis
+
+
+def build_pipeline(mocker, content: bytes, content_type: str = "image/png"):
+    minio = mocker.Mock()
+    minio.stat_object.return_value = SimpleNamespace(
+        size=len(content),
+        last_modified=None,
+        content_type=content_type,
+        etag="etag-1",
+        version_id=None,
+    )
+    minio.get_object.side_effect = lambda *args, **kwargs: FakeObjectResponse([content])
+    object_service = ObjectService(
+        minio, FakeBucketService(), MetadataCache(FakeRedis())
+    )
+    sse_manager = mocker.Mock()
+    sse_manager.notify_user = mocker.AsyncMock()
+    return MediaPipeline(object_service, sse_manager, workers=1), minio, sse_manager
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 3)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.anyio
+async def test_process_hashes_once_per_etag_and_announces_result(mocker):
+    content = png_bytes()
+    pipeline, minio, sse_manager = build_pipeline(mocker, content)
+
+    await pipeline.process(1, "docs/a.png")
+    reads = minio.get_object.call_count
+    await pipeline.process(1, "docs/a.png")
+
+    assert minio.get_object.call_count == reads
+    message = sse_manager.notify_user.await_args.args[1]
+    assert message["event"] == "media_ready"
+    assert message["payload"]["path"] == "/docs/a.png"
+    assert message["payload"]["metadata"]["width"] == 4
+    assert message["payload"]["sha256"] == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.anyio
+async def test_process_skips_non_media_files_without_reading_them(mocker):
+    pipeline, minio, sse_manager = build_pipeline(
+        mocker, b"x" * 1024, content_type="application/octet-stream"
+    )
+
+    await pipeline.process(1, "backups/disk.img.bin")
+
+    minio.get_object.assert_not_called()
+    sse_manager.notify_user.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_full_queue_keeps_jobs_until_workers_catch_up(mocker):
+    pipeline, _, _ = build_pipeline(mocker, b"")
+    pipeline.queue = pipeline.queue.__class__(maxsize=1)
+    processed = []
+
+    async def process(user_id, path):
+        processed.append(path)
+
+    mocker.patch.object(pipeline, "process", side_effect=process)
+
+    for index in range(5):
+        pipeline.enqueue(1, f"copy/{index}.png")
+    assert pipeline.queue.qsize() == 1
+    assert len(pipeline.backlog) == 4
+
+    await pipeline.start()
+    for _ in range(50):
+        await asyncio.sleep(0)
+    await pipeline.shutdown()
+
+    assert processed == [f"copy/{index}.png" for index in range(5)]
+    assert not pipeline.backlog
+
+
+def test_full_backlog_drops_and_counts_new_jobs(mocker):
+    pipeline, _, _ = build_pipeline(mocker, b"")
+    pipeline.queue = pipeline.queue.__class__(maxsize=1)
+    pipeline.max_backlog = 2
+
+    for index in range(5):
+        pipeline.enqueue(1, f"copy/{index}.png")
+
+    assert pipeline.queue.qsize() == 1
+    assert list(pipeline.backlog) == [(1, "copy/1.png"), (1, "copy/2.png")]
+    assert pipeline.dropped == 2
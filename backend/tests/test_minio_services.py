@@ -1,15 +1,26 @@
+from datetime import datetime, timezone
 from io import BytesIO
 from types import SimpleNamespace
 
+import io
+import json
+import tarfile
+import zipfile
+
 import pytest
+import zstandard
 from fastapi import HTTPException, UploadFile
 from minio.error import S3Error
+from pydantic import TypeAdapter
 
+from app.schemas.file_tree import FullFileTreeResponse, SimpleFileTreeResponse
 from app.services.minio.download_service import DownloadService
+from app.services.minio.metadata_cache import MetadataCache
 from app.services.minio.minio_service import MinioService
 from app.services.minio.object_service import ObjectService
+from app.utils.response import BaseResponse, ListingResponse
 
-from conftest import FakeBucketService, FakeObject, FakeObjectResponse
+from conftest import FakeBucketService, FakeObject, FakeObjectResponse, FakeRedis
 
 
 def s3_error(code: str = "NoSuchKey") -> S3Error:
@@ -28,7 +39,9 @@ async def test_simple_list_path_sorts_folders_first_and_paginates(mocker):
     minio = mocker.Mock()
     minio.list_objects.return_value = [
         FakeObject("zeta.txt", size=10),
-        FakeObject("docs/", metadata={"x-amz-meta-last_modified": "2026-01-02T12:00:00"}),
+        FakeObject(
+            "docs/", metadata={"x-amz-meta-last_modified": "2026-01-02T12:00:00"}
+        ),
         FakeObject("alpha.txt", size=5),
     ]
     service = MinioService(minio)
@@ -52,6 +65,69 @@ async def test_simple_list_path_rejects_parent_traversal(mocker):
     assert exc.value.status_code == 400
 
 
+@pytest.mark.anyio
+async def test_listing_fast_path_keeps_the_pydantic_json_shape(mocker):
+    minio = mocker.Mock()
+    minio.list_objects.side_effect = lambda *args, **kwargs: [
+        FakeObject(
+            "docs/", metadata={"x-amz-meta-last_modified": "2026-01-02T12:00:00"}
+        ),
+        FakeObject(
+            "a.txt",
+            size=5,
+            etag="e1",
+            content_type="text/plain",
+            last_modified=datetime(2026, 1, 1, 12, 0, 0, 5, tzinfo=timezone.utc),
+        ),
+    ]
+    service = MinioService(minio)
+
+    def body(data) -> dict:
+        payload = json.loads(ListingResponse.envelope(data=data, message="ok").body)
+        payload.pop("timestamp")
+        return payload
+
+    def reference(model) -> dict:
+        payload = json.loads(
+            TypeAdapter(BaseResponse).dump_json(
+                BaseResponse(data=model, message="ok", status_code=200)
+            )
+        )
+        payload.pop("timestamp")
+        return payload
+
+    simple = await service.simple_list_page(path="/", user_id=7)
+    assert body(simple) == reference(SimpleFileTreeResponse(**simple))
+    assert simple["items"][1]["last_modified"] == "2026-01-01T12:00:00.000005Z"
+
+    full = await service.full_list_payload(path="/", user_id=7)
+    assert body(full) == reference(FullFileTreeResponse(**full))
+
+
+@pytest.mark.anyio
+async def test_stream_full_list_path_emits_ndjson_records_then_a_summary(mocker):
+    minio = mocker.Mock()
+    minio.list_objects.return_value = iter(
+        [
+            FakeObject("docs/", size=0),
+            FakeObject("docs/a.txt", size=3, etag="e1"),
+            FakeObject("__thumbnails__/x/256.webp", size=9),
+        ]
+    )
+    service = MinioService(minio)
+
+    records = await service.stream_full_list_path(path="/", user_id=7)
+    lines = [json.loads(line) for line in b"".join(records).splitlines()]
+
+    assert [(r["name"], r["is_dir"]) for r in lines[:-1]] == [
+        ("docs", True),
+        ("docs/a.txt", False),
+    ]
+    assert lines[1]["etag"] == "e1"
+    assert lines[-1] == {"path": "/", "total_items": 2}
+    minio.list_objects.assert_called_once_with("user-7", prefix="", recursive=True)
+
+
 @pytest.mark.anyio
 async def test_upload_file_sanitizes_filename_and_uses_available_name(mocker):
     minio = mocker.Mock()
@@ -74,7 +150,9 @@ async def test_upload_file_sanitizes_filename_and_uses_available_name(mocker):
 
 
 @pytest.mark.anyio
-async def test_preview_object_streams_with_content_type_fallback_and_closes_response(mocker):
+async def test_preview_object_streams_with_content_type_fallback_and_closes_response(
+    mocker,
+):
     minio = mocker.Mock()
     minio.stat_object.return_value = SimpleNamespace(
         content_type="application/octet-stream",
@@ -94,6 +172,177 @@ async def test_preview_object_streams_with_content_type_fallback_and_closes_resp
     assert response.released is True
 
 
+@pytest.mark.anyio
+async def test_download_folder_announces_length_and_serves_ranges(mocker):
+    minio = mocker.Mock()
+    minio.stat_object.side_effect = s3_error("NoSuchKey")
+    minio.list_objects.return_value = [
+        FakeObject("docs/", size=0),
+        FakeObject("docs/a.txt", size=5, etag="e1"),
+    ]
+    minio.get_object.side_effect = lambda bucket, name, offset=0, length=0: (
+        FakeObjectResponse([b"hello"[offset : offset + length]])
+    )
+    service = DownloadService(minio, FakeBucketService())
+
+    full = await service.download_object(user_id=5, object_name="docs/")
+    body = await collect_body(full)
+
+    assert full.status_code == 200
+    assert full.headers["content-length"] == str(len(body))
+    assert full.headers["accept-ranges"] == "bytes"
+
+    partial = await service.download_object(
+        user_id=5, object_name="docs/", range_header="bytes=10-"
+    )
+
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 10-{len(body) - 1}/{len(body)}"
+    assert await collect_body(partial) == body[10:]
+
+
+@pytest.mark.anyio
+async def test_download_objects_streams_selection_without_writing_to_bucket(mocker):
+    contents = {"docs/a.txt": b"aaa", "docs/sub/b.txt": b"bb"}
+    minio = mocker.Mock()
+    minio.stat_object.return_value = SimpleNamespace(
+        size=3, last_modified=None, etag="ea"
+    )
+    minio.list_objects.return_value = [
+        FakeObject("docs/sub/", size=0),
+        FakeObject("docs/sub/b.txt", size=2, etag="eb"),
+    ]
+    minio.get_object.side_effect = lambda bucket, name, offset=0, length=0: (
+        FakeObjectResponse([contents[name][offset : offset + length]])
+    )
+    service = DownloadService(minio, FakeBucketService())
+
+    response = await service.download_objects(
+        user_id=5, object_names=["docs/a.txt", "docs/sub/"], archive_name="sel"
+    )
+    body = await collect_body(response)
+
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        assert zf.namelist() == ["a.txt", "sub/b.txt"]
+        assert zf.read("sub/b.txt") == b"bb"
+    assert 'filename="sel.zip"' in response.headers["content-disposition"]
+    minio.put_object.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_get_object_metadata_reuses_cached_extraction_for_same_etag(mocker):
+    from PIL import Image
+
+    image = BytesIO()
+    Image.new("RGB", (4, 3)).save(image, format="PNG")
+    png = image.getvalue()
+
+    minio = mocker.Mock()
+    minio.stat_object.return_value = SimpleNamespace(
+        size=len(png),
+        last_modified=None,
+        content_type="image/png",
+        etag="etag-1",
+        version_id=None,
+    )
+    minio.get_object.side_effect = lambda *args, **kwargs: FakeObjectResponse([png])
+    service = ObjectService(minio, FakeBucketService(), MetadataCache(FakeRedis()))
+
+    first = await service.get_object_metadata(1, "photos/a.png")
+    second = await service.get_object_metadata(1, "photos/a.png")
+
+    assert (first.width, first.height) == (4, 3)
+    assert second == first
+    assert minio.get_object.call_count == 1
+    assert minio.stat_object.call_count == 2
+
+
+@pytest.mark.anyio
+async def test_get_objects_metadata_reports_missing_paths_without_failing(mocker):
+    from app.schemas.files import BulkStatsResponse
+
+    def stat_object(bucket_name, object_name):
+        if object_name == "missing.txt":
+            raise s3_error()
+        return SimpleNamespace(
+            size=2048,
+            last_modified=None,
+            content_type="text/plain",
+            etag="e",
+            version_id=None,
+        )
+
+    minio = mocker.Mock()
+    minio.stat_object.side_effect = stat_object
+    service = ObjectService(minio, FakeBucketService())
+
+    items, errors = await service.get_objects_metadata(
+        1, ["a.txt", "missing.txt", "b.txt", "a.txt"]
+    )
+
+    assert [item.path for item in items] == ["/a.txt", "/b.txt"]
+    assert errors == [{"path": "missing.txt", "status_code": 404, "detail": mocker.ANY}]
+    assert BulkStatsResponse(items=items, errors=errors).items[0].size_kb == 2.0
+
+
+@pytest.mark.anyio
+async def test_get_objects_metadata_reports_unexpected_errors_per_path(mocker):
+    def stat_object(bucket_name, object_name):
+        if object_name == "corrupt.jpg":
+            raise OSError("cannot identify image file")
+        return SimpleNamespace(
+            size=2048,
+            last_modified=None,
+            content_type="text/plain",
+            etag="e",
+            version_id=None,
+        )
+
+    minio = mocker.Mock()
+    minio.stat_object.side_effect = stat_object
+    service = ObjectService(minio, FakeBucketService())
+
+    items, errors = await service.get_objects_metadata(1, ["a.txt", "corrupt.jpg"])
+
+    assert [item.path for item in items] == ["/a.txt"]
+    assert errors == [{"path": "corrupt.jpg", "status_code": 500, "detail": mocker.ANY}]
+
+
+@pytest.mark.anyio
+async def test_upload_file_is_refused_before_transfer_when_quota_is_exceeded(mocker):
+    mocker.patch("app.services.minio.quota_service.settings.STORAGE_QUOTA_BYTES", 100)
+    minio = mocker.Mock()
+    minio.list_objects.return_value = [FakeObject("old.bin", size=95)]
+    service = DownloadService(minio, FakeBucketService())
+    upload = UploadFile(file=BytesIO(b"0123456789"), filename="new.bin")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await service.upload_file(1, upload)
+
+    assert exc_info.value.status_code == 507
+    minio.put_object.assert_not_called()
+    assert await service.quota.get_usage("user-1") == {
+        "used_bytes": 95,
+        "quota_bytes": 100,
+        "available_bytes": 5,
+    }
+
+
+@pytest.mark.anyio
+async def test_quota_without_redis_reuses_the_listing_between_admissions(mocker):
+    mocker.patch("app.services.minio.quota_service.settings.STORAGE_QUOTA_BYTES", 100)
+    minio = mocker.Mock()
+    minio.list_objects.return_value = [FakeObject("old.bin", size=80)]
+    service = DownloadService(minio, FakeBucketService())
+
+    await service.quota.ensure_available("user-1", 15)
+    with pytest.raises(HTTPException) as exc_info:
+        await service.quota.ensure_available("user-1", 10)
+
+    assert exc_info.value.status_code == 507
+    assert minio.list_objects.call_count == 1
+
+
 @pytest.mark.anyio
 async def test_delete_file_returns_404_when_minio_key_is_missing(mocker):
     minio = mocker.Mock()
@@ -107,14 +356,81 @@ async def test_delete_file_returns_404_when_minio_key_is_missing(mocker):
     minio.remove_object.assert_not_called()
 
 
+@pytest.mark.anyio
+async def test_delete_removes_thumbnails_of_deleted_content(mocker):
+    thumbnails = [
+        FakeObject("__thumbnails__/e1/256.webp"),
+        FakeObject("__thumbnails__/e1/128.jpeg"),
+        FakeObject("__thumbnails__/e2/256.webp"),
+    ]
+
+    def list_objects(bucket, prefix, recursive):
+        if prefix.startswith("__thumbnails__/"):
+            return [obj for obj in thumbnails if obj.object_name.startswith(prefix)]
+        return [
+            FakeObject("album/a.jpg", size=3, etag="e1"),
+            FakeObject("album/b.jpg", size=3, etag="e3"),
+        ]
+
+    def removed(call) -> list[str]:
+        return [obj.name for obj in call.args[1]]
+
+    minio = mocker.Mock()
+    minio.list_objects.side_effect = list_objects
+    minio.remove_objects.return_value = []
+    minio.stat_object.return_value = SimpleNamespace(size=3, etag='"e2"')
+    service = ObjectService(minio, FakeBucketService())
+
+    await service.delete_object(user_id=5, path="album/")
+    await service.delete_object(user_id=5, path="photo.jpg")
+
+    folder, folder_thumbnails, file_thumbnails = minio.remove_objects.call_args_list
+    assert removed(folder) == ["album/a.jpg", "album/b.jpg"]
+    assert removed(folder_thumbnails) == [
+        "__thumbnails__/e1/256.webp",
+        "__thumbnails__/e1/128.jpeg",
+    ]
+    assert removed(file_thumbnails) == ["__thumbnails__/e2/256.webp"]
+
+
 @pytest.mark.anyio
 async def test_move_rejects_same_folder_without_touching_minio(mocker):
     minio = mocker.Mock()
     service = ObjectService(minio, FakeBucketService())
 
     with pytest.raises(HTTPException) as exc:
-        await service.move(user_id=5, source_path="docs/file.txt", destination_folder="docs")
+        await service.move(
+            user_id=5, source_path="docs/file.txt", destination_folder="docs"
+        )
 
     assert exc.value.status_code == 409
     minio.copy_object.assert_not_called()
     minio.remove_object.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_download_folder_as_tar_zst_consumes_listing_while_streaming(mocker):
+    listed = []
+
+    def list_objects(bucket, prefix, recursive):
+        for obj in [FakeObject("docs/", size=0), FakeObject("docs/a.txt", size=5)]:
+            listed.append(obj.object_name)
+            yield obj
+
+    minio = mocker.Mock()
+    minio.list_objects.side_effect = list_objects
+    minio.get_object.side_effect = lambda bucket, name, offset=0, length=0: (
+        FakeObjectResponse([b"hello"[offset : offset + length]])
+    )
+    service = DownloadService(minio, FakeBucketService())
+
+    response = await service.download_object(
+        user_id=5, object_name="docs/", archive_format="tar.zst"
+    )
+
+    assert listed == ["docs/"]
+    body = await collect_body(response)
+    archive = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body)).read()
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tf:
+        assert tf.extractfile("a.txt").read() == b"hello"
+    minio.stat_object.assert_not_called()
@@ -69,3 +69,40 @@ async def test_resolve_path_type_prefers_file_then_directory_then_not_found(mock
 
     minio.list_objects.return_value = []
     assert await MinioUtils.resolve_path_type(minio, "bucket", "missing") == "not_found"
+
+
+def test_parse_byte_range_handles_open_suffix_and_invalid_ranges():
+    assert MinioUtils.parse_byte_range(None, 100) is None
+    assert MinioUtils.parse_byte_range("bytes=10-19", 100) == (10, 19)
+    assert MinioUtils.parse_byte_range("bytes=90-", 100) == (90, 99)
+    assert MinioUtils.parse_byte_range("bytes=-5", 100) == (95, 99)
+    assert MinioUtils.parse_byte_range("bytes=0-1,5-6", 100) is None
+    assert MinioUtils.parse_byte_range("items=0-1", 100) is None
+
+    with pytest.raises(HTTPException) as exc:
+        MinioUtils.parse_byte_range("bytes=100-", 100)
+
+    assert exc.value.status_code == 416
+
+
+@pytest.mark.parametrize(
+    ("selection", "arcnames"),
+    [
+        (["docs/report.pdf"], ["report.pdf"]),
+        (["docs/"], ["a.txt", "sub/b.txt"]),
+        (["docs/a.txt", "docs/sub/"], ["a.txt", "sub/b.txt"]),
+        (["a/report.pdf", "b/report.pdf"], ["a/report.pdf", "b/report.pdf"]),
+    ],
+)
+def test_archive_names_stay_unique_across_sibling_folders(selection, arcnames):
+    objects = {
+        "docs/": ["docs/a.txt", "docs/sub/b.txt"],
+        "docs/sub/": ["docs/sub/b.txt"],
+    }
+    names = [
+        name for selected in selection for name in objects.get(selected, [selected])
+    ]
+
+    prefix = MinioUtils.get_archive_prefix(selection)
+
+    assert [MinioUtils.get_arcname(name, prefix) for name in names] == arcnames
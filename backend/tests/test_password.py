@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from core.password import PasswordHasher
+
+
+@pytest.mark.anyio
+async def test_hashing_runs_off_the_event_loop():
+    hasher = PasswordHasher(workers=1, queue_timeout_s=1)
+    hasher.pwd_context = CryptContext(schemes=["plaintext"])
+
+    thread_name = await hasher._run(lambda: threading.current_thread().name)
+    hashed = await hasher.hash("Password1!")
+
+    assert thread_name.startswith("argon2")
+    assert await hasher.verify("Password1!", hashed)
+    assert not await hasher.verify("WrongPassword1!", hashed)
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_requests_beyond_capacity_time_out_with_503():
+    hasher = PasswordHasher(workers=1, queue_timeout_s=0.05)
+
+    busy = asyncio.create_task(hasher._run(time.sleep, 0.3))
+    await asyncio.sleep(0.01)
+    with pytest.raises(HTTPException) as exc:
+        await hasher._run(time.sleep, 0)
+    await busy
+
+    assert exc.value.status_code == 503
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_hasher_is_reusable_after_shutdown_and_keeps_its_slots():
+    hasher = PasswordHasher(workers=1, queue_timeout_s=0.05)
+    hasher.pwd_context = CryptContext(schemes=["plaintext"])
+    hasher.shutdown()
+
+    # Un second lifespan dans le même processus
+    assert await hasher.verify("Password1!", await hasher.hash("Password1!"))
+
+    busy = asyncio.create_task(hasher._run(time.sleep, 0.2))
+    await asyncio.sleep(0.01)
+    with pytest.raises(HTTPException):
+        await hasher._run(time.sleep, 0)
+    await busy
+
+    # Aucun jeton perdu par l'attente expirée
+    assert hasher._slots._value == 1
+    hasher.shutdown()
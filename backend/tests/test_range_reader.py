@@ -0,0 +1,46 @@
+import io
+
+from PIL import Image
+
+from app.utils.minio_utils import MinioUtils
+from app.utils.range_reader import MinioRangeReader
+from conftest import FakeObjectResponse
+
+
+def make_minio(mocker, data: bytes):
+    minio = mocker.Mock()
+    minio.get_object.side_effect = lambda bucket, name, offset=0, length=0: (
+        FakeObjectResponse([data[offset : offset + length]])
+    )
+    return minio
+
+
+def test_range_reader_reads_seeks_and_caches_blocks(mocker):
+    data = bytes(range(256)) * 40
+    minio = make_minio(mocker, data)
+    reader = MinioRangeReader(
+        minio, "bucket", "big.bin", len(data), block_size=1024, max_blocks=4
+    )
+
+    assert reader.read(10) == data[:10]
+    reader.seek(-20, io.SEEK_END)
+    assert reader.read() == data[-20:]
+    reader.seek(5)
+    assert reader.read(2000) == data[5:2005]
+
+    # Bloc 0 déjà en cache : seul le bloc 1 manquait pour la dernière lecture.
+    assert minio.get_object.call_count == 3
+    assert reader.bytes_fetched == 3 * 1024
+
+
+def test_extract_image_metadata_only_fetches_header_blocks(mocker):
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480)).save(buffer, format="BMP")
+    data = buffer.getvalue()
+    minio = make_minio(mocker, data)
+    reader = MinioRangeReader(minio, "bucket", "photo.bmp", len(data), block_size=4096)
+
+    meta = MinioUtils.extract_image_metadata(reader)
+
+    assert meta == {"width": 640, "height": 480, "format": "BMP"}
+    assert reader.bytes_fetched < len(data) // 10
@@ -1,10 +1,14 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from types import SimpleNamespace
 
 import pytest
 from fastapi import HTTPException
 from starlette.requests import Request
 
+from app.schemas.user import User
+from core.auth_cache import AuthCache
+from core.config import settings
+from core.revocation import RevocationList, build_revocation_list
 from core.security import JWTService
 
 
@@ -77,3 +81,131 @@ def test_verify_token_rejects_invalid_token():
         service.verify_token("not-a-valid-token")
 
     assert exc.value.status_code == 401
+
+
+OWNER_ROW = (7, "alex", "hashed", "alex@example.com", "Alex", datetime(2026, 1, 1))
+
+
+@pytest.mark.anyio
+async def test_current_user_is_served_from_auth_cache_after_first_lookup(mocker):
+    lookup = mocker.patch("core.security.get_token_owner_info", return_value=OWNER_ROW)
+    service = JWTService(
+        connection_manager=SimpleNamespace(), auth_cache=AuthCache(None)
+    )
+    token = service.create_access_token({"sub": "alex@example.com", "user_id": 7})
+    request = make_request(headers={"Authorization": f"Bearer {token.token}"})
+
+    first = await service.get_current_user(request)
+    second = await service.get_current_user(request)
+
+    assert first == second
+    assert second.username == "alex"
+    assert lookup.call_count == 1
+
+
+@pytest.mark.anyio
+async def test_auth_cache_invalidation_forces_a_new_lookup(mocker):
+    lookup = mocker.patch("core.security.get_token_owner_info", return_value=OWNER_ROW)
+    cache = AuthCache(None)
+    service = JWTService(connection_manager=SimpleNamespace(), auth_cache=cache)
+    token = service.create_access_token({"sub": "alex@example.com", "user_id": 7})
+    request = make_request(headers={"Authorization": f"Bearer {token.token}"})
+
+    await service.get_current_user(request)
+    await cache.invalidate_user(7)
+    await service.get_current_user(request)
+    await cache.invalidate_token(token.token)
+    await service.get_current_user(request)
+
+    assert lookup.call_count == 3
+    assert cache.token_key(token.token) in cache._local
+
+
+def stateless_token(service: JWTService, **claims) -> str:
+    data = {
+        "sub": "alex@example.com",
+        "user_id": 7,
+        "username": "alex",
+        "full_name": "Alex",
+        "creation_date": "2026-01-01T00:00:00",
+    }
+    data.update(claims)
+    return service.create_access_token(data).token
+
+
+@pytest.mark.anyio
+async def test_stateless_mode_trusts_claims_and_honours_revocations(mocker):
+    mocker.patch.object(settings, "AUTH_STATELESS", True)
+    lookup = mocker.patch("core.security.get_token_owner_info")
+    revocations = RevocationList(None)
+    service = JWTService(connection_manager=SimpleNamespace(), revocations=revocations)
+    token = stateless_token(service)
+    request = make_request(headers={"Authorization": f"Bearer {token}"})
+
+    user = await service.get_current_user(request)
+    assert (user.id, user.email, user.full_name) == (7, "alex@example.com", "Alex")
+    lookup.assert_not_called()
+
+    payload = service.verify_token(token)
+    await revocations.revoke(payload["jti"], payload["exp"])
+    with pytest.raises(HTTPException) as exc:
+        await service.get_current_user(request)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_stateless_mode_applies_profile_updates_to_older_tokens(mocker):
+    mocker.patch.object(settings, "AUTH_STATELESS", True)
+    revocations = RevocationList(None)
+    service = JWTService(connection_manager=SimpleNamespace(), revocations=revocations)
+    request = make_request(
+        headers={"Authorization": f"Bearer {stateless_token(service)}"}
+    )
+
+    await revocations.update_profile(
+        User(
+            id=7,
+            username="alexandre",
+            email="alexandre@example.com",
+            full_name="Alexandre",
+            creation_date=datetime(2026, 1, 1),
+        )
+    )
+    user = await service.get_current_user(request)
+
+    assert (user.username, user.email) == ("alexandre", "alexandre@example.com")
+
+
+@pytest.mark.anyio
+async def test_stateless_mode_falls_back_to_database_for_legacy_tokens(mocker):
+    mocker.patch.object(settings, "AUTH_STATELESS", True)
+    lookup = mocker.patch("core.security.get_token_owner_info", return_value=OWNER_ROW)
+    service = JWTService(
+        connection_manager=SimpleNamespace(), revocations=RevocationList(None)
+    )
+    token = service.create_access_token({"sub": "alex@example.com", "user_id": 7})
+    request = make_request(headers={"Authorization": f"Bearer {token.token}"})
+
+    user = await service.get_current_user(request)
+
+    assert user.username == "alex"
+    lookup.assert_called_once()
+
+
+@pytest.mark.anyio
+async def test_stateless_mode_without_redis_checks_tokens_in_database(mocker):
+    mocker.patch.object(settings, "AUTH_STATELESS", True)
+    lookup = mocker.patch("core.security.get_token_owner_info", return_value=None)
+
+    revocations = await build_revocation_list(None)
+    service = JWTService(connection_manager=SimpleNamespace(), revocations=revocations)
+    request = make_request(
+        headers={"Authorization": f"Bearer {stateless_token(service)}"}
+    )
+
+    # Token supprimé en base (déconnexion sur un autre worker) : refusé
+    assert revocations is None
+    with pytest.raises(HTTPException) as exc:
+        await service.get_current_user(request)
+    assert exc.value.status_code == 401
+    lookup.assert_called_once()
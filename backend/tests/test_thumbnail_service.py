@@ -0,0 +1,123 @@
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from minio.error import S3Error
+from PIL import Image
+
+from app.services.minio.thumbnail_service import ThumbnailService
+from app.utils.minio_utils import MinioUtils
+
+from conftest import FakeBucketService, FakeObjectResponse
+
+
+def jpeg_bytes(width: int, height: int, orientation: int | None = None) -> bytes:
+    output = BytesIO()
+    image = Image.new("RGB", (width, height), "red")
+    exif = image.getexif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(output, format="JPEG", exif=exif)
+    return output.getvalue()
+
+
+def test_render_thumbnail_applies_exif_orientation_and_bounds_size():
+    # Orientation 6 : l'image stockée en paysage s'affiche en portrait.
+    data = MinioUtils.render_thumbnail(jpeg_bytes(400, 200, 6), 128, "webp")
+
+    with Image.open(BytesIO(data)) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (64, 128)
+
+
+@pytest.mark.anyio
+async def test_get_thumbnail_stores_rendition_under_hidden_etag_key(mocker):
+    source = jpeg_bytes(300, 300)
+    stored: dict[str, bytes] = {}
+
+    def get_object(bucket_name, object_name, **kwargs):
+        if object_name == "photos/a.jpg":
+            return FakeObjectResponse([source])
+        if object_name in stored:
+            return FakeObjectResponse([stored[object_name]])
+        raise S3Error(None, "NoSuchKey", "message", "resource", "req", "host")
+
+    def put_object(bucket_name, object_name, data, length, content_type):
+        stored[object_name] = data.read()
+
+    minio = mocker.Mock()
+    minio.stat_object.return_value = SimpleNamespace(
+        size=len(source), content_type="image/jpeg", etag='"abc"'
+    )
+    minio.get_object.side_effect = get_object
+    minio.put_object.side_effect = put_object
+    service = ThumbnailService(minio, FakeBucketService())
+
+    first = await service.get_thumbnail(1, "photos/a.jpg", accept="image/webp")
+    second = await service.get_thumbnail(
+        1, "photos/a.jpg", accept="image/webp", version="abc"
+    )
+    revalidated = await service.get_thumbnail(
+        1, "photos/a.jpg", accept="image/webp", if_none_match='"abc-256-webp"'
+    )
+
+    assert list(stored) == ["__thumbnails__/abc/256.webp"]
+    assert minio.put_object.call_count == 1
+    assert first.media_type == "image/webp"
+    assert first.body == second.body
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert "immutable" in second.headers["cache-control"]
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.anyio
+async def test_get_thumbnail_rejects_unknown_sizes_and_non_images(mocker):
+    minio = mocker.Mock()
+    minio.stat_object.return_value = SimpleNamespace(
+        size=10, content_type="text/plain", etag="abc"
+    )
+    service = ThumbnailService(minio, FakeBucketService())
+
+    with pytest.raises(HTTPException) as size_error:
+        await service.get_thumbnail(1, "a.jpg", size=1000)
+    with pytest.raises(HTTPException) as type_error:
+        await service.get_thumbnail(1, "notes.txt")
+
+    assert size_error.value.status_code == 400
+    assert type_error.value.status_code == 415
+
+
+@pytest.mark.anyio
+async def test_get_thumbnails_batch_returns_one_part_per_path_with_errors(mocker):
+    source = jpeg_bytes(300, 300)
+
+    def stat_object(bucket_name, object_name):
+        if object_name == "missing.jpg":
+            raise S3Error(None, "NoSuchKey", "message", "resource", "req", "host")
+        return SimpleNamespace(size=len(source), content_type="image/jpeg", etag="e")
+
+    def get_object(bucket_name, object_name, **kwargs):
+        if object_name == "a.jpg":
+            return FakeObjectResponse([source])
+        raise S3Error(None, "NoSuchKey", "message", "resource", "req", "host")
+
+    minio = mocker.Mock()
+    minio.stat_object.side_effect = stat_object
+    minio.get_object.side_effect = get_object
+    service = ThumbnailService(minio, FakeBucketService())
+
+    response = await service.get_thumbnails_batch(
+        1, ["a.jpg", "missing.jpg"], accept="image/webp"
+    )
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    boundary = response.media_type.split("boundary=")[1].encode()
+
+    parts = body.split(b"--" + boundary)[1:-1]
+    headers = {
+        part.split(b"Content-Location: ")[1].split(b"\r\n")[0]: part for part in parts
+    }
+    assert set(headers) == {b"/a.jpg", b"/missing.jpg"}
+    assert b"Content-Type: image/webp" in headers[b"/a.jpg"]
+    assert b"X-Status: 404" in headers[b"/missing.jpg"]
+    assert body.endswith(b"--" + boundary + b"--\r\n")
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.token_purge_service import TokenPurgeService
+from core.config import settings
+
+
+@pytest.mark.anyio
+async def test_purge_deletes_in_batches_until_a_partial_batch(mocker):
+    mocker.patch.object(settings, "TOKEN_PURGE_BATCH_SIZE", 2)
+    hoover = mocker.patch(
+        "app.services.token_purge_service.hoover_tokens", side_effect=[2, 2, 1]
+    )
+    service = TokenPurgeService(SimpleNamespace(), None)
+
+    assert await service.purge_expired() == 5
+    assert hoover.call_count == 3
+    assert all(call.args[1] == 2 for call in hoover.call_args_list)
+
+
+@pytest.mark.anyio
+async def test_purge_stops_when_nothing_is_expired(mocker):
+    hoover = mocker.patch(
+        "app.services.token_purge_service.hoover_tokens", return_value=0
+    )
+    service = TokenPurgeService(SimpleNamespace(), None)
+
+    assert await service.purge_expired() == 0
+    hoover.assert_called_once()
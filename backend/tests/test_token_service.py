@@ -0,0 +1,95 @@
+import hashlib
+from contextlib import asynccontextmanager
+
+import psycopg.errors
+import pytest
+
+from database.config import SQL_PATH
+from database.services.token import create_token, get_token_owner_info
+from database.tools import sql_registry
+
+
+class FakeCursor:
+    rowcount = 1
+
+    async def fetchone(self):
+        return (1, "alex")
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    async def execute(self, query, parameters=None, prepare=None):
+        self.executed.append((query, parameters, prepare))
+        return FakeCursor()
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+class FakeConnectionManager:
+    prepare = True
+
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    @asynccontextmanager
+    async def connection(self):
+        yield self.conn
+
+
+@pytest.mark.anyio
+async def test_tokens_are_stored_and_looked_up_by_sha256_digest():
+    manager = FakeConnectionManager()
+    token = "header.payload.signature"
+    digest = hashlib.sha256(token.encode()).digest()
+
+    await create_token(
+        manager,
+        user_id=1,
+        token=token,
+        creation_date="2026-01-01 00:00:00",
+        expiration_date="2026-02-01 00:00:00",
+        scope="['*']",
+    )
+    owner = await get_token_owner_info(manager, token)
+
+    (insert, insert_params, _), (select, select_params, prepare) = manager.conn.executed
+    assert "token_hash" in insert and insert_params[1] == digest
+    assert "tokens.token_hash = %s" in select and select_params == [digest]
+    assert prepare is True
+    assert token not in insert_params
+    assert owner == (1, "alex")
+
+
+@pytest.mark.anyio
+async def test_create_token_rolls_back_and_reraises_integrity_errors(mocker):
+    manager = FakeConnectionManager()
+    mocker.patch.object(
+        manager.conn, "execute", side_effect=psycopg.errors.UniqueViolation()
+    )
+
+    with pytest.raises(psycopg.errors.IntegrityError):
+        await create_token(
+            manager,
+            user_id=1,
+            token="header.payload.signature",
+            creation_date="2026-01-01 00:00:00",
+            expiration_date="2026-02-01 00:00:00",
+            scope="['*']",
+        )
+
+    assert manager.conn.rolled_back is True
+
+
+def test_sql_registry_loads_every_query_once(mocker):
+    reader = mocker.spy(sql_registry, "sql_reader")
+    mocker.patch.dict(sql_registry.SQL_QUERIES, clear=True)
+
+    sql_registry.load_sql_registry()
+    query = sql_registry.get_query("get_token_owner_info")
+
+    assert set(sql_registry.SQL_QUERIES) == set(SQL_PATH)
+    assert reader.call_count == len(SQL_PATH)
+    assert "token_hash" in query